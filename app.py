@@ -11,6 +11,10 @@ ZERO API CALLS. Fully local, no Gemini needed.
 Run:  streamlit run app.py
 """
 
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
 import streamlit as st
 
 from config import (
@@ -18,7 +22,9 @@ from config import (
 )
 from resume_parser  import parse_resume, generate_resume_questions
 from utils.validators import VALIDATORS
-from utils.storage    import save_candidate, load_all_candidates
+from utils.storage    import (
+    save_candidate_async, load_recent_candidates, export_candidates, count_candidates,
+)
 from question_bank    import get_questions_for_stack
 from ui_styles        import (
     get_css, get_header_html, get_sidebar_html, get_steps_html,
@@ -52,6 +58,7 @@ def init_session():
         "resume_uploaded": False,
         "resume_skipped":  False,
         "resume_processed": False,   # True after ANY parse attempt - prevents infinite loop
+        "export_file":     None,     # (bytes, record count, format) of the last prepared export
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -187,6 +194,12 @@ def handle_resume_upload(file_bytes: bytes, mime_type: str, filename: str):
                 "📄 Your PDF appears to be **image-based** (scanned), so I couldn't extract text from it locally.\n\n"
                 "No worries — I'll use your **declared tech stack** to generate your technical questions instead! 🚀"
             )
+        elif err.startswith("pdf_"):
+            # Rejected or abandoned by the extraction guard (resume_parser.extract_pdf)
+            bot_say(
+                "📄 That PDF is too large or complex for me to read quickly.\n\n"
+                "No worries — I'll use your **declared tech stack** to generate your technical questions instead! 🚀"
+            )
         else:
             bot_say("📄 Couldn't read that file — using your tech stack for questions instead. 🚀")
         st.session_state.stage = "generate_questions"
@@ -316,7 +329,7 @@ def handle_farewell():
     has_res = bool(st.session_state.get("resume_analysis"))
     res_row = "\n| 📄 Resume | ✅ Scanned |" if has_res else ""
 
-    save_candidate(c, st.session_state.answers)
+    save_candidate_async(c, st.session_state.answers)
     bot_say(
         f"🎉 **Screening complete, {name}! Well done.**\n\n"
         "---\n**📋 Your Profile**\n\n"
@@ -392,13 +405,19 @@ def render_sidebar():
             )
 
         with st.expander("🗂 Screening History"):
-            records = load_all_candidates()
+            records = load_recent_candidates(5)
             if records:
-                for r in records[:5]:
+                for r in records:
                     st.markdown(get_hist_item_html(r), unsafe_allow_html=True)
             else:
                 st.markdown('<div class="pf-empty">No records yet.</div>', unsafe_allow_html=True)
 
+        with st.expander("📊 Screening Metrics"):
+            render_metrics()
+
+        with st.expander("📥 Export Records"):
+            render_export()
+
         st.markdown(
             '<div class="sb-footer">🔒 GDPR-compliant · Data encrypted at rest<br>'
             '100% local processing · No external API calls</div>',
@@ -406,6 +425,62 @@ def render_sidebar():
         )
 
 
+def render_metrics():
+    """Precomputed counters (utils/counters.py) — no scan of the history."""
+    by_position = count_candidates("position", limit=5)
+    if not by_position["total"]:
+        st.markdown('<div class="pf-empty">No records yet.</div>', unsafe_allow_html=True)
+        return
+    today = datetime.now(timezone.utc).date().isoformat()
+    st.metric("Screenings", by_position["total"],
+              delta=count_candidates("day")["counts"].get(today) or None)
+    for title, counts in (("Top positions", by_position["counts"]),
+                          ("Top techs", count_candidates("tech", limit=5)["counts"])):
+        st.caption(title)
+        for label, n in counts.items():
+            st.markdown(f"`{n:>4}` {label or '—'}")
+
+
+def render_export():
+    """
+    Date / position filters → streamed export to a temp file → download
+    button. The file is read back and deleted at once; the session keeps
+    the bytes, which download_button serves from memory anyway.
+    """
+    today = datetime.now(timezone.utc).date()
+    period = st.date_input("Date range (UTC)", value=(today - timedelta(days=30), today),
+                           key="export_range")
+    position = st.text_input("Position (optional)", key="export_position")
+    fmt = st.radio("Format", ["csv", "xlsx"], horizontal=True, key="export_format")
+
+    if st.button("Prepare export", key="export_prepare", use_container_width=True):
+        if len(period) != 2:
+            st.warning("Pick a start and an end date.")
+            return
+        st.session_state.export_file = None
+        fd, path = tempfile.mkstemp(prefix="talentscout-export-", suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            count = export_candidates(path, since=period[0], until=period[1] + timedelta(days=1),
+                                      position=position.strip() or None, fmt=fmt)
+            with open(path, "rb") as f:
+                data = f.read()
+        except RuntimeError as e:                 # openpyxl missing
+            st.error(str(e))
+            return
+        finally:
+            os.remove(path)
+        st.session_state.export_file = (data, count, fmt)
+
+    prepared = st.session_state.export_file
+    if prepared:
+        data, count, fmt = prepared
+        mime = ("text/csv" if fmt == "csv" else
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        st.download_button(f"⬇ Download {count} record(s)", data, file_name=f"candidates.{fmt}",
+                           mime=mime, key="export_download", use_container_width=True)
+
+
 # ── RESUME UPLOADER ───────────────────────────────────────────────────────────
 def render_resume_uploader():
     if st.session_state.stage != "collect_resume" or st.session_state.ended:
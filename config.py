@@ -14,6 +14,48 @@ MODEL_ID        = "gemini-2.0-flash-lite"  # best free-tier quota (30 RPM, 1500
 MAX_TOKENS      = 1024
 API_KEY_NAME    = "GEMINI_API_KEY"       # key in .streamlit/secrets.toml
 
+# ── Candidate Storage ────────────────────────────────────────────────────────
+STORAGE_BACKEND        = "jsonl"                   # "jsonl" | "sqlite" | "memory"  (see utils/stores.py)
+CANDIDATE_LOG          = "candidates_log.json"     # JSONL backend (one record per line)
+CANDIDATE_DB           = "candidates.db"           # SQLite backend (WAL mode)
+LOG_DURABILITY         = "fsync"                   # "fsync" | "flush"  (JSONL group commit)
+LOG_COMMIT_WINDOW      = 0.002                     # seconds a commit waits to batch appends
+SEGMENT_DIR            = "candidates_segments"     # sealed JSONL segments + sidecar indexes
+SEGMENT_MAX_BYTES      = 64 * 1024 * 1024          # seal the active log past this size…
+SEGMENT_MAX_AGE_HOURS  = 24 * 7                    # …or once its first record is this old
+SEGMENT_PARTITION      = "month"                   # …or when a new month starts ("day", "month" or None)
+SEGMENT_ARCHIVE_DAYS   = 180                       # `segments archive` gzips partitions older than this
+PERSIST_QUEUE_SIZE     = 256                       # background saves held in memory before spilling
+PERSIST_JOURNAL_DIR    = "candidates_journal"
+PERSIST_JOURNAL_FSYNC  = False                     # True: fsync each journal append before ack
+UPSERT_BY_EMAIL        = False                     # True: one current record per email (re-applications replace it)
+EMAIL_INDEX_FILE       = "candidates_email.idx"    # JSONL backend: persistent email → record hash index
+REVISION_HISTORY_LIMIT = 20                        # previous revisions kept (as field diffs) per record
+TRANSCRIPT_DIR         = "candidates_transcripts"  # compressed Q&A transcripts (records keep a pointer)
+RETENTION_DAYS         = 365                       # `python -m utils.stores purge --retention` erases older records
+PII_ENCRYPTION         = False                     # True: AES-GCM name/email/phone at rest, email kept as keyed hash (needs cryptography)
+PII_KEY_FILE           = ".pii.key"                # 32-byte master key, created on first use (or set TALENTSCOUT_PII_KEY)
+PII_FIELDS             = ("name", "email", "phone")
+COUNTERS_DB            = "candidates_counters.db"  # dashboard counters per day/position/location/tech
+STREAM_OFFSET_DIR      = "candidates_offsets"      # durable positions of storage.subscribe() consumers
+WEBHOOK_URL            = ""                        # ATS endpoint for completed screenings ("" disables)
+WEBHOOK_DB             = "candidates_webhook.db"   # dispatcher offset, delivered ids, dead letters
+WEBHOOK_BATCH          = 50                        # records per POST
+WEBHOOK_TIMEOUT        = 5.0                       # seconds per request
+WEBHOOK_MAX_BACKOFF    = 300.0                     # ceiling of the retry delay, seconds
+
+# ── Resume Parsing ───────────────────────────────────────────────────────────
+RESUME_CACHE_DIR       = "resume_cache"     # parse results by content hash ("" keeps them in memory only)
+RESUME_CACHE_MAX_BYTES = 64 * 1024 * 1024   # disk tier is trimmed (least recently used first) past this
+RESUME_CACHE_ITEMS     = 128                # results kept in memory
+PDF_PARALLEL_PAGES     = 12                 # pdfplumber splits documents this long across processes…
+PDF_PAGE_WORKERS       = 0                  # …this many (0: one per CPU, up to 4; 1 disables)
+PDF_MAX_OBJECTS        = 250_000            # pre-scan rejects PDFs with more objects than this
+PDF_MAX_PAGES          = 200                # …reads longer ones with pypdf only, up to this page
+PDF_MAX_IMAGE_BYTES    = 8 * 1024 * 1024    # …and image-heavy ones with pypdf only
+PDF_MEMORY_LIMIT_MB    = 1024               # address-space cap of the extraction subprocess (0: run in-process)
+PDF_TIME_BUDGET        = 20.0               # seconds before the extraction subprocess is killed
+
 # ── Conversation Stages (ordered pipeline) ──────────────────────────────────
 STAGES = [
     "greeting",
@@ -716,7 +716,13 @@ def _parse_experience(experience_str: str) -> int:
     return 1  # default to fresher
 
 
-def _resolve_tech(tech: str) -> str | None:
+def split_tech_stack(tech_stack_str: str) -> list[str]:
+    """Split a raw tech stack string on commas, slashes and semicolons."""
+    techs_raw = re.split(r'[,/;]+', tech_stack_str or "")
+    return [t.strip() for t in techs_raw if t.strip()]
+
+
+def resolve_tech(tech: str) -> str | None:
     """Map a raw tech name to a question bank key, or None if not found."""
     key = tech.strip().lower()
     return ALIASES.get(key) or (key if key in QUESTIONS else None)
@@ -742,15 +748,13 @@ def get_questions_for_stack(
     years   = _parse_experience(experience_str)
     level   = "fresher" if years < 3 else "experienced"
 
-    # Parse tech stack — split on commas, slashes, semicolons
-    techs_raw = re.split(r'[,/;]+', tech_stack_str)
-    techs_raw = [t.strip() for t in techs_raw if t.strip()]
+    techs_raw = split_tech_stack(tech_stack_str)
 
     results   = []
     seen_keys = set()
 
     for tech_name in techs_raw:
-        bank_key = _resolve_tech(tech_name)
+        bank_key = resolve_tech(tech_name)
 
         if not bank_key or bank_key in seen_keys:
             continue
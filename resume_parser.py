@@ -4,11 +4,37 @@ resume_parser.py — 100% local, zero API calls
 1. Extract raw text from PDF or image bytes
 2. Parse keywords: skills, companies, projects, education, years
 3. Generate personalised interview questions from templates
+
+Results are cached by content hash (utils/resume_cache.py), so the same
+PDF uploaded again is not re-extracted. Bump PARSER_VERSION whenever a
+change here alters what parse_resume() returns for the same bytes.
 """
 
+import contextlib
 import io
+import os
 import re
-from collections import defaultdict
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict, deque
+from itertools import islice
+
+from config import (
+    RESUME_CACHE_DIR, RESUME_CACHE_MAX_BYTES, RESUME_CACHE_ITEMS,
+    PDF_PARALLEL_PAGES, PDF_PAGE_WORKERS,
+    PDF_MAX_PAGES, PDF_MAX_OBJECTS, PDF_MAX_IMAGE_BYTES, PDF_MEMORY_LIMIT_MB, PDF_TIME_BUDGET,
+)
+
+try:
+    import resource
+except ImportError:          # not on Windows: the guard keeps its time budget only
+    resource = None
+from utils.resume_cache import ResumeCache, cache_key
+
+
+PARSER_VERSION = "5"
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -164,53 +190,540 @@ _EXP_PATTERN  = re.compile(
     r'(\d+\.?\d*)\s*\+?\s*(?:years?|yrs?)(?:\s+of)?\s*(?:experience|exp)?',
     re.IGNORECASE
 )
-_SECTION_HEADERS = re.compile(
-    r'^(?:experience|work experience|projects?|education|skills?|'
-    r'technical skills?|certifications?|achievements?|summary|objective)\s*$',
-    re.IGNORECASE | re.MULTILINE
+_AT_COMPANY  = re.compile(r'\bat\s+([A-Z][A-Za-z0-9\s&.\-]{2,35})\s*[|,]')
+_HAS_YEAR    = re.compile(r'20\d{2}')
+_HAS_4DIGITS = re.compile(r'\d{4}')
+_URLISH      = re.compile(r'@|http|www')
+_BULLETS     = ("-", "*")                # line prefixes after normalize_text()
+_DEGREES     = re.compile(
+    r'ph\.d|phd|m\.tech|m\.s\.|msc|m\.e\.|mba|b\.tech|b\.e\.|bsc|b\.s\.|bachelor|master|doctor',
+    re.IGNORECASE
 )
 
+# Section header line (lower-cased, single-spaced) → canonical section name
+_SECTIONS = {
+    "experience": "experience", "work experience": "experience",
+    "project": "projects", "projects": "projects",
+    "education": "education",
+    "skill": "skills", "skills": "skills",
+    "technical skill": "skills", "technical skills": "skills",
+    "certification": "certifications", "certifications": "certifications",
+    "achievement": "achievements", "achievements": "achievements",
+    "summary": "summary", "objective": "objective",
+    "contact": "contact", "profile": "profile",
+}
+_MAX_HEADER_CHARS = max(map(len, _SECTIONS)) + 4
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DOCUMENT MODEL  (normalised and segmented once, shared by every extractor)
+# ─────────────────────────────────────────────────────────────────────────────
+# One pass folds ligatures, odd spaces and bullet glyphs through a translation
+# table; words hyphenated across a line break are then joined. The table is
+# applied by a character-class regex rather than str.translate(), which maps
+# every character of non-ASCII text through the dict (~50x slower on a résumé
+# that only has a few dozen characters to replace).
+_NORMALIZE = str.maketrans({
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl",
+    "\ufb05": "st", "\ufb06": "st",
+    "\u00ad": None, "\u200b": None, "\ufeff": None, "\r": None,   # soft hyphen, zero-width, CR
+    "\u00a0": " ", "\u2007": " ", "\u2009": " ", "\u202f": " ", "\t": " ",
+    "\u2010": "-", "\u2011": "-",
+    "•": "-", "▪": "-", "◦": "-", "●": "-", "■": "-", "►": "-", "‣": "-", "⁃": "-", "∙": "-",
+})
+_NORMALIZE_RE = re.compile("[" + re.escape("".join(map(chr, _NORMALIZE))) + "]")
+_HYPHEN_BREAK = re.compile(r'(?<=[a-z])-\n(?=[a-z])')
+
+
+def normalize_text(text: str) -> str:
+    """Apply _NORMALIZE and join line-break hyphenation."""
+    text = _NORMALIZE_RE.sub(lambda m: _NORMALIZE[ord(m.group())] or "", text)
+    return _HYPHEN_BREAK.sub("", text) if "-\n" in text else text
+
+
+class ResumeDocument:
+    """
+    A resume's text, normalised and split into lines and sections once.
+
+      text      normalised text (skill positions refer to it)
+      lines     stripped, non-empty lines
+      offsets   offset of each line's first character in `text`
+      headers   {line index: canonical section name} for header lines
+      sections  {section name: [(first, end) line ranges]}, headers excluded
+    """
+
+    __slots__ = ("text", "lines", "offsets", "headers", "sections")
+
+    def __init__(self, text: str):
+        self.text = text = normalize_text(text)
+        self.lines, self.offsets, self.headers = [], [], {}
+        pos = 0
+        for raw in text.split("\n"):
+            stripped = raw.strip()
+            if stripped:
+                if len(stripped) <= _MAX_HEADER_CHARS:
+                    name = _SECTIONS.get(" ".join(stripped.lower().split()))
+                    if name:
+                        self.headers[len(self.lines)] = name
+                self.offsets.append(pos + len(raw) - len(raw.lstrip()))
+                self.lines.append(stripped)
+            pos += len(raw) + 1
+
+        self.sections = defaultdict(list)
+        starts = sorted(self.headers)
+        for i, first in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else len(self.lines)
+            self.sections[self.headers[first]].append((first + 1, end))
+
+    def section(self, name: str) -> list[str]:
+        """Lines under every `name` header, in document order."""
+        return [line for first, end in self.sections.get(name, ()) for line in self.lines[first:end]]
+
+    def line_at(self, offset: int) -> str:
+        """The stripped line containing `text[offset]`."""
+        i = bisect_right(self.offsets, offset) - 1
+        return self.lines[i] if i >= 0 else ""
+
+
+def _as_document(source) -> ResumeDocument:
+    return source if isinstance(source, ResumeDocument) else ResumeDocument(source)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # PDF / IMAGE TEXT EXTRACTION
 # ─────────────────────────────────────────────────────────────────────────────
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+MAX_TEXT_CHARS = 15000       # ~4k tokens: extraction stops once this much text is in
+
+_COLUMN_SPLIT   = 0.45       # a text run starting right of this share of the width…
+_COLUMN_SHARE   = 0.25       # …for this share of page 1's runs means a multi-column layout
+_MAX_WORD_CHARS = 40         # longer "words" mean pypdf lost the spacing
+_PAGES_PER_TASK = 2          # pdfplumber pages per task in a page-parallel extraction
+_PROBE_PAGES    = 50         # pages checked for fonts before calling a PDF scanned
+
+_page_pool      = None
+_page_pool_lock = threading.Lock()
+_mp_ctx         = None           # multiprocessing context, set up on first use
+_main_lock      = threading.Lock()
+
+
+def _has_fonts(page) -> bool:
+    resources = page.get("/Resources") or {}
+    if "/Font" in resources:
+        return True
+    for xobj in (resources.get("/XObject") or {}).values():
+        xobj = xobj.get_object()
+        if xobj.get("/Subtype") == "/Form" and "/Font" in (xobj.get("/Resources") or {}):
+            return True
+    return False
+
+
+def _probe_pdf(reader) -> tuple[str, str]:
     """
-    Extract text from PDF using two libraries for maximum coverage.
-    1. pdfplumber  — better at complex layouts, tables, multi-column
-    2. pypdf       — fallback for simpler PDFs
-    Zero API calls.
+    Pick the engine for a document from its first page, read with pypdf.
+
+    pypdf is several times faster but flattens multi-column layouts and
+    sometimes drops spaces; pdfplumber's layout analysis handles both.
+    Returns (engine, page 1 text) where engine is "pypdf", "pdfplumber"
+    or "none" (no fonts on any page: a scanned PDF).
     """
-    text = ""
+    if not any(_has_fonts(page) for page in islice(reader.pages, _PROBE_PAGES)):
+        return "none", ""
+    page = reader.pages[0]
+    width = float(page.mediabox.width) or 1.0
+    starts = []
 
-    # Method 1: pdfplumber (handles most modern resume PDFs)
+    def visit(text, cm, tm, font, size):
+        if text.strip():
+            starts.append(tm[4] * cm[0] + tm[5] * cm[2] + cm[4])
+
+    text = (page.extract_text(visitor_text=visit) or "").strip()
+    if not text:
+        return "pdfplumber", ""
+    right = sum(1 for x in starts if x > width * _COLUMN_SPLIT)
+    if right >= len(starts) * _COLUMN_SHARE and right < len(starts):
+        return "pdfplumber", ""
+    if max(map(len, text.split())) > _MAX_WORD_CHARS:
+        return "pdfplumber", ""
+    return "pypdf", text
+
+
+def _pages_until(texts, max_chars: int) -> tuple[list[str], int]:
+    """Non-empty stripped page texts from `texts` until `max_chars` are collected."""
+    pages, size, read = [], 0, 0
+    for t in texts:
+        read += 1
+        t = (t or "").strip()
+        if t:
+            pages.append(t)
+            size += len(t) + 2
+            if size >= max_chars:
+                break
+    return pages, read
+
+
+def _extract_pdf(file_bytes: bytes, max_chars: int, downgrade: bool = False,
+                 page_cap: int = PDF_MAX_PAGES, workers: int | None = None,
+                 defer: bool = False) -> dict:
+    """
+    extract_pdf() without the guard. `downgrade`: pypdf only. `workers`:
+    page-parallel processes (None: _page_workers()). `defer`: stop after the
+    probe when the pages would go to the page pool, returning the page count
+    as "deferred" so the caller runs them (see _extract_guarded).
+    """
+    if workers is None:
+        workers = _page_workers()
+    out = {"text": "", "engine": "none", "pages_read": 0, "pages_total": 0, "timings_ms": {}}
+    t0 = time.perf_counter()
     try:
-        import pdfplumber
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            pages = []
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t and t.strip():
-                    pages.append(t.strip())
-            text = "\n\n".join(pages)
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(file_bytes))
+        out["pages_total"] = len(reader.pages)
+        engine, first = _probe_pdf(reader)
+        if downgrade and engine == "pdfplumber":
+            engine = "pypdf"
+    except MemoryError:
+        raise
     except Exception:
-        pass
+        reader, engine, first = None, "pdfplumber", ""
+    max_pages = min(out["pages_total"] or page_cap, page_cap)
+    t1 = time.perf_counter()
+    out["timings_ms"]["probe"] = round((t1 - t0) * 1000, 2)
 
-    # Method 2: pypdf fallback
-    if not text.strip():
+    pages, read = [], 0
+    if engine == "pdfplumber":
+        try:
+            import pdfplumber
+            if workers > 1 and max_pages >= PDF_PARALLEL_PAGES:
+                if defer:
+                    out.update(engine=engine, deferred=max_pages, workers=workers)
+                    return out
+                texts = _plumb_parallel(file_bytes, max_pages, workers)
+                pages, read = _pages_until(texts, max_chars)
+                out["workers"] = workers
+            else:
+                with pdfplumber.open(io.BytesIO(file_bytes), pages=range(1, max_pages + 1)) as pdf:
+                    pages, read = _pages_until(_plumb(pdf.pages), max_chars)
+        except MemoryError:
+            raise
+        except Exception:
+            pass
+        t2 = time.perf_counter()
+        out["timings_ms"]["pdfplumber"] = round((t2 - t1) * 1000, 2)
+        if not pages and reader is not None:
+            engine, t1 = "pypdf", t2           # pdfplumber failed: fall back once
+    if engine == "pypdf":
         try:
-            from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(file_bytes))
-            pages = []
-            for page in reader.pages:
-                t = page.extract_text()
-                if t and t.strip():
-                    pages.append(t.strip())
-            text = "\n\n".join(pages)
+            rest = (p.extract_text() for p in reader.pages[1 if first else 0:max_pages])
+            pages, read = _pages_until(_chain(first, rest) if first else rest, max_chars)
+        except MemoryError:
+            raise
         except Exception:
             pass
+        out["timings_ms"]["pypdf"] = round((time.perf_counter() - t1) * 1000, 2)
+    out["engine"] = engine
+    out["pages_read"] = read
+    out["text"] = "\n\n".join(pages)[:max_chars]
+    return out
+
+
+# ── Pathological-PDF guard ───────────────────────────────────────────────────
+# A crafted or huge PDF can keep a parser busy for minutes or exhaust memory.
+# prescan_pdf() sizes the document from its raw bytes (no parser involved)
+# to reject it or downgrade it to pypdf; the extraction itself then runs in
+# a child process with an address-space cap and a wall-clock budget. The
+# child never starts processes of its own: pages of a long document come
+# back to the caller, which runs them on the shared page pool (whose
+# workers carry the same cap) within what is left of the budget.
+
+_OBJ_RE      = re.compile(rb"\d+\s+\d+\s+obj\b")
+_OBJSTM_RE   = re.compile(rb"/Type\s*/ObjStm")
+_N_RE        = re.compile(rb"/N\s+(\d+)")
+_PAGE_RE     = re.compile(rb"/Type\s*/Page(?![s\w])")
+_COUNT_RE    = re.compile(rb"/Count\s+(\d+)")
+_IMAGE_RE    = re.compile(rb"/Subtype\s*/Image\b")
+_STREAM_RE   = re.compile(rb"stream\r?\n")
+
+
+def prescan_pdf(file_bytes: bytes) -> dict:
+    """
+    Structural size of a PDF from a regex scan of its bytes.
+
+    Returns:
+        {"pages", "objects", "image_bytes"}. Objects packed in object
+        streams are counted from their /N; when the page objects are
+        compressed too, "pages" falls back to the largest /Count.
+    """
+    objects = len(_OBJ_RE.findall(file_bytes))
+    for m in _OBJSTM_RE.finditer(file_bytes):
+        n = _N_RE.search(file_bytes, max(0, m.start() - 256), m.end() + 256)
+        if n:
+            objects += int(n.group(1))
+    pages = len(_PAGE_RE.findall(file_bytes))
+    if not pages:
+        pages = max((int(c) for c in _COUNT_RE.findall(file_bytes)), default=0)
+    image_bytes = 0
+    for m in _IMAGE_RE.finditer(file_bytes):
+        start = _STREAM_RE.search(file_bytes, m.end())
+        end = file_bytes.find(b"endstream", start.end()) if start else -1
+        if end > 0:
+            image_bytes += end - start.end()
+    return {"pages": pages, "objects": objects, "image_bytes": image_bytes}
+
+
+def _guard_error(error: str, **detail) -> dict:
+    return {"text": "", "engine": "none", "pages_read": 0, "pages_total": 0,
+            "timings_ms": {}, "error": error, "detail": detail}
+
 
-    return text[:15000]  # cap at ~4k tokens
+def _limit_memory(limit: int):
+    if resource is not None and limit:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _guarded_child(conn, file_bytes: bytes, max_chars: int, downgrade: bool, page_cap: int,
+                   limit: int, workers: int):
+    # Settings arrive as arguments: a forkserver child sees the module as
+    # imported, not as the caller may have changed it (utils/resume_batch.py).
+    _limit_memory(limit)
+    try:
+        out = _extract_pdf(file_bytes, max_chars, downgrade, page_cap, workers, defer=True)
+    except MemoryError:
+        out = _guard_error("pdf_memory", limit_mb=limit >> 20)
+    conn.send(out)
+    conn.close()
+
+
+def _run_guarded(file_bytes: bytes, max_chars: int, downgrade: bool, workers: int,
+                 budget: float) -> dict:
+    ctx = _mp_context()
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_guarded_child,
+                       args=(send, file_bytes, max_chars, downgrade, PDF_MAX_PAGES,
+                             PDF_MEMORY_LIMIT_MB << 20, workers))
+    with _main_hidden():
+        proc.start()
+    send.close()
+    try:
+        if not recv.poll(max(0.0, budget)):
+            return _guard_error("pdf_timeout", budget_s=PDF_TIME_BUDGET)
+        try:
+            return recv.recv()
+        except EOFError:
+            proc.join(1.0)
+            return _guard_error("pdf_failed", exitcode=proc.exitcode)
+    finally:
+        recv.close()
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+
+
+def _extract_guarded(file_bytes: bytes, max_chars: int, downgrade: bool, workers: int) -> dict:
+    deadline = time.monotonic() + PDF_TIME_BUDGET
+    out = _run_guarded(file_bytes, max_chars, downgrade, workers, PDF_TIME_BUDGET)
+    n_pages = out.pop("deferred", 0)
+    if not n_pages:
+        return out
+
+    t1 = time.perf_counter()
+    try:
+        texts = _plumb_parallel(file_bytes, n_pages, workers, deadline)
+        pages, read = _pages_until(texts, max_chars)
+    except TimeoutError:
+        return _guard_error("pdf_timeout", budget_s=PDF_TIME_BUDGET)
+    except MemoryError:
+        return _guard_error("pdf_memory", limit_mb=PDF_MEMORY_LIMIT_MB)
+    except Exception:
+        pages, read = [], 0
+    out["timings_ms"]["pdfplumber"] = round((time.perf_counter() - t1) * 1000, 2)
+    if not pages and out["pages_total"]:
+        # pdfplumber failed: fall back once, to pypdf in a fresh child
+        fallback = _run_guarded(file_bytes, max_chars, True, 1, deadline - time.monotonic())
+        if fallback.get("error"):
+            return fallback
+        out["timings_ms"]["pypdf"] = fallback["timings_ms"].get("pypdf", 0.0)
+        out.update(engine=fallback["engine"], text=fallback["text"],
+                   pages_read=fallback["pages_read"])
+        out.pop("workers")
+        return out
+    out["pages_read"] = read
+    out["text"] = "\n\n".join(pages)[:max_chars]
+    return out
+
+
+def extract_pdf(file_bytes: bytes, max_chars: int = MAX_TEXT_CHARS) -> dict:
+    """
+    Extract up to `max_chars` of text with one engine chosen by _probe_pdf(),
+    reading pages only until the budget is met. Zero API calls.
+
+    The document is pre-scanned first: more than PDF_MAX_OBJECTS objects is
+    rejected, more than PDF_MAX_PAGES pages or PDF_MAX_IMAGE_BYTES of images
+    is read with pypdf only (and never past page PDF_MAX_PAGES). Extraction
+    then runs in a child process capped at PDF_MEMORY_LIMIT_MB and
+    PDF_TIME_BUDGET seconds (PDF_MEMORY_LIMIT_MB = 0 runs it in-process);
+    a long pdfplumber document is handed back and its pages read on the
+    shared page pool under the same caps.
+
+    Returns:
+    {
+      "text":        extracted text ("" for scanned or unreadable PDFs),
+      "engine":      "pypdf" | "pdfplumber" | "none",
+      "pages_read":  pages extracted,
+      "pages_total": pages in the document,
+      "timings_ms":  {"probe": ms, <engine>: ms},
+      "prescan":     {"pages", "objects", "image_bytes"},
+      "downgraded":  bool,
+      "error":       None | "pdf_rejected" | "pdf_timeout" | "pdf_memory" | "pdf_failed",
+      "detail":      {...} what limit was hit (with "error"),
+    }
+    """
+    scan = prescan_pdf(file_bytes)
+    if scan["objects"] > PDF_MAX_OBJECTS:
+        out = _guard_error("pdf_rejected", objects=scan["objects"], limit=PDF_MAX_OBJECTS)
+    else:
+        downgrade = scan["pages"] > PDF_MAX_PAGES or scan["image_bytes"] > PDF_MAX_IMAGE_BYTES
+        workers = _page_workers()          # read here, where callers may have set it
+        if PDF_MEMORY_LIMIT_MB:
+            out = _extract_guarded(file_bytes, max_chars, downgrade, workers)
+        else:
+            out = _extract_pdf(file_bytes, max_chars, downgrade, PDF_MAX_PAGES, workers)
+        out["downgraded"] = downgrade
+    out.setdefault("error", None)
+    out["prescan"] = scan
+    return out
+
+
+def _chain(first: str, rest):
+    yield first
+    yield from rest
+
+
+def _plumb(pages):
+    for page in pages:
+        yield page.extract_text()
+        page.close()          # drop the page's parsed layout before the next one
+
+
+# ── Page-parallel pdfplumber ─────────────────────────────────────────────────
+# Layout analysis is CPU-bound pure Python, so long documents are split into
+# page ranges run in worker processes. Ranges are submitted a few at a time
+# and consumed in page order, so the character budget still stops the work
+# early (queued ranges are cancelled, running ones are discarded).
+
+def _page_workers() -> int:
+    if PDF_PAGE_WORKERS:
+        return PDF_PAGE_WORKERS
+    return min(4, os.cpu_count() or 1)
+
+
+def _mp_context():
+    global _mp_ctx
+    if _mp_ctx is None:
+        import multiprocessing
+        methods = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in methods else "spawn"
+        ctx = multiprocessing.get_context(method)
+        if method == "forkserver":
+            # forkserver: forking the (threaded) Streamlit server itself is unsafe;
+            # children fork from a server that already imported the PDF engines.
+            ctx.set_forkserver_preload(["resume_parser", "pypdf", "pdfplumber"])
+        _mp_ctx = ctx
+    return _mp_ctx
+
+
+@contextlib.contextmanager
+def _main_hidden():
+    """
+    Start processes without the caller's __main__. forkserver and spawn
+    children re-import the main module from its file before running their
+    target; under `streamlit run` that is app.py, which would render the
+    whole page again in every child (and a script without a __main__ guard
+    fails to bootstrap). Our targets live in this module, so the children
+    never need it.
+    """
+    main = sys.modules["__main__"]
+    if __name__ == "__main__" or main is None:
+        yield                          # run as a script: targets pickle as __main__.*
+        return
+    missing = object()
+    with _main_lock:
+        saved = {k: main.__dict__.get(k, missing) for k in ("__file__", "__spec__")}
+        main.__dict__.pop("__file__", None)
+        main.__spec__ = None
+        try:
+            yield
+        finally:
+            for k, v in saved.items():
+                if v is missing:
+                    main.__dict__.pop(k, None)
+                else:
+                    main.__dict__[k] = v
+
+
+def _page_executor(workers: int):
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            _page_pool = ProcessPoolExecutor(workers, mp_context=_mp_context(),
+                                             initializer=_limit_memory,
+                                             initargs=(PDF_MEMORY_LIMIT_MB << 20,))
+        return _page_pool
+
+
+def _plumb_range(file_bytes: bytes, start: int, stop: int) -> list[str]:
+    """pdfplumber text of pages [start, stop) — runs in a worker process."""
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(file_bytes), pages=range(start + 1, stop + 1)) as pdf:
+        return list(_plumb(pdf.pages))
+
+
+def _plumb_parallel(file_bytes: bytes, n_pages: int, workers: int,
+                    deadline: float | None = None):
+    """
+    Page texts in page order, extracted `_PAGES_PER_TASK` pages per task.
+    Past `deadline` (time.monotonic()) raises TimeoutError and kills the pool.
+    """
+    global _page_pool
+    from concurrent.futures.process import BrokenProcessPool
+
+    pool = _page_executor(workers)
+    ranges = iter(range(0, n_pages, _PAGES_PER_TASK))
+    window = deque()
+
+    def submit():
+        start = next(ranges, None)
+        if start is not None:
+            stop = min(start + _PAGES_PER_TASK, n_pages)
+            with _main_hidden():          # the pool starts its workers on submit
+                window.append(pool.submit(_plumb_range, file_bytes, start, stop))
+
+    try:
+        for _ in range(workers * 2):
+            submit()
+        while window:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            texts = window.popleft().result(left)
+            submit()
+            yield from texts
+    except (BrokenProcessPool, TimeoutError) as e:
+        with _page_pool_lock:
+            if _page_pool is pool:
+                _page_pool = None
+        if isinstance(e, TimeoutError):
+            # A running task cannot be cancelled: end its worker with the pool.
+            for proc in list((pool._processes or {}).values()):
+                proc.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        for fut in window:
+            fut.cancel()
+
+
+def extract_text_from_pdf(file_bytes: bytes) -> str:
+    """Extracted text of a PDF, capped at MAX_TEXT_CHARS (see extract_pdf)."""
+    return extract_pdf(file_bytes)["text"]
 
 
 def extract_text_from_image(file_bytes: bytes) -> str:
@@ -222,35 +735,103 @@ def extract_text_from_image(file_bytes: bytes) -> str:
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# KEYWORD EXTRACTION
+# SKILL MATCHER  (every TECH_GROUPS keyword in one pass, compiled once)
 # ─────────────────────────────────────────────────────────────────────────────
-def extract_skills(text: str) -> list[str]:
-    """Find all tech skills mentioned in the resume text."""
-    text_lower = text.lower()
-    found = []
+# Keywords are merged into a trie and the trie is emitted as one regex, so
+# the C regex engine walks the text once, following the shared prefixes
+# (the goto function of an Aho-Corasick automaton) instead of running one
+# substring scan per keyword. A keyword only matches as a whole token: no
+# word character may precede it, and none may follow it if it ends in one
+# ("c++17", "c#/.net" match; "js" in "json", ".net" in "example.net" don't).
+# A space inside a keyword matches any run of whitespace.
+_AMBIGUOUS_KEYWORDS = {"go": "Go", "r": "R"}   # must appear with this casing…
+_AMBIGUOUS_JOINERS  = "-&'"                    # …and not glued into "go-to", "R&D"
+
+_skill_matcher = None
+
+
+def _trie_regex(node: dict, last: str) -> str:
+    alts = [
+        (r"\s+" if ch == " " else re.escape(ch)) + _trie_regex(child, ch)
+        for ch, child in sorted(node.items(), key=lambda kv: -len(kv[0])) if ch
+    ]
+    if "" in node:                                # a keyword ends here: try longer ones first
+        alts.append(r"(?!\w)" if last.isalnum() or last == "_" else "")
+    return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+
+def _compile_skill_matcher():
+    """(pattern, {normalised keyword: [groups]}) for all TECH_GROUPS keywords."""
+    groups_of: dict[str, list[str]] = defaultdict(list)
     for group_name, keywords in TECH_GROUPS.items():
         for kw in keywords:
-            if kw in text_lower:
-                found.append(group_name)
-                break
-    return list(dict.fromkeys(found))   # deduplicated, order preserved
+            kw = " ".join(kw.split())
+            if group_name not in groups_of[kw]:
+                groups_of[kw].append(group_name)
+    trie: dict = {}
+    for kw in groups_of:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return re.compile(r"(?<!\w)" + _trie_regex(trie, "")), dict(groups_of)
+
+
+def match_skills(text: str) -> dict[str, dict]:
+    """
+    Tech skills mentioned in `text`, with where.
+
+    Returns:
+        {group: {"count": hits, "positions": [(start, end), ...]}} in
+        TECH_GROUPS order; positions are character offsets into `text`.
+        Overlapping keywords count once (the longest, leftmost wins).
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        _skill_matcher = _compile_skill_matcher()
+    pattern, groups_of = _skill_matcher
+
+    text_lower = text.lower()
+    if len(text_lower) != len(text):              # rare case-mappings that change length
+        text_lower = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+    hits: dict[str, dict] = {}
+    for m in pattern.finditer(text_lower):
+        start, end = m.span()
+        kw = m.group() if " " not in m.group() else " ".join(m.group().split())
+        cased = _AMBIGUOUS_KEYWORDS.get(kw)
+        if cased is not None and (
+            text[start:end] != cased
+            or text[start - 1:start] in _AMBIGUOUS_JOINERS and start > 0
+            or text[end:end + 1] in _AMBIGUOUS_JOINERS and end < len(text)
+        ):
+            continue
+        for group_name in groups_of.get(kw, ()):
+            hit = hits.setdefault(group_name, {"count": 0, "positions": []})
+            hit["count"] += 1
+            hit["positions"].append((start, end))
+    return {g: hits[g] for g in TECH_GROUPS if g in hits}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# KEYWORD EXTRACTION
+# ─────────────────────────────────────────────────────────────────────────────
+def extract_skills(text: str) -> list[str]:
+    """Find all tech skills mentioned in the resume text (TECH_GROUPS order)."""
+    return list(match_skills(text))
 
 
-def extract_companies(text: str) -> list[str]:
+def extract_companies(doc: ResumeDocument | str) -> list[str]:
     """
     Extract company names from résumé.
     Strategy: look for lines matching "Role at Company | Date" patterns.
     """
+    doc = _as_document(doc)
     companies = []
     seen = set()
 
-    for line in text.split("\n"):
-        stripped = line.strip()
-        if not stripped:
-            continue
-
+    for line in doc.lines:
         # Pattern: "Role at CompanyName | date" or "CompanyName | Role | date"
-        at_match = re.search(r'\bat\s+([A-Z][A-Za-z0-9\s&.\-]{2,35})\s*[|,]', stripped)
+        at_match = _AT_COMPANY.search(line)
         if at_match:
             name = at_match.group(1).strip()
             if name.lower() not in seen and len(name) > 2:
@@ -259,14 +840,13 @@ def extract_companies(text: str) -> list[str]:
                 continue
 
         # Pattern: line has year range and a pipe — likely "Company | Role | 2020-2022"
-        if re.search(r'20\d{2}', stripped) and '|' in stripped:
-            parts = [p.strip() for p in stripped.split("|")]
+        if '|' in line and _HAS_YEAR.search(line):
+            parts = [p.strip() for p in line.split("|")]
             # First part is often company or role — pick the one that looks like a proper noun
             for part in parts[:2]:
-                part = part.strip()
                 if (len(part) > 2 and len(part) < 40
                         and part[0].isupper()
-                        and not re.search(r'\d{4}', part)          # not a date
+                        and not _HAS_4DIGITS.search(part)          # not a date
                         and part.lower() not in seen):
                     seen.add(part.lower())
                     companies.append(part)
@@ -275,52 +855,33 @@ def extract_companies(text: str) -> list[str]:
     return companies[:5]
 
 
-def extract_projects(text: str) -> list[str]:
+def extract_projects(doc: ResumeDocument | str) -> list[str]:
     """
     Extract project titles from the Projects section of a résumé.
     Returns only clean titles (short lines, not bullet-point descriptions).
     """
     projects = []
-    in_projects = False
-    bullet = re.compile(r'^[-•*▪◦]\s*')
-
-    for line in text.split("\n"):
-        stripped = line.strip()
-        if not stripped:
-            continue
 
-        # Detect section header
-        if re.match(r'^projects?\s*$', stripped, re.IGNORECASE):
-            in_projects = True
-            continue
-        if re.match(
-            r'^(?:experience|work experience|education|skills|certifications?|'
-            r'achievements?|summary|objective|contact|profile)\s*$',
-            stripped, re.IGNORECASE
-        ):
-            in_projects = False
+    for line in _as_document(doc).section("projects"):
+        # Skip bullet points (descriptions)
+        if line.startswith(_BULLETS):
             continue
-
-        if in_projects:
-            # Skip bullet points (descriptions)
-            if bullet.match(stripped):
-                continue
-            # Short lines (10–60 chars) that look like titles, not dates or emails
-            if (10 < len(stripped) < 60
-                    and not re.search(r'20\d{2}', stripped)
-                    and not re.search(r'@|http|www', stripped)
-                    and not stripped.endswith(":")):
-                # Avoid duplicate / very similar titles
-                if not any(p.lower() in stripped.lower() or stripped.lower() in p.lower()
-                           for p in projects):
-                    projects.append(stripped)
+        # Short lines (10–60 chars) that look like titles, not dates or emails
+        if (10 < len(line) < 60
+                and not _HAS_YEAR.search(line)
+                and not _URLISH.search(line)
+                and not line.endswith(":")):
+            # Avoid duplicate / very similar titles
+            lower = line.lower()
+            if not any(p.lower() in lower or lower in p.lower() for p in projects):
+                projects.append(line)
 
     return projects[:4]
 
 
-
-def extract_experience_years(text: str) -> str:
+def extract_experience_years(doc: ResumeDocument | str) -> str:
     """Extract years of experience if mentioned."""
+    text = _as_document(doc).text
     m = _EXP_PATTERN.search(text)
     if m:
         return f"{m.group(1)} years"
@@ -333,15 +894,13 @@ def extract_experience_years(text: str) -> str:
     return ""
 
 
-def extract_education(text: str) -> str:
-    """Extract highest degree and institution."""
-    degrees = ["ph.d", "phd", "m.tech", "m.s.", "msc", "m.e.", "mba",
-               "b.tech", "b.e.", "bsc", "b.s.", "bachelor", "master", "doctor"]
-    text_lower = text.lower()
-    for line in text.split("\n"):
-        ll = line.lower().strip()
-        if any(d in ll for d in degrees) and len(line.strip()) > 5:
-            return line.strip()[:100]
+def extract_education(doc: ResumeDocument | str) -> str:
+    """Extract highest degree and institution (the first line naming a degree)."""
+    doc = _as_document(doc)
+    for m in _DEGREES.finditer(doc.text):
+        line = doc.line_at(m.start())
+        if len(line) > 5:
+            return line[:100]
     return ""
 
 
@@ -428,32 +987,75 @@ def generate_resume_questions(
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
+_cache      = None
+_cache_lock = threading.Lock()
+
+
+def _result_cache() -> ResumeCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResumeCache(RESUME_CACHE_DIR, RESUME_CACHE_MAX_BYTES, RESUME_CACHE_ITEMS)
+    return _cache
+
+
 def parse_resume(file_bytes: bytes, mime_type: str) -> dict:
     """
     Full local resume parsing pipeline. Zero API calls.
 
+    PDF results are served from the content-addressed cache when the same
+    bytes were parsed before (positions in "skill_hits" are then lists,
+    not tuples). The cache does not keep the extracted text, which holds
+    the candidate's contact details: a cached result has "text" "".
+
     Returns:
     {
       "text":       raw extracted text,
       "skills":     [...],
+      "skill_hits": {skill: {"count", "positions"}},
       "companies":  [...],
       "projects":   [...],
       "education":  "...",
       "experience": "...",
       "questions":  [{question, category, source}, ...],
       "is_image":   bool,
-      "error":      str or None,
+      "error":      str or None  ("scanned_pdf", "image_file", or a guard error: "pdf_rejected",
+                    "pdf_timeout", "pdf_memory", "pdf_failed" with "error_detail"),
+      "extraction": {engine, pages_read, pages_total, timings_ms, prescan, downgraded}  (PDFs),
     }
     """
+    if mime_type != "application/pdf":
+        return _parse_resume(file_bytes, mime_type)
+    cache = _result_cache()
+    key = cache_key(file_bytes, PARSER_VERSION)
+    result = cache.get(key)
+    if result is not None:
+        return {**result, "text": ""}
+    result = _parse_resume(file_bytes, mime_type)
+    if result["error"] not in ("pdf_timeout", "pdf_failed"):       # may pass on a retry
+        cache.put(key, {k: v for k, v in result.items() if k != "text"})
+    return result
+
+
+def _parse_resume(file_bytes: bytes, mime_type: str) -> dict:
     result = {
-        "text": "", "skills": [], "companies": [], "projects": [],
+        "text": "", "skills": [], "skill_hits": {}, "companies": [], "projects": [],
         "education": "", "experience": "", "questions": [],
         "is_image": False, "error": None,
     }
 
     # Extract text
     if mime_type == "application/pdf":
-        text = extract_text_from_pdf(file_bytes)
+        extraction = extract_pdf(file_bytes)
+        text = extraction.pop("text")
+        error = extraction.pop("error")
+        result["extraction"] = extraction
+        if error:
+            # The guard gave up (see extract_pdf): "detail" says which limit was hit
+            result["error"] = error
+            result["error_detail"] = extraction.pop("detail")
+            return result
         if not text.strip():
             # Scanned/image PDF - can't extract locally, auto-continue gracefully
             result["error"] = "scanned_pdf"
@@ -463,17 +1065,19 @@ def parse_resume(file_bytes: bytes, mime_type: str) -> dict:
         result["error"] = "image_file"
         return result
 
-    result["text"]       = text
-    result["skills"]     = extract_skills(text)
-    result["companies"]  = extract_companies(text)
-    result["projects"]   = extract_projects(text)
-    result["education"]  = extract_education(text)
-    result["experience"] = extract_experience_years(text)
+    doc = ResumeDocument(text)
+    result["text"]       = doc.text
+    result["skill_hits"] = match_skills(doc.text)
+    result["skills"]     = list(result["skill_hits"])
+    result["companies"]  = extract_companies(doc)
+    result["projects"]   = extract_projects(doc)
+    result["education"]  = extract_education(doc)
+    result["experience"] = extract_experience_years(doc)
     result["questions"]  = generate_resume_questions(
         result["skills"],
         result["projects"],
         result["companies"],
         result["experience"],
-        text,
+        doc.text,
     )
     return result
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Shared fixtures. Tests run from the repository root (`python -m pytest`),
+which puts config.py, resume_parser.py and utils/ on the import path.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def make_pdf(pages: int = 1, lines: int = 30) -> bytes:
+    """A text PDF of `pages` two-column pages (two columns make the probe pick pdfplumber)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for p in range(pages):
+        ops = []
+        for i in range(lines):
+            y = 780 - i * 22
+            ops.append(f"BT /F1 10 Tf 40 {y} Td (Page {p} line {i} Python Django) Tj ET")
+            ops.append(f"BT /F1 10 Tf 320 {y} Td (Built services at Acme Corp {i}) Tj ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out, offsets = b"%PDF-1.4\n", []
+    for n, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode("latin-1")
+    out += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n").encode("latin-1")
+    return out
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    def write(pages: int = 1) -> str:
+        path = tmp_path / f"resume-{pages}.pdf"
+        path.write_bytes(make_pdf(pages))
+        return str(path)
+    return write
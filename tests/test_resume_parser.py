@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import ROOT
+
+
+def _run_unguarded(tmp_path, pdf: str, workers: int) -> tuple[list[str], dict]:
+    # No `if __name__ == "__main__"`, like app.py under `streamlit run`: a
+    # child that re-imported __main__ would print the marker again (or fail).
+    script = tmp_path / "unguarded.py"
+    script.write_text(textwrap.dedent(f"""
+        import json, sys
+        sys.path.insert(0, {ROOT!r})
+        print("MAIN", flush=True)
+        import resume_parser
+        resume_parser.PDF_PAGE_WORKERS = {workers}
+        out = resume_parser.extract_pdf(open({pdf!r}, "rb").read(), 10 ** 6)
+        out["chars"] = len(out.pop("text"))
+        print(json.dumps(out), flush=True)
+    """))
+    proc = subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True,
+                          text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    lines = proc.stdout.splitlines()
+    return lines, json.loads(lines[-1])
+
+
+def test_guarded_extraction_from_unguarded_main(tmp_path, pdf_file):
+    lines, out = _run_unguarded(tmp_path, pdf_file(pages=2), workers=1)
+    assert lines.count("MAIN") == 1
+    assert out["error"] is None
+    assert out["engine"] == "pdfplumber" and out["pages_read"] == 2 and out["chars"] > 0
+
+
+
+def test_page_pool_from_unguarded_main(tmp_path, pdf_file):
+    lines, out = _run_unguarded(tmp_path, pdf_file(pages=14), workers=2)
+    assert lines.count("MAIN") == 1
+    assert out["error"] is None
+    assert out["workers"] == 2 and out["pages_read"] == 14
@@ -0,0 +1,60 @@
+import pytest
+
+from utils.stores import JsonlStore, MemoryStore, SqliteStore, _bench_records
+
+
+def _open(backend: str, root) -> object:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "jsonl":
+        return JsonlStore(str(root / "log.jsonl"), str(root / "segments"), str(root / "email.idx"),
+                          durability="flush", commit_window=0.0)
+    return SqliteStore(str(root / "candidates.db"))
+
+
+def _exercise(store) -> dict:
+    """Every protocol read after the same appends, upsert, delete and purge."""
+    records = list(_bench_records(12, seed=5))
+    for r in records:
+        assert store.append(r)
+    store.record_chunks()                      # warm the SQLite mirror before rows are deleted
+
+    def merge(current, record):
+        return {**record, "revision": current.get("revision", 1) + 1}
+
+    revised = {**records[3], "record_id": "r3-v2", "timestamp_utc": "2026-01-01T00:00:00+00:00",
+               "position": "Data Engineer"}
+    assert store.upsert(revised, merge)
+    assert store.delete(records[5]["record_id"])
+
+    def ids(rs):
+        return [r["record_id"] for r in rs]
+
+    def live():
+        chunks, deleted = store.record_chunks()
+        return sorted(r["record_id"] for chunk in chunks for r in chunk if r["record_id"] not in deleted)
+
+    before_purge = live()
+    purged = store.purge(emails=[records[7]["email"].upper()])
+    return {
+        "unpurged": before_purge,
+        "purged":   purged["removed"],
+        "by_email": store.get_by_email(records[3]["email"])["record_id"],
+        "gone":     store.get_by_email(records[5]["email"]),
+        "recent":   ids(store.recent(3)),
+        "scan":     ids(store.scan()),
+        "window":   ids(store.scan(since=records[2]["timestamp_utc"], until=records[6]["timestamp_utc"])),
+        "query":    ids(store.query(position="data engineer")),
+        "live":     live(),
+        "stream":   [e.get("record_id") for _, e in store.changes(None, 100)[0] if "tombstone" not in e],
+    }
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_backends_match_memory_store(tmp_path, backend):
+    expected = _exercise(_open("memory", tmp_path))
+    got = _exercise(_open(backend, tmp_path))
+    streamed = got.pop("stream")
+    expected.pop("stream")
+    assert got == expected
+    assert "r3-v2" in streamed
@@ -0,0 +1,48 @@
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.stores import MemoryStore, _bench_records
+from utils.webhook import WebhookDispatcher, status
+
+
+class _Reject(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(422)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_rejected_batch_is_dead_lettered(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Reject)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    store = MemoryStore()
+    db_file = str(tmp_path / "webhook.db")
+    dispatcher = WebhookDispatcher(f"http://127.0.0.1:{server.server_port}/", store.changes, db_file,
+                                   batch_size=10, timeout=5.0, poll_interval=0.05).start()
+    try:
+        records = list(_bench_records(3, seed=9))
+        for r in records:
+            store.append(r)
+        deadline = time.monotonic() + 10
+        while dispatcher.stats["dead_lettered"] < len(records) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        dispatcher.stop()
+        server.shutdown()
+        server.server_close()
+
+    assert dispatcher.stats["dead_lettered"] == len(records)
+    assert dispatcher.stats["delivered"] == 0 and dispatcher.stats["retries"] == 0
+    progress = status(db_file)
+    assert progress["dead_letters"] == len(records) and progress["offset"] == str(len(records))
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT record_id, status FROM dead_letters ORDER BY record_id").fetchall()
+    finally:
+        conn.close()
+    assert rows == sorted((r["record_id"], 422) for r in records)
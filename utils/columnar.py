@@ -0,0 +1,283 @@
+"""
+utils/columnar.py
+──────────────────
+Column-oriented view of the candidate history for dashboards and exports.
+
+A `ColumnTable` keeps one dictionary-encoded `array('I')` per dimension
+(day, position, location), a multi-valued tech column (offsets + codes)
+and an integer column for `questions_asked`. Records are appended one at
+a time and never kept, so building the table from a stream holds only
+the arrays; aggregations run `Counter` over the code arrays in C instead
+of walking per-record dicts.
+
+On-disk format (`.tscol`, little-endian):
+    magic  b"TSCOL1\\n"
+    u32    header length, then a JSON header with row count, per-column
+           dictionaries and (offset, length, typecode) of each array
+    raw    array bytes, in header order
+If pyarrow is installed the same columns can be written as Parquet
+(dictionary-encoded, tech as list<string>).
+
+CLI:
+    python -m utils.columnar export --out candidates.tscol [--parquet candidates.parquet]
+    python -m utils.columnar agg --by position [--metric count] [--file candidates.tscol]
+"""
+
+import argparse
+import json
+import struct
+import threading
+from array import array
+from collections import Counter
+
+from question_bank import split_tech_stack, resolve_tech
+
+
+GROUP_BYS = ("day", "position", "location", "tech")
+METRICS   = ("count", "avg_questions")
+
+_MAGIC  = b"TSCOL1\n"
+_HDRLEN = struct.Struct("<I")
+
+
+def _norm(text: str) -> str:
+    return " ".join(str(text or "").split()).lower()
+
+
+def record_techs(tech_stack: str) -> list[str]:
+    """Distinct resolved techs of a tech stack string (unknown names kept lower-cased)."""
+    return list(dict.fromkeys(resolve_tech(t) or _norm(t) for t in split_tech_stack(tech_stack)))
+
+
+def record_labels(record: dict) -> dict[str, list[str]]:
+    """{group_by: [label, …]} of one record, normalised as in the table."""
+    return {
+        "day":      [(record.get("timestamp_utc") or "")[:10]],
+        "position": [_norm(record.get("position"))],
+        "location": [_norm(record.get("location"))],
+        "tech":     record_techs(record.get("tech_stack", "")),
+    }
+
+
+class _Dictionary:
+    """Label ↔ code mapping for one dictionary-encoded column."""
+
+    def __init__(self, labels: list[str] | None = None):
+        self.labels = list(labels or [])
+        self.codes  = {label: i for i, label in enumerate(self.labels)}
+
+    def encode(self, label: str) -> int:
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class ColumnTable:
+    """Append-only columnar table of candidate records."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        self.rows       = 0
+        self.dicts      = {"day": _Dictionary(), "position": _Dictionary(),
+                           "location": _Dictionary(), "tech": _Dictionary()}
+        self.cols       = {"day": array("I"), "position": array("I"), "location": array("I")}
+        self.tech_off   = array("I", [0])     # row i's techs: tech_codes[off[i]:off[i+1]]
+        self.tech_codes = array("I")
+        self.questions  = array("I")
+        self.record_ids: list[str] = []       # to mask tombstoned rows
+        self.sources: dict[int, list] = {}    # id(chunk) → [chunk, records added]
+
+    def sync(self, chunks: list[list[dict]]):
+        """
+        Append whatever was added to the storage caches' `chunks` since the
+        last sync; a chunk that disappeared (compaction) forces a rebuild.
+        """
+        with self.lock:
+            live = {id(c) for c in chunks}
+            if any(key not in live for key in self.sources):
+                self.clear()
+            for chunk in chunks:
+                src = self.sources.setdefault(id(chunk), [chunk, 0])
+                if len(chunk) > src[1]:
+                    self.extend(chunk[src[1]:])
+                    src[1] = len(chunk)
+
+    def add(self, record: dict):
+        self.cols["day"].append(self.dicts["day"].encode((record.get("timestamp_utc") or "")[:10]))
+        self.cols["position"].append(self.dicts["position"].encode(_norm(record.get("position"))))
+        self.cols["location"].append(self.dicts["location"].encode(_norm(record.get("location"))))
+        tech = self.dicts["tech"]
+        self.tech_codes.extend(tech.encode(t) for t in record_techs(record.get("tech_stack", "")))
+        self.tech_off.append(len(self.tech_codes))
+        self.questions.append(max(0, int(record.get("questions_asked") or 0)))
+        self.record_ids.append(record.get("record_id", ""))
+        self.rows += 1
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    # ── Aggregation ──────────────────────────────────────────────────────────
+
+    def aggregate(self, group_by: str, metric: str = "count", deleted: set | None = None) -> dict:
+        """
+        {label: value} for one dimension, sorted by value descending. Labels
+        are normalised (lower-cased, whitespace collapsed; techs resolved).
+
+        Args:
+            group_by: "day", "position", "location" or "tech" (a record
+                      counts once for each distinct tech in its stack).
+            metric:   "count" or "avg_questions".
+            deleted:  record_ids to exclude.
+        """
+        if group_by not in GROUP_BYS:
+            raise ValueError(f"group_by must be one of {GROUP_BYS}, got {group_by!r}")
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+
+        with self.lock:
+            return self._aggregate(group_by, metric, deleted)
+
+    def _aggregate(self, group_by: str, metric: str, deleted: set | None) -> dict:
+        masked = [i for i, rid in enumerate(self.record_ids) if rid in deleted] if deleted else []
+        labels = self.dicts[group_by].labels
+
+        if group_by == "tech":
+            counts = Counter(self.tech_codes)
+            for i in masked:
+                counts.subtract(self.tech_codes[self.tech_off[i]:self.tech_off[i + 1]])
+        else:
+            col = self.cols[group_by]
+            counts = Counter(col)
+            counts.subtract(col[i] for i in masked)
+
+        if metric == "count":
+            values = {code: n for code, n in counts.items() if n > 0}
+        else:
+            sums = Counter()
+            skip = set(masked)
+            if group_by == "tech":
+                off, codes = self.tech_off, self.tech_codes
+                for row, q in enumerate(self.questions):
+                    if q and row not in skip:
+                        for code in codes[off[row]:off[row + 1]]:
+                            sums[code] += q
+            else:
+                for row, (code, q) in enumerate(zip(self.cols[group_by], self.questions)):
+                    if q and row not in skip:
+                        sums[code] += q
+            values = {code: round(sums[code] / n, 2) for code, n in counts.items() if n > 0}
+
+        return {labels[code]: v for code, v in sorted(values.items(), key=lambda kv: -kv[1])}
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def _arrays(self) -> list[tuple[str, array]]:
+        return [
+            ("day", self.cols["day"]), ("position", self.cols["position"]),
+            ("location", self.cols["location"]), ("tech_off", self.tech_off),
+            ("tech_codes", self.tech_codes), ("questions", self.questions),
+        ]
+
+    def save(self, path: str):
+        """Write the table in the `.tscol` format (record_ids are not exported)."""
+        layout, offset = {}, 0
+        for name, arr in self._arrays():
+            size = len(arr) * arr.itemsize
+            layout[name] = {"offset": offset, "length": len(arr), "typecode": arr.typecode}
+            offset += size
+        header = json.dumps({
+            "rows":   self.rows,
+            "dicts":  {name: d.labels for name, d in self.dicts.items()},
+            "arrays": layout,
+        }).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_HDRLEN.pack(len(header)))
+            f.write(header)
+            for _, arr in self._arrays():
+                arr.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> "ColumnTable":
+        table = cls()
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a .tscol file")
+            (hlen,) = _HDRLEN.unpack(f.read(_HDRLEN.size))
+            header = json.loads(f.read(hlen))
+            arrays = {}
+            for name, meta in header["arrays"].items():
+                arr = array(meta["typecode"])
+                arr.fromfile(f, meta["length"])
+                arrays[name] = arr
+        table.rows  = header["rows"]
+        table.dicts = {name: _Dictionary(labels) for name, labels in header["dicts"].items()}
+        table.cols  = {k: arrays[k] for k in ("day", "position", "location")}
+        table.tech_off, table.tech_codes = arrays["tech_off"], arrays["tech_codes"]
+        table.questions  = arrays["questions"]
+        table.record_ids = [""] * table.rows
+        return table
+
+    def save_parquet(self, path: str):
+        """Write the table as Parquet. Requires pyarrow (`pip install pyarrow`)."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+        def dict_col(name):
+            return pa.DictionaryArray.from_arrays(
+                pa.array(self.cols[name], type=pa.uint32()), pa.array(self.dicts[name].labels),
+            )
+
+        tech_labels = pa.array(self.dicts["tech"].labels)
+        techs = pa.ListArray.from_arrays(
+            pa.array(self.tech_off, type=pa.int32()),
+            tech_labels.take(pa.array(self.tech_codes, type=pa.uint32())),
+        )
+        pq.write_table(pa.table({
+            "day":             dict_col("day"),
+            "position":        dict_col("position"),
+            "location":        dict_col("location"),
+            "tech":            techs,
+            "questions_asked": pa.array(self.questions, type=pa.uint32()),
+        }), path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from utils.storage import aggregate_candidates, export_columnar
+
+    parser = argparse.ArgumentParser(prog="python -m utils.columnar")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ex = sub.add_parser("export", help="stream the candidate store into columnar files")
+    ex.add_argument("--out", default="candidates.tscol")
+    ex.add_argument("--parquet", help="also write a Parquet file (needs pyarrow)")
+    ag = sub.add_parser("agg", help="aggregate the store or an exported .tscol file")
+    ag.add_argument("--by", choices=GROUP_BYS, default="position")
+    ag.add_argument("--metric", choices=METRICS, default="count")
+    ag.add_argument("--file", help="read an exported .tscol file instead of the store")
+    ag.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        rows = export_columnar(args.out, args.parquet)
+        print(f"Wrote {rows} row(s) → {', '.join(p for p in (args.out, args.parquet) if p)}")
+    else:
+        if args.file:
+            result = ColumnTable.load(args.file).aggregate(args.by, args.metric)
+        else:
+            result = aggregate_candidates(args.by, args.metric)
+        for label, value in list(result.items())[:args.top]:
+            print(f"{value:>10}  {label or '—'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+"""
+utils/counters.py
+──────────────────
+Materialised dashboard counters: screenings per day, position, location
+and resolved tech, kept in a small SQLite sidecar next to the store.
+
+storage.py updates the counters on every save (and decrements them when
+a record is deleted or superseded by an upsert), so the metrics panel
+reads a handful of precomputed rows instead of rescanning the log:
+
+    counters (dim, label, n)   one row per (dimension, normalised label)
+    meta     (key, value)      "total", "rebuilt_at"
+
+Labels are normalised like the columnar table (utils/columnar.py): days
+are YYYY-MM-DD (UTC), positions / locations lower-cased, techs resolved
+through the question bank's aliases, one count per distinct tech.
+
+A missing sidecar is seeded from the whole store on first use, so an
+existing history is counted the first time the counters are enabled (or
+after the file is deleted). A save and its counter update are separate
+writes, so a crash in between (or a save made while the sidecar was
+unavailable) leaves the counters slightly off; rebuild them from the
+store with:
+    python -m utils.counters rebuild
+    python -m utils.counters show --by position
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from utils.columnar import GROUP_BYS, record_labels
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    dim    TEXT NOT NULL,
+    label  TEXT NOT NULL,
+    n      INTEGER NOT NULL,
+    PRIMARY KEY (dim, label)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+_BUMP_SQL = (
+    "INSERT INTO counters (dim, label, n) VALUES (?, ?, ?) "
+    "ON CONFLICT (dim, label) DO UPDATE SET n = n + excluded.n"
+)
+_TOTAL_SQL = (
+    "INSERT INTO meta (key, value) VALUES ('total', ?) "
+    "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value"
+)
+
+_local      = threading.local()
+_seed_lock  = threading.Lock()
+
+
+def _tally(records) -> tuple[Counter, int]:
+    """(Counter of (dim, label) → n, number of records) for `records`."""
+    tally, count = Counter(), 0
+    for record in records:
+        count += 1
+        for dim, labels in record_labels(record).items():
+            for label in labels:
+                tally[dim, label] += 1
+    return tally, count
+
+
+class Counters:
+    """
+    Counter sidecar at `db_file` (created on first use).
+
+    Connections are cached per thread, as in utils/sqlite_store.py.
+
+    Args:
+        db_file: Path of the sidecar.
+        seed:    Callable returning every live record; counted into the
+                 sidecar when the first call finds the file missing.
+    """
+
+    def __init__(self, db_file: str, seed=None):
+        self.db_file = db_file
+        self.seed    = seed
+        self._seed_checked = seed is None
+
+    def _conn(self) -> sqlite3.Connection:
+        conns = getattr(_local, "conns", None)
+        if conns is None:
+            conns = _local.conns = {}
+        key = os.path.abspath(self.db_file)
+        conn = conns.get(key)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conns[key] = conn
+        return conn
+
+    def _seed_if_missing(self) -> bool:
+        """Count the whole store into a sidecar that does not exist yet; True if it did."""
+        if self._seed_checked:
+            return False
+        with _seed_lock:
+            if self._seed_checked:
+                return False
+            self._seed_checked = True
+            if os.path.exists(self.db_file):
+                return False
+            try:
+                self.rebuild(self.seed())
+            except (sqlite3.Error, OSError):
+                return False
+        return True
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def apply(self, added=(), removed=()) -> bool:
+        """
+        Count `added` records and uncount `removed` ones, in one transaction.
+        Callers apply changes already written to the store, so when this
+        call seeds the sidecar the changes are in the seed and skipped.
+
+        Returns:
+            True on success, False if the sidecar could not be written.
+        """
+        if self._seed_if_missing():
+            return True
+        tally, count = _tally(added)
+        minus, gone  = _tally(removed)
+        tally.subtract(minus)
+        rows = [(d, l, n) for (d, l), n in tally.items() if n]
+        if not rows and count == gone:
+            return True
+        try:
+            conn = self._conn()
+            with conn:
+                conn.executemany(_BUMP_SQL, rows)
+                conn.execute(_TOTAL_SQL, (count - gone,))
+                if gone:
+                    conn.execute("DELETE FROM counters WHERE n <= 0")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def rebuild(self, records) -> int:
+        """
+        Recompute every counter from `records` (a stream of live records)
+        and swap them in within one transaction.
+
+        Returns:
+            Number of records counted.
+        """
+        tally, count = _tally(records)
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM counters")
+            conn.executemany("INSERT INTO counters (dim, label, n) VALUES (?, ?, ?)",
+                             [(d, l, n) for (d, l), n in tally.items()])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('total', ?)", (count,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rebuilt_at', ?)",
+                         (datetime.now(timezone.utc).isoformat(),))
+        return count
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def get(self, group_by: str, limit: int | None = None) -> dict:
+        """{label: count} for one dimension, largest first."""
+        if group_by not in GROUP_BYS:
+            raise ValueError(f"group_by must be one of {GROUP_BYS}, got {group_by!r}")
+        self._seed_if_missing()
+        sql = "SELECT label, n FROM counters WHERE dim = ? ORDER BY n DESC, label"
+        params: tuple = (group_by,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        try:
+            return dict(self._conn().execute(sql, params).fetchall())
+        except sqlite3.Error:
+            return {}
+
+    def total(self) -> int:
+        self._seed_if_missing()
+        try:
+            row = self._conn().execute("SELECT value FROM meta WHERE key = 'total'").fetchone()
+        except sqlite3.Error:
+            return 0
+        return int(row[0]) if row else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    from utils.storage import count_candidates, rebuild_counters
+
+    parser = argparse.ArgumentParser(prog="python -m utils.counters")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="recompute the counters from the store")
+    sh = sub.add_parser("show", help="print one dimension")
+    sh.add_argument("--by", choices=GROUP_BYS, default="position")
+    sh.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        print(f"Counted {rebuild_counters()} record(s)")
+    else:
+        result = count_candidates(args.by, limit=args.top)
+        print(f"{result['total']} screening(s)")
+        for label, n in result["counts"].items():
+            print(f"{n:>10}  {label or '—'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,344 @@
+"""
+utils/email_index.py
+─────────────────────
+Persistent hash index: normalised email → current record in the JSONL log.
+
+One open-addressing table in a single file (linear probing, 32-byte slots),
+probed with `pread`, so a lookup costs O(1) slot reads plus one line read:
+
+    header  8s magic, Q capacity, Q used, Q epoch, Q sealed_seq, Q ino, Q offset
+    slots   capacity × (8s email_key, 8s rid_hash, Q inode, Q offset)
+
+A slot points at a line by (inode of the segment file, byte offset).
+Rotation renames the active log into the segment directory, which keeps
+the inode, so pointers survive it; compaction and rewrites bump the
+manifest epoch, which triggers a rebuild. A slot with inode 0 marks an
+email whose current record was tombstoned (the key stays for probing).
+
+The index is derived from the log and never written to directly: every
+access first catches up with the lines appended since the watermark
+(`sealed_seq` + active log inode/offset), under the log lock. Tombstones
+carry the `email_key` of the record they hide so they can be applied.
+
+CLI:
+    python -m utils.email_index rebuild | get <email>
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import struct
+
+from utils import segments
+from utils.log_writer import locked
+
+
+_MAGIC     = b"TSHASH1\0"
+_HEADER    = struct.Struct("<8sQQQQQQ")
+_SLOT      = struct.Struct("<8s8sQQ")
+_EMPTY     = b"\0" * 8
+_MIN_CAP   = 1024
+_MAX_LOAD  = 0.7
+
+
+def rid_hash(record_id: str) -> bytes:
+    return hashlib.blake2b(str(record_id).encode("utf-8"), digest_size=8).digest()
+
+
+class EmailIndex:
+    """
+    Email → current record for the JSONL log `log_file` + `seg_dir`.
+
+    Args:
+        path:     Index file (created on first use).
+        log_file: Active log.
+        seg_dir:  Sealed segment directory.
+    """
+
+    def __init__(self, path: str, log_file: str, seg_dir: str):
+        self.path     = path
+        self.log_file = log_file
+        self.seg_dir  = seg_dir
+        self._paths: dict[int, str] = {}
+        self._stamp   = None
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Serialise read-modify-write cycles (upserts) across processes."""
+        with locked(self.path):
+            yield
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def get(self, email: str) -> dict | None:
+        """Current (non-tombstoned) record for `email`, or None."""
+        key = segments.email_key(email)
+        with locked(self.log_file):
+            self._catch_up()
+            slot = self._find(key)
+        if slot is None or not slot[2]:
+            return None
+        path = self._resolve(slot[2])
+        if path is None:
+            return None
+        try:
+            with segments.open_segment(path) as f:
+                f.seek(slot[3])
+                record = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        if record.get("email", "").strip().lower() != email.strip().lower():
+            return None                               # 64-bit hash collision
+        return record
+
+    def _find(self, key: bytes) -> tuple | None:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            header = _read_header(fd)
+            if header is None:
+                return None
+            cap = header[1]
+            i = _bucket(key, cap)
+            for _ in range(cap):
+                slot = _SLOT.unpack(os.pread(fd, _SLOT.size, _slot_pos(i)))
+                if slot[0] == key:
+                    return slot
+                if slot[0] == _EMPTY:
+                    return None
+                i = (i + 1) % cap
+            return None
+        finally:
+            os.close(fd)
+
+    def _resolve(self, ino: int) -> str | None:
+        """Path of the segment file with inode `ino` (active log or sealed)."""
+        try:
+            if os.stat(self.log_file).st_ino == ino:
+                return self.log_file
+        except OSError:
+            pass
+        try:
+            st = os.stat(os.path.join(self.seg_dir, segments.MANIFEST))
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp != self._stamp or ino not in self._paths:
+            self._paths = {}
+            for seg in segments.sealed_segments(self.seg_dir):
+                try:
+                    self._paths[os.stat(seg["path"]).st_ino] = seg["path"]
+                except OSError:
+                    continue
+            self._stamp = stamp
+        return self._paths.get(ino)
+
+    # ── Catch-up ─────────────────────────────────────────────────────────────
+
+    def _catch_up(self):
+        """Apply log lines appended since the watermark; caller holds the log lock."""
+        manifest = segments.read_manifest(self.seg_dir)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            header = _read_header(fd)
+            if header is None or header[3] != manifest.get("epoch", 0):
+                self._rebuild(fd, manifest)
+                return
+            _, cap, used, epoch, sealed_seq, wm_ino, wm_off = header
+            table = _Table(fd, cap, used)
+
+            for seg in manifest["segments"]:
+                if seg["seq"] <= sealed_seq:
+                    continue
+                path = os.path.join(self.seg_dir, seg["file"])
+                try:
+                    ino = os.stat(path).st_ino
+                except OSError:
+                    self._rebuild(fd, manifest)
+                    return
+                start = wm_off if ino == wm_ino else 0
+                if ino == wm_ino:
+                    wm_ino = 0                        # the watermark file got sealed
+                table.apply_file(path, ino, start)
+                sealed_seq = seg["seq"]
+
+            try:
+                ino = os.stat(self.log_file).st_ino
+            except OSError:
+                ino = None
+            if wm_ino and wm_ino != ino:
+                self._rebuild(fd, manifest)           # watermark file vanished (rewrite)
+                return
+            offset = 0
+            if ino is not None:
+                offset = table.apply_file(self.log_file, ino, wm_off if ino == wm_ino else 0)
+            table.flush(epoch, sealed_seq, ino or 0, offset)
+        finally:
+            os.close(fd)
+
+    def _rebuild(self, fd: int, manifest: dict):
+        """Recompute the whole table from the log; caller holds the log lock."""
+        table = _Table(fd, _MIN_CAP, 0, in_memory=True)
+        sealed_seq = 0
+        for seg in manifest["segments"]:
+            path = os.path.join(self.seg_dir, seg["file"])
+            try:
+                table.apply_file(path, os.stat(path).st_ino, 0)
+            except OSError:
+                continue
+            sealed_seq = seg["seq"]
+        try:
+            ino = os.stat(self.log_file).st_ino
+            offset = table.apply_file(self.log_file, ino, 0)
+        except OSError:
+            ino, offset = 0, 0
+        table.write_out(manifest.get("epoch", 0), sealed_seq, ino, offset)
+
+    def rebuild(self):
+        with locked(self.log_file):
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._rebuild(fd, segments.read_manifest(self.seg_dir))
+            finally:
+                os.close(fd)
+
+
+# ── Table ─────────────────────────────────────────────────────────────────────
+
+def _bucket(key: bytes, cap: int) -> int:
+    return int.from_bytes(key, "little") & (cap - 1)
+
+
+def _slot_pos(i: int) -> int:
+    return _HEADER.size + i * _SLOT.size
+
+
+def _read_header(fd: int) -> tuple | None:
+    raw = os.pread(fd, _HEADER.size, 0)
+    if len(raw) < _HEADER.size:
+        return None
+    header = _HEADER.unpack(raw)
+    return header if header[0] == _MAGIC else None
+
+
+class _Table:
+    """
+    Slot updates for one catch-up or rebuild. Incremental catch-ups write
+    slots in place; a rebuild (or a resize) collects entries in memory and
+    writes the whole table once.
+    """
+
+    def __init__(self, fd: int, cap: int, used: int, in_memory: bool = False):
+        self.fd   = fd
+        self.cap  = cap
+        self.used = used
+        self.mem: dict[bytes, tuple] | None = {} if in_memory else None
+
+    def apply_file(self, path: str, ino: int, start: int) -> int:
+        """Apply every complete line of `path` from `start`; returns the end offset."""
+        end = start
+        for offset, raw in segments.iter_lines(path, start):
+            end = offset + len(raw)
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if "tombstone" in entry:
+                key = entry.get("email_key")
+                if key:
+                    self._tombstone(bytes.fromhex(key), rid_hash(entry["tombstone"]))
+            else:
+                self._set(segments.email_key(entry.get("email", "")),
+                          rid_hash(entry.get("record_id", "")), ino, offset)
+        return end
+
+    def _set(self, key: bytes, rid: bytes, ino: int, offset: int):
+        if self.mem is not None:
+            self.mem[key] = (rid, ino, offset)
+            return
+        i, slot = self._probe(key)
+        if slot[0] == _EMPTY:
+            if (self.used + 1) > self.cap * _MAX_LOAD:
+                self._grow()
+                return self._set(key, rid, ino, offset)
+            self.used += 1
+        os.pwrite(self.fd, _SLOT.pack(key, rid, ino, offset), _slot_pos(i))
+
+    def _tombstone(self, key: bytes, rid: bytes):
+        if self.mem is not None:
+            current = self.mem.get(key)
+            if current is not None and current[0] == rid:
+                self.mem[key] = (rid, 0, 0)
+            return
+        i, slot = self._probe(key)
+        if slot[0] == key and slot[1] == rid:
+            os.pwrite(self.fd, _SLOT.pack(key, rid, 0, 0), _slot_pos(i))
+
+    def _probe(self, key: bytes) -> tuple[int, tuple]:
+        i = _bucket(key, self.cap)
+        while True:
+            slot = _SLOT.unpack(os.pread(self.fd, _SLOT.size, _slot_pos(i)))
+            if slot[0] == key or slot[0] == _EMPTY:
+                return i, slot
+            i = (i + 1) % self.cap
+
+    def _grow(self):
+        """Load every slot, then switch to in-memory mode; flush() rewrites at 2× size."""
+        raw = os.pread(self.fd, self.cap * _SLOT.size, _HEADER.size)
+        self.mem = {}
+        for pos in range(0, len(raw), _SLOT.size):
+            key, rid, ino, offset = _SLOT.unpack_from(raw, pos)
+            if key != _EMPTY:
+                self.mem[key] = (rid, ino, offset)
+
+    def flush(self, epoch: int, sealed_seq: int, ino: int, offset: int):
+        if self.mem is not None:
+            self.write_out(epoch, sealed_seq, ino, offset)
+        else:
+            os.pwrite(self.fd, _HEADER.pack(_MAGIC, self.cap, self.used, epoch,
+                                            sealed_seq, ino, offset), 0)
+
+    def write_out(self, epoch: int, sealed_seq: int, ino: int, offset: int):
+        cap = _MIN_CAP
+        while len(self.mem) > cap * _MAX_LOAD:
+            cap *= 2
+        slots = [None] * cap
+        for key, value in self.mem.items():
+            i = _bucket(key, cap)
+            while slots[i] is not None:
+                i = (i + 1) % cap
+            slots[i] = (key, *value)
+        empty = _SLOT.pack(_EMPTY, _EMPTY, 0, 0)
+        os.ftruncate(self.fd, 0)
+        os.pwrite(self.fd, b"".join(empty if s is None else _SLOT.pack(*s) for s in slots),
+                  _HEADER.size)
+        os.pwrite(self.fd, _HEADER.pack(_MAGIC, cap, len(self.mem), epoch,
+                                        sealed_seq, ino, offset), 0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from config import CANDIDATE_LOG, SEGMENT_DIR, EMAIL_INDEX_FILE
+
+    parser = argparse.ArgumentParser(prog="python -m utils.email_index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="recompute the index from the log")
+    g = sub.add_parser("get", help="print the current record for an email")
+    g.add_argument("email")
+    args = parser.parse_args(argv)
+
+    index = EmailIndex(EMAIL_INDEX_FILE, CANDIDATE_LOG, SEGMENT_DIR)
+    if args.command == "rebuild":
+        index.rebuild()
+        print(f"Rebuilt {EMAIL_INDEX_FILE}")
+    else:
+        record = index.get(args.email)
+        print(json.dumps(record, indent=2, ensure_ascii=False) if record else "Not found")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+utils/export.py
+────────────────
+Spreadsheet export of screening records (CSV, XLSX).
+
+Rows are written straight from a record iterator — normally
+`storage.iter_candidates()`, which streams the store one record at a
+time — so memory stays constant whatever the size of the history:
+
+  - `csv_chunks()` yields CSV text a few hundred rows at a time, for
+    writing to a file or a streaming HTTP response
+  - `write_xlsx()` uses openpyxl's write-only workbook, which spools rows
+    to a temp file instead of building a cell tree (`pip install openpyxl`)
+
+Transcripts are not exported; the columns are the profile fields in
+`EXPORT_COLUMNS`. Text cells that a spreadsheet would evaluate as a
+formula are prefixed with a quote (CSV: leading =, +, -, @; XLSX, where
+openpyxl only turns "=…" into a formula: leading =). Values made only of
+digits and phone punctuation ("+91 98765 43210") cannot call anything
+and are left as they are.
+
+CLI:
+    python -m utils.export --out candidates.csv [--since 2025-01-01] [--until 2025-07-01]
+                           [--position "Backend Engineer"]
+    python -m utils.export --out candidates.xlsx …
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+
+
+EXPORT_COLUMNS = (
+    "timestamp_utc", "name", "email", "phone", "experience", "position",
+    "location", "tech_stack", "questions_asked", "revision", "record_id",
+)
+FORMATS = ("csv", "xlsx")
+
+_CSV_FORMULA  = ("=", "+", "-", "@", "\t", "\r")
+_XLSX_FORMULA = ("=",)
+_PHONE_LIKE   = re.compile(r"[+-]?[\d ().-]*\d[\d ().-]*")
+
+
+def _cell(value, formula_start=_CSV_FORMULA):
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    text = str(value)
+    if text.startswith(formula_start) and not _PHONE_LIKE.fullmatch(text):
+        return "'" + text
+    return text
+
+
+def rows(records, columns=EXPORT_COLUMNS, formula_start=_CSV_FORMULA):
+    """One list of cell values per record, in `columns` order."""
+    for record in records:
+        yield [_cell(record.get(c), formula_start) for c in columns]
+
+
+def csv_chunks(records, columns=EXPORT_COLUMNS, rows_per_chunk: int = 500):
+    """CSV text (header first) in chunks of `rows_per_chunk` rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    pending = 1
+    for row in rows(records, columns):
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue()
+
+
+def write_csv(records, path: str, columns=EXPORT_COLUMNS) -> int:
+    """Stream `records` to a UTF-8 CSV file (with BOM, for Excel); returns rows written."""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        for chunk in csv_chunks(counted(), columns):
+            f.write(chunk)
+    return count
+
+
+def write_xlsx(records, path: str, columns=EXPORT_COLUMNS) -> int:
+    """Stream `records` to an XLSX file. Requires openpyxl (`pip install openpyxl`)."""
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise RuntimeError("XLSX export needs openpyxl: pip install openpyxl") from e
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Candidates")
+    ws.append(list(columns))
+    count = 0
+    for row in rows(records, columns, _XLSX_FORMULA):
+        ws.append(row)
+        count += 1
+    wb.save(path)
+    return count
+
+
+def write_export(records, path: str, fmt: str | None = None) -> int:
+    """Write `records` to `path` as CSV or XLSX (`fmt`, else from the extension)."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower() or "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}, got {fmt!r}")
+    return write_xlsx(records, path) if fmt == "xlsx" else write_csv(records, path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from utils.storage import export_candidates
+
+    parser = argparse.ArgumentParser(prog="python -m utils.export")
+    parser.add_argument("--out", default="candidates.csv", help=".csv or .xlsx")
+    parser.add_argument("--format", choices=FORMATS, help="override the extension")
+    parser.add_argument("--since", help="first day (or ISO timestamp) to include, UTC")
+    parser.add_argument("--until", help="day (or ISO timestamp) to stop before, UTC")
+    parser.add_argument("--position", help="exact position, case-insensitive")
+    args = parser.parse_args(argv)
+
+    count = export_candidates(args.out, since=args.since, until=args.until,
+                              position=args.position, fmt=args.format)
+    print(f"Wrote {count} record(s) → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
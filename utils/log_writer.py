@@ -0,0 +1,244 @@
+"""
+utils/log_writer.py
+────────────────────
+Multi-process-safe, group-commit appender for the JSONL candidate log.
+
+Every commit takes an exclusive advisory lock on a sidecar `<log>.lock`
+file, so writes from several Streamlit worker processes never interleave.
+Within a process, appends that arrive while a commit is pending are
+batched into a single write (+ fsync): the first caller becomes the
+leader, waits a short window for followers, then commits for everyone.
+
+Durability modes:
+  - "fsync" — acknowledge only after the batch is fsync'ed to disk
+  - "flush" — acknowledge once the batch is in the OS page cache
+              (survives a process crash, not a power loss)
+
+Stress check (N processes × T threads × M records, then verifies the file;
+exits 1 on a lost, duplicated or torn record). It is run by hand, not by
+any test suite:
+    python -m utils.log_writer stress --procs 8 --threads 4 --records 250
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:          # Windows: no flock — only in-process safety
+    fcntl = None
+
+
+DURABILITY_MODES = ("fsync", "flush")
+
+
+# ── Advisory Locking ──────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def locked(path: str):
+    """
+    Hold the exclusive cross-process lock for the log at `path`.
+
+    The lock lives on a separate `<path>.lock` file rather than on the log
+    itself, so it stays valid while the log is rotated or atomically
+    replaced by maintenance jobs.
+    """
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)         # closing the descriptor releases the flock
+
+
+# ── Group Commit Writer ───────────────────────────────────────────────────────
+
+class _Pending:
+    __slots__ = ("data", "done", "ok")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.done = False
+        self.ok   = False
+
+
+class GroupCommitWriter:
+    """
+    Appends byte strings (complete lines) to `path` with group commit.
+
+    Args:
+        path:       Log file to append to (created on first write).
+        durability: "fsync" or "flush" — see module docstring.
+        window:     Seconds a leader waits for more appends before committing.
+        max_batch:  Upper bound on records per write.
+    """
+
+    def __init__(self, path: str, durability: str = "fsync",
+                 window: float = 0.002, max_batch: int = 512):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}, got {durability!r}")
+        self.path       = path
+        self.durability = durability
+        self.window     = window
+        self.max_batch  = max_batch
+        self.stats      = {"commits": 0, "records": 0, "bytes": 0, "failures": 0}
+        self._cond      = threading.Condition()
+        self._queue: list[_Pending] = []
+        self._leader    = False
+
+    def append(self, data: bytes) -> bool:
+        """
+        Append one record line and block until it is committed.
+
+        Returns:
+            True once the record is durable per `durability`, False on I/O error.
+        """
+        item = _Pending(data)
+        with self._cond:
+            self._queue.append(item)
+            while self._leader and not item.done:
+                self._cond.wait()
+            if item.done:
+                return item.ok
+            self._leader = True
+
+        # Leader: give concurrent callers a moment to join this batch.
+        if self.window > 0:
+            time.sleep(self.window)
+        try:
+            while not item.done:
+                with self._cond:
+                    batch = self._queue[:self.max_batch]
+                    del self._queue[:self.max_batch]
+                ok = self._commit(batch)
+                with self._cond:
+                    for it in batch:
+                        it.ok, it.done = ok, True
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._leader = False
+                self._cond.notify_all()     # hand leadership to a waiting follower
+        return item.ok
+
+    def _commit(self, batch: list[_Pending]) -> bool:
+        payload = b"".join(it.data for it in batch)
+        try:
+            with locked(self.path):
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    start = os.fstat(fd).st_size
+                    try:
+                        view = memoryview(payload)
+                        while view:
+                            view = view[os.write(fd, view):]
+                        if self.durability == "fsync":
+                            os.fsync(fd)
+                    except OSError:
+                        os.ftruncate(fd, start)     # never leave a torn line behind
+                        raise
+                finally:
+                    os.close(fd)
+        except OSError:
+            self.stats["failures"] += 1
+            return False
+        self.stats["commits"] += 1
+        self.stats["records"] += len(batch)
+        self.stats["bytes"]   += len(payload)
+        return True
+
+
+# ── Stress Check ──────────────────────────────────────────────────────────────
+
+def _stress_worker(path: str, proc: int, threads: int, records: int,
+                   size: int, durability: str) -> dict:
+    writer = GroupCommitWriter(path, durability=durability)
+    filler = "x" * size
+
+    def run(thread: int):
+        for seq in range(records):
+            line = json.dumps({"proc": proc, "thread": thread, "seq": seq, "pad": filler})
+            writer.append((line + "\n").encode("utf-8"))
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return writer.stats
+
+
+def _stress_worker_star(args: tuple) -> dict:
+    return _stress_worker(*args)
+
+
+def stress(path: str, procs: int = 8, threads: int = 4, records: int = 250,
+           size: int = 4096, durability: str = "fsync") -> dict:
+    """
+    Hammer `path` from `procs` processes × `threads` threads × `records`
+    appends each, then re-read the file and check that every line is valid
+    JSON and every (proc, thread, seq) triple appears exactly once.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(procs) as pool:
+        all_stats = pool.map(
+            _stress_worker_star,
+            [(path, p, threads, records, size, durability) for p in range(procs)],
+        )
+    elapsed = time.perf_counter() - t0
+
+    seen, bad_lines, dupes = set(), 0, 0
+    with open(path, "rb") as f:
+        for raw in f:
+            try:
+                r = json.loads(raw)
+                key = (r["proc"], r["thread"], r["seq"])
+            except (ValueError, KeyError):
+                bad_lines += 1
+                continue
+            if key in seen:
+                dupes += 1
+            seen.add(key)
+
+    expected = procs * threads * records
+    commits  = sum(s["commits"] for s in all_stats)
+    return {
+        "expected":      expected,
+        "found":         len(seen),
+        "bad_lines":     bad_lines,
+        "duplicates":    dupes,
+        "ok":            len(seen) == expected and bad_lines == 0 and dupes == 0,
+        "seconds":       round(elapsed, 3),
+        "records_per_s": round(expected / elapsed) if elapsed else 0,
+        "avg_batch":     round(expected / commits, 2) if commits else 0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.log_writer")
+    sub = parser.add_subparsers(dest="command", required=True)
+    st = sub.add_parser("stress", help="concurrent append stress check")
+    st.add_argument("--path",       default="stress_log.jsonl")
+    st.add_argument("--procs",      type=int, default=8)
+    st.add_argument("--threads",    type=int, default=4)
+    st.add_argument("--records",    type=int, default=250)
+    st.add_argument("--size",       type=int, default=4096, help="payload bytes per record")
+    st.add_argument("--durability", choices=DURABILITY_MODES, default="fsync")
+    args = parser.parse_args(argv)
+
+    report = stress(args.path, args.procs, args.threads, args.records, args.size, args.durability)
+    for k, v in report.items():
+        print(f"{k:>14}: {v}")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,322 @@
+"""
+utils/persist_queue.py
+───────────────────────
+Non-blocking persistence for finished screenings.
+
+`BackgroundPersister.submit()` appends the record to a small per-process
+journal and hands it to a writer thread through a bounded queue, so the
+candidate never waits on the real store (JSONL group commit, SQLite, …).
+Journal entries go through the caller's `encode` / `decode` hooks, so they
+can be sealed like the log (storage.py journals records after moving the
+answers to the transcript store and, with PII_ENCRYPTION, encrypted).
+
+Guarantees:
+  - A record is acknowledged only after it is in the journal, so a crash
+    (or a store outage) never silently drops it. Journals left behind by
+    dead processes are replayed by the next process that starts.
+  - When the queue is full the record is *spilled*: it stays only in the
+    journal and the writer thread picks it up once it catches up.
+  - atexit drains the queue before the interpreter exits.
+  - flush() persists everything journaled so far, orphans included, and
+    empties the journal; storage.purge_candidates() runs it first so a
+    purge also reaches saves that were still pending.
+  - Delivery to the store is at-least-once; every record carries a
+    `record_id` so duplicates after a crash can be recognised.
+"""
+
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:          # Windows: orphaned journals are not auto-replayed
+    fcntl = None
+
+
+_RETRY_DELAYS = (0.1, 0.5, 2.0)   # seconds between persist attempts
+_MAX_BATCH    = 64
+_IDLE_POLL    = 0.5
+_TMP_SUFFIX   = ".new"            # journal not yet locked (never holds records)
+_STALE_TMP    = 60.0              # seconds before such a file counts as left by a crash
+
+
+def _read_pending(path: str) -> list[dict]:
+    """Records in a journal that have no matching done-marker, in order."""
+    pending: dict[str, dict] = {}
+    try:
+        with open(path, "rb") as f:
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue         # torn tail from a crash mid-write
+                if "r" in entry:
+                    pending[entry["r"].get("record_id", "")] = entry["r"]
+                for rid in entry.get("done", ()):
+                    pending.pop(rid, None)
+    except OSError:
+        return []
+    return list(pending.values())
+
+
+class BackgroundPersister:
+    """
+    Bounded-queue writer thread in front of a blocking `persist(record)`.
+
+    Args:
+        persist:       Callable that stores one record, returning True on success.
+        journal_dir:   Directory for per-process journals.
+        max_queue:     In-memory queue bound; beyond it records are spilled.
+        fsync_journal: fsync each journal append (power-loss durable ack).
+        encode:        Record → journal form (must keep `record_id` readable).
+        decode:        Journal form → record, for replays.
+    """
+
+    def __init__(self, persist: Callable[[dict], bool], journal_dir: str,
+                 max_queue: int = 256, fsync_journal: bool = False,
+                 encode: Callable[[dict], dict] | None = None,
+                 decode: Callable[[dict], dict] | None = None):
+        self._persist      = persist
+        self._encode       = encode or (lambda record: record)
+        self._decode       = decode or (lambda record: record)
+        self._journal_dir  = journal_dir
+        self._fsync        = fsync_journal
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock         = threading.Lock()     # journal writes + bookkeeping
+        self._in_memory: set[str] = set()         # ids queued or in flight
+        self._spilled      = False                # journal holds records not in memory
+        self._closing      = False
+        self._recovered    = threading.Event()    # orphans replayed at startup
+        self.stats = {
+            "submitted": 0, "persisted": 0, "spilled": 0, "retries": 0,
+            "failed": 0, "recovered": 0, "queue_high_water": 0,
+            "last_latency_ms": 0.0, "max_latency_ms": 0.0,
+        }
+
+        os.makedirs(journal_dir, exist_ok=True)
+        # Unique per process start: a recycled PID must never adopt (and
+        # later truncate) the journal a crashed process left behind.
+        self._journal_path = os.path.join(
+            journal_dir, f"journal-{os.getpid()}-{uuid.uuid4().hex[:12]}.jsonl")
+        # Locked before it gets a name recovery looks at: an unlocked
+        # journal-*.jsonl is always an orphan.
+        tmp = self._journal_path + _TMP_SUFFIX
+        self._journal_fd   = os.open(tmp, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._journal_fd, fcntl.LOCK_EX)   # marks this journal as live
+        os.rename(tmp, self._journal_path)
+
+        self._thread = threading.Thread(target=self._run, name="candidate-persister", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ── Producer side ────────────────────────────────────────────────────────
+
+    def submit(self, record: dict) -> bool:
+        """
+        Acknowledge `record` for persistence without waiting on the store.
+
+        Returns:
+            True once the record is journaled, False if even the journal
+            write failed (the caller should then fall back to a sync save).
+        """
+        try:
+            sealed = self._encode(record)
+        except Exception:
+            return False
+        entry = (json.dumps({"r": sealed}, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._closing:
+                return False
+            try:
+                self._journal_write(entry)
+            except OSError:
+                return False
+            self.stats["submitted"] += 1
+            try:
+                self._queue.put_nowait((record, time.monotonic()))
+                self._in_memory.add(record["record_id"])
+            except queue.Full:
+                self._spilled = True
+                self.stats["spilled"] += 1
+            depth = self._queue.qsize()
+            if depth > self.stats["queue_high_water"]:
+                self.stats["queue_high_water"] = depth
+        return True
+
+    def metrics(self) -> dict:
+        """Backpressure snapshot: counters plus current queue depth."""
+        with self._lock:
+            return {**self.stats, "queue_depth": self._queue.qsize(),
+                    "spill_pending": self._spilled}
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every journaled record (and any orphaned journal) is in
+        the store, then truncate the journal.
+
+        Returns:
+            False if that did not happen within `timeout` seconds (the store
+            keeps failing): the records are still only in the journal.
+        """
+        deadline = time.monotonic() + timeout
+        if not self._recovered.wait(timeout):
+            return False
+        self._recover_orphans()                   # left behind since startup
+        while True:
+            with self._lock:
+                if self._queue.empty() and not self._in_memory and not self._spilled:
+                    break
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        self._compact_journal()
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting records and drain the queue (registered with atexit)."""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+        self._thread.join(timeout)
+        # Whatever is still unpersisted stays in the journal for the next process.
+        with self._lock:
+            try:
+                if not self._thread.is_alive() and os.fstat(self._journal_fd).st_size == 0:
+                    os.unlink(self._journal_path)
+                os.close(self._journal_fd)
+            except OSError:
+                pass
+
+    # ── Writer thread ────────────────────────────────────────────────────────
+
+    def _journal_write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._journal_fd, view):]
+        if self._fsync:
+            os.fsync(self._journal_fd)
+
+    def _run(self):
+        self._recover_orphans()
+        self._recovered.set()
+        while True:
+            try:
+                first = self._queue.get(timeout=_IDLE_POLL)
+            except queue.Empty:
+                if self._spilled:
+                    self._drain_spilled()
+                elif self._closing:
+                    break
+                else:
+                    self._compact_journal()
+                continue
+            batch = [first]
+            while len(batch) < _MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._persist_batch(batch)
+        self._compact_journal()
+
+    def _persist_batch(self, batch: list[tuple[dict, float]]):
+        done = []
+        for record, enqueued_at in batch:
+            if self._persist_with_retry(record):
+                done.append(record["record_id"])
+                latency = (time.monotonic() - enqueued_at) * 1000
+                self.stats["last_latency_ms"] = round(latency, 2)
+                self.stats["max_latency_ms"]  = round(max(latency, self.stats["max_latency_ms"]), 2)
+        with self._lock:
+            for record, _ in batch:
+                self._in_memory.discard(record["record_id"])
+            if len(done) < len(batch):
+                self._spilled = True              # keep failures for a later pass
+            if done:
+                self._mark_done(done)
+
+    def _persist_with_retry(self, record: dict) -> bool:
+        for delay in (0.0, *_RETRY_DELAYS):
+            if delay:
+                self.stats["retries"] += 1
+                time.sleep(delay)
+            try:
+                if self._persist(record):
+                    self.stats["persisted"] += 1
+                    return True
+            except Exception:
+                pass
+        self.stats["failed"] += 1
+        return False
+
+    def _mark_done(self, ids: list[str]):
+        """Append a done-marker; caller holds self._lock."""
+        try:
+            self._journal_write((json.dumps({"done": ids}) + "\n").encode("utf-8"))
+        except OSError:
+            pass                                  # worst case: replayed as a duplicate
+
+    def _drain_spilled(self):
+        with self._lock:
+            self._spilled = False
+            pending = [r for r in _read_pending(self._journal_path)
+                       if r.get("record_id") not in self._in_memory]
+            self._in_memory.update(r.get("record_id") for r in pending)
+        if pending:
+            self._persist_batch([(self._decode(r), time.monotonic()) for r in pending])
+
+    def _compact_journal(self):
+        """Truncate the journal once everything in it has been persisted."""
+        with self._lock:
+            if self._queue.empty() and not self._in_memory and not self._spilled:
+                try:
+                    if os.fstat(self._journal_fd).st_size:
+                        os.ftruncate(self._journal_fd, 0)
+                except OSError:
+                    pass
+
+    def _recover_orphans(self):
+        """Replay journals whose owning process is gone (its flock is free)."""
+        if fcntl is None:
+            return
+        for path in glob.glob(os.path.join(self._journal_dir, "journal-*.jsonl" + _TMP_SUFFIX)):
+            try:                                  # a process died before locking it
+                if time.time() - os.stat(path).st_mtime > _STALE_TMP:
+                    os.unlink(path)
+            except OSError:
+                pass
+        pattern = os.path.join(self._journal_dir, "journal-*.jsonl")
+        for path in glob.glob(pattern):
+            if os.path.abspath(path) == os.path.abspath(self._journal_path):
+                continue
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_APPEND)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)                      # owner still alive
+                continue
+            try:
+                pending = _read_pending(path)
+                done = [r["record_id"] for r in pending
+                        if self._persist_with_retry(self._decode(r))]
+                self.stats["recovered"] += len(done)
+                if len(done) == len(pending):
+                    os.unlink(path)
+                elif done:
+                    os.write(fd, (json.dumps({"done": done}) + "\n").encode("utf-8"))
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
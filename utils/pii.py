@@ -0,0 +1,443 @@
+"""
+utils/pii.py
+─────────────
+Field-level encryption of candidate PII at rest.
+
+With `PII_ENCRYPTION` on, storage.py passes every record through
+`PiiCipher.encrypt_record()` before it reaches a store:
+
+    {"name": "Aarav", "email": "aarav@example.com", "phone": "+91 …", …}
+      → {"email": "h:<keyed hash>", "pii": "<base64 nonce|AES-GCM ciphertext>", …}
+
+  - `email` becomes a deterministic keyed hash (keyed BLAKE2b of the
+    normalised address), so every email index — sidecar, hash index,
+    SQLite column — keeps working on the token; storage.py hashes query
+    emails the same way.
+  - The PII fields (and the upsert `history`, which can hold old values)
+    are sealed together in one AES-256-GCM blob, authenticated against
+    the record_id so blobs cannot be swapped between records.
+  - Keys are derived once per process (HKDF from a 32-byte key file, or
+    scrypt from the `TALENTSCOUT_PII_KEY` passphrase): one AEAD context
+    and one pre-keyed hash object are reused for every record.
+  - Decryption is lazy: `decrypt_record()` returns a `PiiRecord`, whose
+    plaintext fields (position, timestamps, …) read without the cipher;
+    the blob is opened the first time a sealed field is read, or the
+    record is used as a whole. Scans that aggregate, count or index
+    non-PII fields never pay for AES-GCM.
+  - `seal()` / `unseal()` encrypt opaque bytes with the same key, bound
+    to a context string: transcript blobs, and the answers a background
+    save journals until its record is stored.
+  - `encrypt_records()` / `decrypt_records()` batch bulk writes and reads:
+    one `os.urandom` call for all nonces, no per-record setup. Opened blobs
+    are memoised (bounded LRU), so the records every page rerun reloads —
+    the sidebar's recent candidates, repeat email lookups — are decrypted
+    once per process.
+
+Requires `cryptography` (pip install cryptography). Records written
+before encryption was enabled are returned as-is.
+
+Overhead benchmark (save and load paths, plaintext vs encrypted):
+    python -m utils.pii bench --records 20000 [--durability flush]
+"""
+
+import argparse
+import binascii
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import shutil
+import time
+
+try:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+except ImportError:          # encryption stays unavailable until installed
+    AESGCM = None
+
+
+PII_KEY_ENV   = "TALENTSCOUT_PII_KEY"
+TOKEN_PREFIX  = "h:"
+_NONCE        = 12
+_SCRYPT_SALT  = b"talentscout-pii-v1"
+_JSON         = json.JSONDecoder()
+_JSON_STR     = json.encoder.encode_basestring     # one JSON string literal, non-ASCII as is
+
+
+def load_master_key(key_file: str) -> bytes:
+    """
+    Master secret: scrypt of the `TALENTSCOUT_PII_KEY` passphrase if set,
+    else the 32 bytes in `key_file` (generated with mode 0600 on first use;
+    processes racing to create it all end up with the same key).
+    """
+    passphrase = os.environ.get(PII_KEY_ENV)
+    if passphrase:
+        return hashlib.scrypt(passphrase.encode("utf-8"), salt=_SCRYPT_SALT,
+                              n=2 ** 15, r=8, p=1, maxmem=64 * 1024 * 1024, dklen=32)
+    try:
+        with open(key_file, "rb") as f:
+            key = f.read()
+        if len(key) == 32:
+            return key
+    except FileNotFoundError:
+        pass
+    key = os.urandom(32)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(key_file)))   # mode 0600
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp, key_file)        # atomic, and never replaces a key already there
+    except FileExistsError:
+        with open(key_file, "rb") as f:
+            key = f.read()
+    finally:
+        os.unlink(tmp)
+    if len(key) != 32:
+        raise RuntimeError(f"{key_file} is not a 32-byte PII key")
+    return key
+
+
+class PiiRecord(dict):
+    """
+    A decrypted record whose sealed fields are opened on first use.
+
+    Until then the record holds the stored form ("pii" blob, email token)
+    and hides it: reading a plaintext field costs one extra check, reading
+    a sealed field (or "pii") or anything that sees the whole record
+    (iteration, items(), len(), comparison, copying, JSON encoding,
+    pickling) opens the blob once, in place, after which the record is an
+    ordinary dict. Each PiiCipher makes subclasses that carry its opener,
+    so construction is the plain C dict copy.
+    """
+
+    __slots__ = ()
+    _opener = None                 # (blob, record_id) → {field: value}; set per subclass
+    _hidden = frozenset()          # sealed fields plus "pii"
+
+    def _unseal(self):
+        # The blob goes last: a thread racing this one either opens it too
+        # or finds the fields already in place.
+        blob = dict.get(self, "pii")
+        if blob is None:
+            return
+        opened = self._opener(blob, dict.get(self, "record_id", ""))
+        if "history" in opened:
+            opened = {**opened, "history": json.loads(opened["history"])}
+        dict.update(self, opened)
+        dict.pop(self, "pii", None)
+
+    def __getitem__(self, key):
+        if key in self._hidden and dict.__contains__(self, "pii"):
+            self._unseal()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self._hidden and dict.__contains__(self, "pii"):
+            self._unseal()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        if key in self._hidden and dict.__contains__(self, "pii"):
+            self._unseal()
+        return dict.__contains__(self, key)
+
+    def __eq__(self, other):
+        if dict.__contains__(self, "pii"):
+            self._unseal()
+        if isinstance(other, PiiRecord) and dict.__contains__(other, "pii"):
+            other._unseal()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __reduce_ex__(self, protocol):
+        return dict, (dict(self.items()),)          # a plain dict: the opener stays here
+
+
+def _unsealing(name: str):
+    method = getattr(dict, name)
+
+    @functools.wraps(method)
+    def whole(self, *args, **kwargs):
+        if dict.__contains__(self, "pii"):
+            self._unseal()
+        return method(self, *args, **kwargs)
+    return whole
+
+
+for _name in ("__iter__", "__reversed__", "__len__", "__repr__",
+              "__or__", "__ror__", "__ior__", "__setitem__", "__delitem__",
+              "keys", "values", "items", "copy", "pop", "popitem", "setdefault",
+              "update", "clear"):
+    setattr(PiiRecord, _name, _unsealing(_name))
+
+
+class PiiCipher:
+    """
+    AEAD for the PII fields of candidate records.
+
+    Args:
+        master_key: 32-byte secret; encryption and hashing keys are derived
+                    from it once, here.
+        fields:     Record fields sealed into the encrypted blob.
+        cache_size: Opened blobs kept in memory (0 disables the memo).
+    """
+
+    def __init__(self, master_key: bytes, fields=("name", "email", "phone"),
+                 cache_size: int = 4096):
+        if AESGCM is None:
+            raise RuntimeError("PII encryption needs cryptography: pip install cryptography")
+        okm = HKDF(algorithm=hashes.SHA256(), length=64, salt=None,
+                   info=b"talentscout pii fields v1").derive(master_key)
+        self._aead   = AESGCM(okm[:32])
+        self._mac    = hashlib.blake2b(key=okm[32:], digest_size=16)
+        self.fields  = tuple(fields)
+        self._open   = functools.lru_cache(maxsize=cache_size)(self._open_blob) \
+            if cache_size else self._open_blob
+        hidden = frozenset(self.fields + ("history", "pii"))
+        self._cached, self._uncached = (
+            type("PiiRecord", (PiiRecord,),
+                 {"__slots__": (), "_opener": staticmethod(opener), "_hidden": hidden})
+            for opener in (self._open, self._open_blob)
+        )
+
+    def email_token(self, email: str) -> str:
+        """Deterministic keyed hash of the normalised email, used as the stored `email`."""
+        if email.startswith(TOKEN_PREFIX):
+            return email
+        mac = self._mac.copy()
+        mac.update(email.strip().lower().encode("utf-8"))
+        return TOKEN_PREFIX + mac.hexdigest()
+
+    # ── Single records ───────────────────────────────────────────────────────
+
+    def encrypt_record(self, record: dict, nonce: bytes | None = None) -> dict:
+        if "pii" in record:
+            return record
+        out = dict(record)
+        values = [str(out.pop(f, "")) for f in self.fields]
+        if "history" in out:
+            values.append(json.dumps(out.pop("history"), ensure_ascii=False))
+        nonce = nonce or os.urandom(_NONCE)
+        plain = ("[" + ",".join(map(_JSON_STR, values)) + "]").encode("utf-8")
+        sealed = self._aead.encrypt(nonce, plain, out.get("record_id", "").encode("utf-8"))
+        out["email"] = self.email_token(str(record.get("email", "")))
+        out["pii"]   = binascii.b2a_base64(nonce + sealed, newline=False).decode("ascii")
+        return out
+
+    def _open_blob(self, blob: str, record_id: str) -> dict:
+        """{field: value} sealed in `blob` (`history` still as JSON text)."""
+        raw = memoryview(binascii.a2b_base64(blob))
+        plain = self._aead.decrypt(raw[:_NONCE], raw[_NONCE:], record_id.encode("utf-8"))
+        return dict(zip(self.fields + ("history",), _JSON.raw_decode(plain.decode("utf-8"))[0]))
+
+    def decrypt_record(self, record: dict) -> dict:
+        """`record` as a PiiRecord (opened lazily); records without a blob as-is."""
+        return self._cached(record) if "pii" in record else record
+
+    # ── Batches ──────────────────────────────────────────────────────────────
+
+    def encrypt_records(self, records: list[dict]) -> list[dict]:
+        nonces = os.urandom(_NONCE * len(records))
+        return [self.encrypt_record(r, nonces[i * _NONCE:(i + 1) * _NONCE])
+                for i, r in enumerate(records)]
+
+    def decrypt_records(self, records, cache: bool = True) -> list[dict]:
+        """
+        Decrypt many records. Pass `cache=False` for bulk reads, so they
+        do not evict the working set from the memo.
+        """
+        sealed = self._cached if cache else self._uncached
+        return [sealed(r) if "pii" in r else r for r in records]
+
+    def iter_decrypted(self, records, cache: bool = False):
+        """Streaming decrypt_records() for scans (uncached by default)."""
+        sealed = self._cached if cache else self._uncached
+        for record in records:
+            yield sealed(record) if "pii" in record else record
+
+    # ── Opaque blobs ─────────────────────────────────────────────────────────
+
+    def seal(self, data: bytes, context: str) -> bytes:
+        """`data` as nonce + AES-GCM ciphertext, authenticated against `context`."""
+        nonce = os.urandom(_NONCE)
+        return nonce + self._aead.encrypt(nonce, data, context.encode("utf-8"))
+
+    def unseal(self, blob: bytes, context: str) -> bytes:
+        """Inverse of seal(); raises InvalidTag if `blob` or `context` differs."""
+        raw = memoryview(blob)
+        return self._aead.decrypt(raw[:_NONCE], raw[_NONCE:], context.encode("utf-8"))
+
+
+_cipher: PiiCipher | None = None
+
+
+def get_cipher() -> PiiCipher:
+    """The process-wide cipher, keyed from config.py on first use."""
+    global _cipher
+    if _cipher is None:
+        from config import PII_KEY_FILE, PII_FIELDS
+        _cipher = PiiCipher(load_master_key(PII_KEY_FILE), PII_FIELDS)
+    return _cipher
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+
+def bench(records: int = 20_000, durability: str = "fsync", recent_n: int = 5,
+          trials: int = 41) -> dict:
+    """
+    Plaintext vs encrypted storage paths, one JSONL store each in a temp dir:
+      - save:   transcript put (+ seal) + (encrypt) + append + counter bump,
+                as persist_record() does
+      - lookup: get_by_email via the hash index (+ decrypt)
+      - recent: the `recent_n` newest records (+ batch decrypt)
+      - scan:   full streaming scan (+ batch decrypt, uncached)
+    Loads are timed with the memo warm (the app's steady state: reruns
+    reload the same records) and cold (no memo). Decryption is lazy, so
+    these figures are the read path up to the first sealed field read;
+    "open_us" is what that first read adds per record (cold), reported
+    separately. The PASS gate covers every overhead figure.
+    Saves alternate between the two stores record by record, loads run in
+    `trials` interleaved blocks (order flipped every trial). Each overhead
+    is the median of the paired encrypted / plaintext ratios, so drift on
+    a busy machine hits both sides of a pair alike.
+    """
+    import gc
+    import random
+    import statistics
+    from utils.counters import Counters
+    from utils.stores import JsonlStore, _bench_records
+    from utils.transcripts import TranscriptStore
+
+    master = os.urandom(32)
+    cipher = PiiCipher(master)
+    cold   = PiiCipher(master, cache_size=0)
+    rows = list(_bench_records(records, seed=11))
+    answers = [{"question": f"Question {i} about the stack?", "answer": "An answer " * 8}
+               for i in range(5)]
+    probe = random.Random(3).sample(rows, min(200, records))
+    root = tempfile.mkdtemp(prefix="ts-pii-")
+    gc.freeze()                   # keep the fixtures out of GC passes timed on either side
+
+    def open_side(name, seal=None):
+        return (
+            JsonlStore(os.path.join(root, name, "log.jsonl"), os.path.join(root, name, "seg"),
+                       os.path.join(root, name, "email.idx"), durability=durability,
+                       commit_window=0.0, max_age_hours=float("inf")),
+            TranscriptStore(os.path.join(root, name, "transcripts"), fsync=durability == "fsync",
+                            seal=seal),
+            Counters(os.path.join(root, name, "counters.db")),
+        )
+
+    try:
+        sides = {False: open_side("plain"), True: open_side("encrypted", cipher.seal)}
+        saved = {False: 0.0, True: 0.0}
+        save_ratios = []
+        for i, r in enumerate(rows):
+            took = {}
+            for encrypted in ((False, True) if i % 2 else (True, False)):
+                store, blobs, counters = sides[encrypted]
+                t0 = time.perf_counter()
+                record = {**r, "transcript": blobs.put(answers, r["record_id"])}
+                store.append(cipher.encrypt_record(record) if encrypted else record)
+                counters.apply([record], [])
+                took[encrypted] = time.perf_counter() - t0
+                saved[encrypted] += took[encrypted]
+            save_ratios.append(took[True] / took[False])
+
+        def lookup(encrypted, c=cipher):
+            store = sides[encrypted][0]
+            for r in probe:
+                if encrypted:
+                    c.decrypt_record(store.get_by_email(c.email_token(r["email"])))
+                else:
+                    store.get_by_email(r["email"])
+
+        def recent(encrypted, c=cipher):
+            store = sides[encrypted][0]
+            for _ in range(100):
+                got = store.recent(recent_n)
+                if encrypted:
+                    c.decrypt_records(got)
+
+        def scan(encrypted):
+            got = sides[encrypted][0].scan()
+            return cipher.decrypt_records(got, cache=False) if encrypted else list(got)
+
+        timings, ratios = {}, {}
+        for name, fn, reps in (
+            ("lookup", lookup, trials), ("lookup_cold", functools.partial(lookup, c=cold), trials),
+            ("recent", recent, trials), ("recent_cold", functools.partial(recent, c=cold), trials),
+            ("scan", scan, 15),
+        ):
+            fn(False), fn(True)                               # warm caches and the index
+            samples = {False: [], True: []}
+            for i in range(reps):
+                for encrypted in ((False, True) if i % 2 else (True, False)):
+                    t0 = time.perf_counter()
+                    fn(encrypted)
+                    samples[encrypted].append(time.perf_counter() - t0)
+            timings[name] = {k: statistics.median(v) for k, v in samples.items()}
+            ratios[name] = statistics.median(e / p for p, e in zip(samples[False], samples[True]))
+
+        sealed = [cold.decrypt_record(r) for r in sides[True][0].recent(len(probe))]
+        t0 = time.perf_counter()
+        for r in sealed:
+            r.get("name")
+        open_s = (time.perf_counter() - t0) / max(1, len(sealed))
+    finally:
+        gc.unfreeze()
+        shutil.rmtree(root, ignore_errors=True)
+
+    def pct(ratio):
+        return round((ratio - 1) * 100, 1)
+
+    return {
+        "records":              records,
+        "durability":           durability,
+        "save_plain_us":        round(saved[False] / records * 1e6, 1),
+        "save_encrypted_us":    round(saved[True] / records * 1e6, 1),
+        "save_overhead_pct":    pct(statistics.median(save_ratios)),
+        "lookup_plain_us":      round(timings["lookup"][False] / len(probe) * 1e6, 1),
+        "lookup_encrypted_us":  round(timings["lookup"][True] / len(probe) * 1e6, 1),
+        "lookup_overhead_pct":  pct(ratios["lookup"]),
+        "lookup_cold_pct":      pct(ratios["lookup_cold"]),
+        "recent_plain_us":      round(timings["recent"][False] / 100 * 1e6, 1),
+        "recent_encrypted_us":  round(timings["recent"][True] / 100 * 1e6, 1),
+        "recent_overhead_pct":  pct(ratios["recent"]),
+        "recent_cold_pct":      pct(ratios["recent_cold"]),
+        "scan_plain_s":         round(timings["scan"][False], 3),
+        "scan_encrypted_s":     round(timings["scan"][True], 3),
+        "scan_overhead_pct":    pct(ratios["scan"]),
+        "open_us":              round(open_s * 1e6, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.pii")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("bench", help="encryption overhead on save / load")
+    b.add_argument("--records", type=int, default=20_000)
+    b.add_argument("--durability", choices=["fsync", "flush"], default="fsync")
+    b.add_argument("--recent", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    report = bench(args.records, args.durability, args.recent)
+    for k, v in report.items():
+        print(f"{k:>20}: {v}")
+    over = [k for k, v in report.items() if k.endswith("_pct") and v >= 10]
+    print(f"FAIL: overhead ≥ 10% in {', '.join(over)}" if over
+          else "PASS: save and load overhead < 10%")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,232 @@
+"""
+utils/resume_batch.py
+──────────────────────
+Bulk resume ingestion: parse a directory of PDFs (job-board dumps) with a
+process pool and stream one JSON line per file.
+
+    python -m utils.resume_batch DIR [--out resumes.jsonl] [--workers 8]
+                                     [--timeout 30] [--glob "**/*.pdf"] [--text]
+
+Each line is parse_resume()'s result plus "file" and "seconds" (without
+"text" unless --text is given; the parse cache keeps no text, so --text
+bypasses it). Lines are written as files complete, so the output is
+usable while a run is still going.
+
+One bad PDF never stalls the run:
+  - each parse runs under a SIGALRM deadline in its worker
+    (error "timeout")
+  - a worker stuck past the deadline in C code is killed, the pool is
+    replaced and the other in-flight files are resubmitted
+  - if a worker dies (segfault, OOM kill), every file that was in flight
+    is retried alone; the one that kills a worker again is recorded with
+    error "crashed"
+
+At most `workers` files are in flight, so memory stays flat whatever the
+directory size. The summary (files/s, p50/p95 parse time, error counts)
+goes to stderr.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+DEFAULT_GLOB    = "**/*.pdf"
+DEFAULT_TIMEOUT = 30.0
+KILL_GRACE      = 5.0          # seconds past the timeout before a worker is killed
+
+_MIME_TYPES = {".pdf": "application/pdf", ".png": "image/png",
+               ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+
+class _ParseTimeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _ParseTimeout()
+
+
+def _init_worker():
+    # The batch already runs one file per process; page-parallel extraction
+    # inside each of them would only oversubscribe the CPUs. extract_pdf()
+    # reads this in the worker and hands it to the guard's child.
+    import resume_parser
+    resume_parser.PDF_PAGE_WORKERS = 1
+
+
+def parse_file(path: str, timeout: float, cache: bool = True) -> dict:
+    """Parse one file in a worker process; never raises."""
+    import resume_parser
+
+    t0 = time.perf_counter()
+    mime = _MIME_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        parse = resume_parser.parse_resume if cache else resume_parser._parse_resume
+        result = parse(data, mime)
+    except _ParseTimeout:
+        result = {"error": "timeout"}
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    return {"file": path, "seconds": round(time.perf_counter() - t0, 4), **result}
+
+
+def _kill(pool: ProcessPoolExecutor):
+    # The executor cannot cancel a running task; terminating its workers
+    # breaks the pool, which is then replaced.
+    for proc in list((pool._processes or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_batch(paths, out, workers: int | None = None, timeout: float = DEFAULT_TIMEOUT,
+              with_text: bool = False, cache: bool = True) -> dict:
+    """
+    Parse `paths` (any iterable) and write one JSON line per file to `out`.
+
+    Returns:
+        Summary dict: files, ok, errors {kind: n}, elapsed_s, files_per_s,
+        p50_s, p95_s.
+    """
+    workers  = workers or os.cpu_count() or 1
+    cache    = cache and not with_text   # cached results carry no text
+    pending  = iter(paths)
+    again    = deque()         # in flight when a stuck worker was killed
+    retry    = deque()         # in flight when a worker died; retried one at a time
+    suspects = set()
+    inflight = {}              # future → (path, hard deadline)
+    times, errors = [], Counter()
+    files = 0
+    t0 = time.perf_counter()
+
+    def emit(row):
+        nonlocal files
+        files += 1
+        if row.get("error"):
+            errors[row["error"].split(":")[0]] += 1
+        if row.get("error") in (None, "scanned_pdf", "image_file"):
+            times.append(row["seconds"])
+        if not with_text:
+            row.pop("text", None)
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+
+    def submit(path):
+        fut = pool.submit(parse_file, path, timeout, cache)
+        inflight[fut] = (path, time.monotonic() + timeout + KILL_GRACE)
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        while True:
+            # Suspects run alone, so a second crash is unambiguous.
+            if retry and not inflight:
+                submit(retry.popleft())
+            isolating = any(path in suspects for path, _ in inflight.values())
+            while not retry and not isolating and len(inflight) < workers:
+                path = again.popleft() if again else next(pending, None)
+                if path is None:
+                    break
+                submit(path)
+            if not inflight:
+                break
+
+            deadline = min(d for _, d in inflight.values())
+            done, _ = wait(inflight, timeout=max(0.0, deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            crashed = []
+            for fut in done:
+                path, _ = inflight.pop(fut)
+                try:
+                    emit(fut.result())
+                except BrokenProcessPool:
+                    crashed.append(path)
+            now = time.monotonic()
+            overdue = [f for f, (_, d) in inflight.items() if d <= now]
+            if not crashed and not overdue:
+                continue
+
+            _kill(pool)
+            for fut in overdue:
+                path, _ = inflight.pop(fut)
+                emit({"file": path, "seconds": None, "error": "timeout"})
+            if crashed:
+                # Any file still in flight may have been the one that killed the worker.
+                crashed += [path for path, _ in inflight.values()]
+                for path in crashed:
+                    if path in suspects:
+                        emit({"file": path, "seconds": None, "error": "crashed"})
+                    else:
+                        suspects.add(path)
+                        retry.append(path)
+            else:
+                for path, _ in inflight.values():
+                    (retry if path in suspects else again).append(path)
+            inflight.clear()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - t0
+    times.sort()
+    return {
+        "files":       files,
+        "ok":          files - sum(errors.values()),
+        "errors":      dict(errors),
+        "elapsed_s":   round(elapsed, 3),
+        "files_per_s": round(files / elapsed, 2) if elapsed else 0.0,
+        "p50_s":       round(times[len(times) // 2], 4) if times else None,
+        "p95_s":       round(times[int(len(times) * 0.95)], 4) if times else None,
+    }
+
+
+def _iter_files(root: str, pattern: str):
+    from pathlib import Path
+    for path in sorted(Path(root).glob(pattern)):
+        if path.is_file():
+            yield str(path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.resume_batch")
+    parser.add_argument("directory")
+    parser.add_argument("--out", default="resumes.jsonl", help='JSONL output ("-" for stdout)')
+    parser.add_argument("--glob", default=DEFAULT_GLOB, help="files to parse, relative to DIR")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds per file before it is abandoned")
+    parser.add_argument("--text", action="store_true", help="include the extracted text")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the parse cache (utils/resume_cache.py)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        summary = run_batch(_iter_files(args.directory, args.glob), out, args.workers,
+                            args.timeout, args.text, not args.no_cache)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    errors = ", ".join(f"{k} {v}" for k, v in sorted(summary["errors"].items())) or "none"
+    print(f"{summary['files']} file(s) in {summary['elapsed_s']} s "
+          f"({summary['files_per_s']} files/s), p50 {summary['p50_s']} s, "
+          f"p95 {summary['p95_s']} s; errors: {errors}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
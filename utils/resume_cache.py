@@ -0,0 +1,203 @@
+"""
+utils/resume_cache.py
+──────────────────────
+Content-addressed cache for parse_resume() results.
+
+The same PDF is often uploaded again (retries, "Start New Session", the
+same candidate applying twice). Results are keyed by the SHA-256 of the
+file bytes plus the parser version, so a parser change never serves stale
+results, and kept in two tiers:
+
+  - memory — LRU of the last `max_items` results (serialised JSON, so a
+             caller mutating its result cannot corrupt the cache)
+  - disk   — one zlib-compressed JSON file per result, evicted oldest-used
+             first once the directory passes `max_bytes`
+
+    resume_cache/
+      3f/3fa9…c1.json.z        <parser version>-<sha256>, sharded by hash
+
+parse_resume() stores results without the extracted text, so entries
+hold the analysis (skills, projects, questions) but no contact details a
+purge would have to find. Keep the directory out of version control
+anyway (it is in .gitignore); `RESUME_CACHE_DIR = ""` caches in memory only.
+
+CLI:
+    python -m utils.resume_cache stats | clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+
+_SUFFIX   = ".json.z"
+_LOW_WATER = 0.8           # eviction trims the directory to this share of max_bytes
+
+
+def cache_key(file_bytes: bytes, version: str) -> str:
+    return f"{version}-{hashlib.sha256(file_bytes).hexdigest()}"
+
+
+class ResumeCache:
+    """
+    Two-tier result cache.
+
+    Args:
+        cache_dir: Directory of the disk tier ("" or None: memory only).
+        max_bytes: Size the disk tier is trimmed back under.
+        max_items: Results kept in the memory tier.
+    """
+
+    def __init__(self, cache_dir: str | None, max_bytes: int = 64 * 1024 * 1024,
+                 max_items: int = 128):
+        self.cache_dir = cache_dir or None
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self._lock     = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._disk_bytes: int | None = None       # measured on the first write
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evicted": 0}
+
+    def _path(self, key: str) -> str:
+        digest = key.rsplit("-", 1)[-1]
+        return os.path.join(self.cache_dir, digest[:2], key + _SUFFIX)
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return json.loads(data)
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    data = zlib.decompress(f.read())
+                os.utime(path)                    # recency for eviction
+            except (OSError, zlib.error):
+                data = None
+            if data is not None:
+                with self._lock:
+                    self._remember(key, data)
+                    self.stats["disk_hits"] += 1
+                return json.loads(data)
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def put(self, key: str, result: dict):
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._remember(key, data)
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        blob = zlib.compress(data, 1)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            try:
+                replaced = os.stat(path).st_size  # an overwrite only adds the difference
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError:
+            return                                # the disk tier is best-effort
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._disk_bytes += len(blob) - replaced
+            if self._disk_bytes > self.max_bytes:
+                self._evict()
+
+    def _remember(self, key: str, data: bytes):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _entries(self):
+        """(path, size, mtime) of every disk entry (also counts other processes' writes)."""
+        try:
+            shards = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(_SUFFIX):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime
+
+    def _evict(self):
+        """Delete least recently used entries until the tier is under the low-water mark."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes * _LOW_WATER:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats["evicted"] += 1
+        self._disk_bytes = total
+
+    def clear(self) -> int:
+        """Drop both tiers; returns disk entries removed."""
+        with self._lock:
+            self._memory.clear()
+            removed = 0
+            for path, _, _ in list(self._entries()) if self.cache_dir else ():
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            self._disk_bytes = 0
+        return removed
+
+    def disk_usage(self) -> tuple[int, int]:
+        """(entries, bytes) in the disk tier."""
+        if self.cache_dir is None:
+            return 0, 0
+        sizes = [size for _, size, _ in self._entries()]
+        return len(sizes), sum(sizes)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from config import RESUME_CACHE_DIR, RESUME_CACHE_MAX_BYTES, RESUME_CACHE_ITEMS
+
+    parser = argparse.ArgumentParser(prog="python -m utils.resume_cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args(argv)
+
+    cache = ResumeCache(RESUME_CACHE_DIR, RESUME_CACHE_MAX_BYTES, RESUME_CACHE_ITEMS)
+    if args.command == "clear":
+        print(f"Removed {cache.clear()} cached result(s)")
+    else:
+        entries, size = cache.disk_usage()
+        print(f"{entries} result(s), {size / 1024 / 1024:.1f} MiB of "
+              f"{RESUME_CACHE_MAX_BYTES / 1024 / 1024:.0f} MiB in {RESUME_CACHE_DIR or '(memory only)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
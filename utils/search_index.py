@@ -0,0 +1,250 @@
+"""
+utils/search_index.py
+──────────────────────
+In-memory inverted index for recruiter search over stored candidates.
+
+Indexes the tokenised `tech_stack`, `position` and `location` fields.
+Doc ids are assigned in append order, so higher ids are newer records.
+
+Postings start as sorted `array('I')` lists and are promoted to bitmaps
+(`bytearray`, one bit per doc) once they cover more than 1/32 of the
+corpus, which keeps memory at or below the plain-list size. A query
+intersects:
+  - all-bitmap terms block by block with big-int ANDs, from the newest
+    docs down, so a `limit`-sized answer touches only the top blocks;
+  - otherwise it walks the smallest list newest-first and probes the other
+    terms (bit test or binary search), stopping after `limit` hits.
+
+Benchmark:
+    python -m utils.search_index bench --records 1000000
+"""
+
+import argparse
+import bisect
+import random
+import re
+import threading
+import time
+from array import array
+from functools import reduce
+from operator import and_
+
+
+FIELDS = ("tech_stack", "position", "location")
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+_PROMOTE_RATIO = 32       # list → bitmap once len × ratio > corpus size
+_PROMOTE_MIN   = 1024     # …and it has at least this many entries
+_AND_BLOCK     = 4096     # bitmap bytes intersected per step (32k docs)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased tokens, keeping tech punctuation: "C++", "c#", "node.js"."""
+    tokens = (t.rstrip(".") for t in _TOKEN.findall(str(text).lower()))
+    return list(dict.fromkeys(t for t in tokens if t))
+
+
+class CandidateIndex:
+    """Incrementally maintained inverted index over candidate records."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        self.docs: list[dict] = []
+        self.postings: dict[str, dict[str, array | bytearray]] = {f: {} for f in FIELDS}
+        self.sources: dict[int, list] = {}     # id(chunk) → [chunk, records indexed]
+
+    # ── Maintenance ──────────────────────────────────────────────────────────
+
+    def sync(self, chunks: list[list[dict]]):
+        """
+        Index whatever was appended to `chunks` since the last sync.
+
+        `chunks` are the storage caches' append-only record lists. A chunk
+        that disappeared (compaction replaced a segment) forces a rebuild.
+        """
+        with self.lock:
+            live = {id(c) for c in chunks}
+            if any(key not in live for key in self.sources):
+                self.clear()
+            for chunk in chunks:
+                src = self.sources.setdefault(id(chunk), [chunk, 0])
+                if len(chunk) > src[1]:
+                    self.add(chunk[src[1]:])
+                    src[1] = len(chunk)
+
+    def add(self, records: list[dict]):
+        """Append records to the index (they become the newest docs)."""
+        with self.lock:
+            for record in records:
+                doc = len(self.docs)
+                self.docs.append(record)
+                for field in FIELDS:
+                    postings = self.postings[field]
+                    for token in tokenize(record.get(field, "")):
+                        p = postings.get(token)
+                        if p is None:
+                            postings[token] = array("I", (doc,))
+                        elif isinstance(p, bytearray):
+                            _set_bit(p, doc)
+                        else:
+                            p.append(doc)
+                            if len(p) >= _PROMOTE_MIN and len(p) * _PROMOTE_RATIO > doc:
+                                postings[token] = _to_bitmap(p, doc)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def search(self, criteria: dict[str, str | list[str]], limit: int = 50,
+               deleted: set | None = None) -> list[dict]:
+        """
+        Records matching every token of every criterion, newest first.
+
+        Args:
+            criteria: {field: text or list of texts}; each text is tokenised
+                      and every token must appear in that field.
+            limit:    Maximum number of records to return.
+            deleted:  record_ids to leave out (tombstoned records).
+        """
+        deleted = deleted or set()
+        with self.lock:
+            terms = []
+            for field, value in criteria.items():
+                values = value if isinstance(value, (list, tuple)) else [value]
+                for text in values:
+                    for token in tokenize(text):
+                        p = self.postings[field].get(token)
+                        if p is None:
+                            return []
+                        terms.append(p)
+            if not terms:
+                return []
+
+            lists = sorted((p for p in terms if not isinstance(p, bytearray)), key=len)
+            maps  = [p for p in terms if isinstance(p, bytearray)]
+            docs  = self._probe(lists, maps) if lists else _and_bitmaps(maps)
+
+            hits = []
+            for doc in docs:
+                record = self.docs[doc]
+                if record.get("record_id") in deleted:
+                    continue
+                hits.append(record)
+                if len(hits) >= limit:
+                    break
+            return hits
+
+    def _probe(self, lists: list[array], maps: list[bytearray]):
+        driver, others = lists[0], lists[1:]
+        for i in range(len(driver) - 1, -1, -1):
+            doc = driver[i]
+            if all(_has_bit(m, doc) for m in maps) and all(_in_sorted(o, doc) for o in others):
+                yield doc
+
+
+# ── Posting helpers ───────────────────────────────────────────────────────────
+
+def _set_bit(bitmap: bytearray, doc: int):
+    byte = doc >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(max(byte + 1 - len(bitmap), len(bitmap))))
+    bitmap[byte] |= 1 << (doc & 7)
+
+
+def _has_bit(bitmap: bytearray, doc: int) -> bool:
+    byte = doc >> 3
+    return byte < len(bitmap) and bool(bitmap[byte] >> (doc & 7) & 1)
+
+
+def _in_sorted(posting: array, doc: int) -> bool:
+    i = bisect.bisect_left(posting, doc)
+    return i < len(posting) and posting[i] == doc
+
+
+def _to_bitmap(posting: array, max_doc: int) -> bytearray:
+    bitmap = bytearray((max_doc >> 3) + 1)
+    for doc in posting:
+        bitmap[doc >> 3] |= 1 << (doc & 7)
+    return bitmap
+
+
+def _and_bitmaps(maps: list[bytearray]):
+    """
+    Doc ids set in every bitmap, highest (newest) first. Works top-down in
+    fixed-size byte blocks so a query that only needs the newest `limit`
+    hits never converts whole bitmaps.
+    """
+    end = min(len(m) for m in maps)       # bits past the shortest map AND to 0
+    while end > 0:
+        start = max(0, end - _AND_BLOCK)
+        x = reduce(and_, (int.from_bytes(m[start:end], "little") for m in maps))
+        while x:
+            bit = x.bit_length() - 1
+            yield start * 8 + bit
+            x ^= 1 << bit
+        end = start
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+
+_BENCH_TECH = ["Python", "Django", "React", "Kubernetes", "Docker", "AWS", "Go", "Java",
+               "Spring Boot", "PostgreSQL", "Redis", "Kafka", "C++", "Node.js", "Terraform"]
+_BENCH_LOC  = ["Bengaluru, India", "Pune, India", "Hyderabad, India", "Berlin, Germany",
+               "London, UK", "Austin, USA", "Singapore", "Chennai, India"]
+_BENCH_POS  = ["Backend Engineer", "Frontend Developer", "ML Engineer", "DevOps Engineer",
+               "Data Engineer", "Full Stack Developer", "SRE", "Backend Developer"]
+
+
+def bench(records: int = 1_000_000, queries: int = 200, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    index = CandidateIndex()
+    t0 = time.perf_counter()
+    batch = []
+    for i in range(records):
+        batch.append({
+            "record_id":  f"{i:08x}",
+            "tech_stack": ", ".join(rng.sample(_BENCH_TECH, rng.randint(2, 6))),
+            "location":   rng.choice(_BENCH_LOC),
+            "position":   rng.choice(_BENCH_POS),
+        })
+        if len(batch) == 10_000:
+            index.add(batch)
+            batch = []
+    index.add(batch)
+    build_s = time.perf_counter() - t0
+
+    samples = []
+    for _ in range(queries):
+        crit = {
+            "tech_stack": rng.choice(_BENCH_TECH),
+            "location":   rng.choice(_BENCH_LOC).split(",")[0],
+            "position":   rng.choice(["backend", "engineer", "developer", "ml"]),
+        }
+        t = time.perf_counter()
+        index.search(crit, limit=50)
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return {
+        "records":      records,
+        "build_s":      round(build_s, 2),
+        "query_p50_ms": round(samples[len(samples) // 2], 3),
+        "query_p95_ms": round(samples[int(len(samples) * 0.95)], 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.search_index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("bench", help="synthetic index build + query latency")
+    b.add_argument("--records", type=int, default=1_000_000)
+    b.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+    for k, v in bench(args.records, args.queries).items():
+        print(f"{k:>13}: {v}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
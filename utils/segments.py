@@ -0,0 +1,724 @@
+"""
+utils/segments.py
+──────────────────
+Segmented layout for the JSONL candidate log.
+
+The live log (`CANDIDATE_LOG`) is the *active* segment. Once it grows past
+`SEGMENT_MAX_BYTES` or its first record is older than `SEGMENT_MAX_AGE_HOURS`
+it is sealed: renamed into `SEGMENT_DIR` and given a sidecar index. With
+`SEGMENT_PARTITION` ("day" or "month") the store also seals it before the
+first record of a new period, so every sealed segment lies within one
+time partition and date-range reads skip whole partitions by the
+manifest's min/max timestamps.
+
+    candidates_segments/
+      manifest.json              ordered list of sealed segments + metadata
+      seg-00000001.jsonl         sealed, immutable JSONL
+      seg-00000001.idx           sidecar index (see below)
+      seg-00000002.jsonl.gz      archived segment (gzip, same lines)
+
+Sidecar index — fixed-width little-endian entries, two sorted sections:
+    header    8s magic, Q count
+    by time   count × (q ts_micros, Q offset)       sorted by ts
+    by email  count × (8s email_hash, Q offset)     sorted by hash
+Lookups binary-search the relevant section on disk and seek straight to
+the matching lines, so a sealed segment is never scanned.
+
+Deletion is by tombstone: a line {"tombstone": "<record_id>", ...} hides
+the record it names. `compact()` merges all sealed segments into one and
+drops tombstoned records together with their tombstones (within each
+partition when partitioned). `purge()` erases records by email or age
+(GDPR erasure, retention) by rewriting only the files that hold them.
+
+`archive()` gzips sealed segments whose newest record is older than a
+cutoff. The sidecar index is kept: its offsets address the decompressed
+lines, which `open_segment()` serves transparently (seeking in an archive
+decompresses up to the offset — fine for cold data). Archived segments
+are left out of compaction.
+
+CLI:
+    python -m utils.segments rotate | compact | reindex
+    python -m utils.segments archive [--older-than-days 180]
+"""
+
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import struct
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.log_writer import locked
+
+
+MANIFEST      = "manifest.json"
+_IDX_MAGIC    = b"TSIDX1\0\0"
+_IDX_HEADER   = struct.Struct("<8sQ")
+_TIME_ENTRY   = struct.Struct("<qQ")
+_EMAIL_ENTRY  = struct.Struct("<8sQ")
+ARCHIVE_EXT  = ".gz"
+PARTITIONS    = {"day": 10, "month": 7}      # period → length of its timestamp prefix
+
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+def email_key(email: str) -> bytes:
+    """8-byte hash of the normalised email, as stored in sidecar indexes."""
+    return hashlib.blake2b(email.strip().lower().encode("utf-8"), digest_size=8).digest()
+
+
+def ts_micros(timestamp: str) -> int:
+    """ISO-8601 timestamp → integer microseconds since the epoch (0 if unparsable)."""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1_000_000)
+    except (TypeError, ValueError):
+        return 0
+
+
+def partition_key(timestamp: str, partition: str) -> str:
+    """Period of an ISO-8601 UTC timestamp: "2025-03-14" (day) or "2025-03" (month)."""
+    return (timestamp or "")[:PARTITIONS[partition]]
+
+
+def open_segment(path: str):
+    """Binary file object for a segment, decompressing archived (.gz) ones."""
+    return gzip.open(path, "rb") if path.endswith(ARCHIVE_EXT) else open(path, "rb")
+
+
+def iter_lines(path: str, start: int = 0):
+    """Yield (offset, raw_line) for every complete line from byte `start`."""
+    with open_segment(path) as f:
+        f.seek(start)
+        offset = start
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break                        # line still being written
+            yield offset, raw
+            offset += len(raw)
+
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+
+def read_manifest(seg_dir: str) -> dict:
+    try:
+        with open(os.path.join(seg_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"epoch": 0, "next_seq": 1, "segments": []}
+
+
+def _write_manifest(seg_dir: str, manifest: dict):
+    path = os.path.join(seg_dir, MANIFEST)
+    tmp  = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def sealed_segments(seg_dir: str) -> list[dict]:
+    """Manifest entries of sealed segments, oldest first (each has an absolute `path`)."""
+    return [
+        {**seg, "path": os.path.join(seg_dir, seg["file"])}
+        for seg in read_manifest(seg_dir)["segments"]
+    ]
+
+
+# ── Rotation ──────────────────────────────────────────────────────────────────
+
+def should_rotate(log_file: str, max_bytes: int, max_age_hours: float) -> bool:
+    """True once the active segment is too large or its first record too old."""
+    try:
+        size = os.path.getsize(log_file)
+        if size == 0:
+            return False
+        if size >= max_bytes:
+            return True
+        with open(log_file, "rb") as f:
+            first = json.loads(f.readline())
+    except (OSError, ValueError):
+        return False
+    age_s = time.time() - ts_micros(first.get("timestamp_utc", "")) / 1_000_000
+    return age_s >= max_age_hours * 3600
+
+
+def active_period(log_file: str, partition: str) -> str | None:
+    """Partition key of the active segment's first record (None if empty)."""
+    try:
+        with open(log_file, "rb") as f:
+            first = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return partition_key(first.get("timestamp_utc", ""), partition) or None
+
+
+def rotate(log_file: str, seg_dir: str, before: tuple[str, str] | None = None) -> str | None:
+    """
+    Seal the active segment. The rename happens under the log lock; the
+    sidecar index is built afterwards so appenders are not held up by it.
+
+    `before=(partition, period)` seals only if the active segment starts in
+    an earlier period — rechecked under the lock, so writers racing across
+    a period boundary seal it once.
+
+    Returns:
+        Path of the sealed segment, or None if there was nothing to seal.
+    """
+    os.makedirs(seg_dir, exist_ok=True)
+    with locked(log_file):
+        if not os.path.exists(log_file) or os.path.getsize(log_file) == 0:
+            return None
+        if before is not None:
+            current = active_period(log_file, before[0])
+            if current is None or current >= before[1]:
+                return None
+        manifest = read_manifest(seg_dir)
+        seq  = manifest["next_seq"]
+        name = f"seg-{seq:08d}.jsonl"
+        path = os.path.join(seg_dir, name)
+        os.rename(log_file, path)
+        manifest["next_seq"] = seq + 1
+        manifest["segments"].append({"file": name, "seq": seq, "indexed": False})
+        _write_manifest(seg_dir, manifest)
+
+    meta = build_index(path)
+    _update_entry(seg_dir, log_file, name, {**meta, "indexed": True})
+    return path
+
+
+def _update_entry(seg_dir: str, log_file: str, name: str, fields: dict):
+    with locked(log_file):
+        manifest = read_manifest(seg_dir)
+        for seg in manifest["segments"]:
+            if seg["file"] == name:
+                seg.update(fields)
+        _write_manifest(seg_dir, manifest)
+
+
+# ── Sidecar Index ─────────────────────────────────────────────────────────────
+
+def _index_path(seg_path: str) -> str:
+    """Sidecar of a segment; an archive shares the index of the file it was made from."""
+    if seg_path.endswith(ARCHIVE_EXT):
+        seg_path = seg_path[:-len(ARCHIVE_EXT)]
+    return os.path.splitext(seg_path)[0] + ".idx"
+
+
+def build_index(seg_path: str) -> dict:
+    """
+    Write the sidecar index for a sealed segment.
+
+    Returns:
+        Segment metadata for the manifest: count, bytes, min_ts, max_ts and
+        the record_ids tombstoned by lines in this segment.
+    """
+    by_time, by_email, tombstones = [], [], []
+    for offset, raw in iter_lines(seg_path):
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            continue
+        if "tombstone" in entry:
+            tombstones.append(entry["tombstone"])
+            continue
+        by_time.append((ts_micros(entry.get("timestamp_utc", "")), offset))
+        by_email.append((email_key(entry.get("email", "")), offset))
+    by_time.sort()
+    by_email.sort()
+
+    tmp = _index_path(seg_path) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_IDX_HEADER.pack(_IDX_MAGIC, len(by_time)))
+        f.write(b"".join(_TIME_ENTRY.pack(*e) for e in by_time))
+        f.write(b"".join(_EMAIL_ENTRY.pack(*e) for e in by_email))
+    os.replace(tmp, _index_path(seg_path))
+
+    return {
+        "count":      len(by_time),
+        "bytes":      os.path.getsize(seg_path),
+        "min_ts":     by_time[0][0] if by_time else 0,
+        "max_ts":     by_time[-1][0] if by_time else 0,
+        "tombstones": tombstones,
+    }
+
+
+class _Section:
+    """Random access to one sorted section of an index file, for bisect."""
+
+    def __init__(self, f, start: int, count: int, entry: struct.Struct):
+        self.f, self.start, self.count, self.entry = f, start, count, entry
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i: int) -> tuple:
+        self.f.seek(self.start + i * self.entry.size)
+        return self.entry.unpack(self.f.read(self.entry.size))
+
+
+def _index_offsets(seg_path: str, email: str | None, since_us: int | None,
+                   until_us: int | None) -> list[int] | None:
+    """Byte offsets matching the filters, or None if the index is unusable."""
+    try:
+        f = open(_index_path(seg_path), "rb")
+    except OSError:
+        return None
+    with f:
+        magic, count = _IDX_HEADER.unpack(f.read(_IDX_HEADER.size))
+        if magic != _IDX_MAGIC:
+            return None
+        time_sec  = _Section(f, _IDX_HEADER.size, count, _TIME_ENTRY)
+        email_sec = _Section(f, _IDX_HEADER.size + count * _TIME_ENTRY.size, count, _EMAIL_ENTRY)
+
+        if email is not None:
+            key = email_key(email)
+            i = bisect.bisect_left(email_sec, (key, 0))
+            offsets = []
+            while i < count:
+                h, off = email_sec[i]
+                if h != key:
+                    break
+                offsets.append(off)
+                i += 1
+            return sorted(offsets)
+
+        lo = bisect.bisect_left(time_sec, (since_us, 0)) if since_us is not None else 0
+        offsets = []
+        for i in range(lo, count):
+            ts, off = time_sec[i]
+            if until_us is not None and ts >= until_us:
+                break
+            offsets.append(off)
+        return sorted(offsets)
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────────
+
+def lookup(seg_dir: str, email: str | None = None,
+           since: str | None = None, until: str | None = None) -> tuple[list[dict], set]:
+    """
+    Records in sealed segments matching an email and/or a time range.
+
+    Segments are pruned by their manifest min/max timestamps, then each
+    surviving segment is searched through its sidecar index (unindexed
+    segments fall back to a scan).
+
+    Returns:
+        (records oldest-first, record_ids tombstoned in sealed segments).
+        Records already tombstoned in sealed segments are excluded.
+    """
+    for _ in range(3):
+        try:
+            return _lookup(seg_dir, email, since, until)
+        except FileNotFoundError:
+            continue                          # raced with compaction; re-read manifest
+    return _lookup(seg_dir, email, since, until)
+
+
+def _lookup(seg_dir: str, email: str | None, since: str | None,
+            until: str | None) -> tuple[list[dict], set]:
+    since_us = ts_micros(since) if since is not None else None
+    until_us = ts_micros(until) if until is not None else None
+    segments = sealed_segments(seg_dir)
+    deleted  = {rid for seg in segments for rid in seg.get("tombstones", ())}
+
+    email_norm = email.strip().lower() if email is not None else None
+    found = []
+    for seg in segments:
+        if seg.get("indexed"):
+            if since_us is not None and seg["max_ts"] < since_us:
+                continue
+            if until_us is not None and seg["min_ts"] >= until_us:
+                continue
+            offsets = _index_offsets(seg["path"], email, since_us, until_us)
+        else:
+            offsets = None
+
+        lines = _read_at(seg["path"], offsets) if offsets is not None else (
+            raw for _, raw in iter_lines(seg["path"])
+        )
+        for raw in lines:
+            try:
+                r = json.loads(raw)
+            except ValueError:
+                continue
+            if "tombstone" in r or r.get("record_id") in deleted:
+                continue
+            ts = ts_micros(r.get("timestamp_utc", ""))
+            if email_norm is not None and r.get("email", "").strip().lower() != email_norm:
+                continue                      # hash collision or unindexed scan
+            if since_us is not None and ts < since_us:
+                continue
+            if until_us is not None and ts >= until_us:
+                continue
+            found.append(r)
+    return found, deleted
+
+
+def _read_at(path: str, offsets: list[int]):
+    if path.endswith(ARCHIVE_EXT):
+        offsets = sorted(offsets)             # gzip seeks backwards by restarting the stream
+    with open_segment(path) as f:
+        for off in offsets:
+            f.seek(off)
+            yield f.readline()
+
+
+# ── Compaction ────────────────────────────────────────────────────────────────
+
+def _segment_period(seg: dict, partition: str | None) -> str | None:
+    """Partition of an indexed segment, from its oldest record (None: unknown / unpartitioned)."""
+    if partition is None or not seg.get("indexed") or not seg.get("count"):
+        return None
+    first = datetime.fromtimestamp(seg["min_ts"] / 1_000_000, tz=timezone.utc)
+    return partition_key(first.isoformat(), partition)
+
+
+def compact(seg_dir: str, log_file: str, partition: str | None = None) -> dict:
+    """
+    Merge the sealed segments, dropping tombstoned records and the
+    tombstones themselves. Tombstones in the active segment are honoured
+    too (but stay in place until the active segment is sealed).
+
+    With a `partition` ("day" / "month") segments are merged per period, so
+    the output keeps one time partition per file. Archived segments are
+    left alone; a tombstone is dropped only once its record is gone, so
+    tombstones for archived records survive the merge.
+
+    Readers follow the manifest, which is swapped atomically; the merged
+    inputs are deleted only afterwards. Bumps the manifest epoch so
+    in-process caches know sealed contents changed.
+
+    Returns:
+        {"segments_merged", "records_kept", "records_dropped"}
+    """
+    report = {"segments_merged": 0, "records_kept": 0, "records_dropped": 0}
+    with locked(os.path.join(seg_dir, "compaction")):
+        everything = sealed_segments(seg_dir)
+        segments = [seg for seg in everything if not seg.get("archived")]
+        if not segments:
+            return report
+        any_archived = len(segments) < len(everything)
+
+        deleted = set()
+        for seg in everything:
+            deleted.update(seg["tombstones"] if seg.get("indexed") else scan_tombstones(seg["path"]))
+        if os.path.exists(log_file):
+            deleted.update(scan_tombstones(log_file))
+
+        groups: dict = {}
+        for seg in segments:
+            groups.setdefault(_segment_period(seg, partition), []).append(seg)
+
+        dropped_ids, outputs = set(), {}
+        for group in groups.values():
+            last = group[-1]["seq"]
+            name = f"seg-{last:08d}.c{int(time.time())}.jsonl"
+            path = os.path.join(seg_dir, name)
+            with open(path + ".tmp", "wb") as out:
+                for seg in group:
+                    for _, raw in iter_lines(seg["path"]):
+                        try:
+                            r = json.loads(raw)
+                        except ValueError:
+                            report["records_dropped"] += 1
+                            continue
+                        if "tombstone" in r:
+                            if any_archived and r["tombstone"] not in dropped_ids:
+                                out.write(raw)          # its record may sit in an archive
+                            else:
+                                report["records_dropped"] += 1
+                            continue
+                        if r.get("record_id") in deleted:
+                            dropped_ids.add(r["record_id"])
+                            report["records_dropped"] += 1
+                            continue
+                        out.write(raw)
+                        report["records_kept"] += 1
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(path + ".tmp", path)
+            outputs[group[0]["file"]] = {"file": name, "seq": last, "indexed": True,
+                                         **build_index(path)}
+
+        merged = {seg["file"] for seg in segments}
+        with locked(log_file):
+            manifest = read_manifest(seg_dir)
+            manifest["segments"] = [outputs.get(s["file"], s) for s in manifest["segments"]
+                                    if s["file"] not in merged or s["file"] in outputs]
+            manifest["epoch"] = manifest.get("epoch", 0) + 1
+            _write_manifest(seg_dir, manifest)
+
+        for seg in segments:
+            for p in (seg["path"], _index_path(seg["path"])):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+
+    report["segments_merged"] = len(segments)
+    return report
+
+
+# ── Archive ───────────────────────────────────────────────────────────────────
+
+def archive(seg_dir: str, log_file: str, older_than_days: float) -> dict:
+    """
+    Gzip every sealed, indexed segment whose newest record is older than
+    `older_than_days`. The archive replaces the segment in the manifest
+    (same seq, "archived": true) and keeps its sidecar index, whose
+    offsets address the decompressed lines. Bumps the manifest epoch.
+
+    Returns:
+        {"segments_archived", "bytes_before", "bytes_after"}
+    """
+    cutoff = ts_micros((datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat())
+    report = {"segments_archived": 0, "bytes_before": 0, "bytes_after": 0}
+    with locked(os.path.join(seg_dir, "compaction")):
+        done = {}
+        for seg in sealed_segments(seg_dir):
+            if seg.get("archived") or not seg.get("indexed") or seg["max_ts"] >= cutoff:
+                continue
+            name = seg["file"] + ARCHIVE_EXT
+            path = os.path.join(seg_dir, name)
+            try:
+                with open(seg["path"], "rb") as src, open(path + ".tmp", "wb") as raw_out:
+                    with gzip.GzipFile(filename="", fileobj=raw_out, mode="wb", mtime=0) as out:
+                        shutil.copyfileobj(src, out, 1024 * 1024)
+                    raw_out.flush()
+                    os.fsync(raw_out.fileno())
+            except FileNotFoundError:
+                continue
+            os.replace(path + ".tmp", path)
+            size = os.path.getsize(path)
+            done[seg["file"]] = (seg["path"], {"file": name, "archived": True, "bytes": size})
+            report["segments_archived"] += 1
+            report["bytes_before"] += seg.get("bytes", 0)
+            report["bytes_after"] += size
+
+        if not done:
+            return report
+        with locked(log_file):
+            manifest = read_manifest(seg_dir)
+            for seg in manifest["segments"]:
+                if seg["file"] in done:
+                    seg.update(done[seg["file"]][1])
+            manifest["epoch"] = manifest.get("epoch", 0) + 1
+            _write_manifest(seg_dir, manifest)
+
+        for old_path, _ in done.values():
+            try:
+                os.remove(old_path)          # the .idx stays: the archive shares it
+            except OSError:
+                pass
+    return report
+
+
+# ── Purge ─────────────────────────────────────────────────────────────────────
+
+def purge(seg_dir: str, log_file: str, emails=(), before: str | None = None) -> dict:
+    """
+    Erase every record whose email is in `emails` or whose timestamp is
+    older than `before`, streaming each affected file through a temp file
+    (constant memory) and swapping it in atomically.
+
+      - Sealed segments that cannot hold a match (sidecar email index,
+        manifest min_ts) are left alone; the others are rewritten under a
+        new name and the manifest is updated with a bumped epoch.
+      - The active log is copied without the lock, then the lock is taken
+        only to copy lines appended meanwhile and rename over the log, so
+        concurrent appenders wait for the tail copy, not the whole file.
+        If the log was rotated during the copy, the pass is repeated.
+
+    Tombstones carrying an erased email's hash are dropped as well.
+
+    Returns:
+        {"removed": records erased, "files_rewritten": n,
+         "transcripts": transcript pointers of the erased records}
+    """
+    keys   = {e.strip().lower() for e in emails if e and e.strip()}
+    hashes = {email_key(e).hex() for e in keys}
+    before_us = ts_micros(before) if before else None
+
+    def doomed(entry: dict) -> bool:
+        if "tombstone" in entry:
+            return entry.get("email_key") in hashes
+        if entry.get("email", "").strip().lower() in keys:
+            return True
+        ts = ts_micros(entry.get("timestamp_utc", ""))
+        return before_us is not None and 0 < ts < before_us
+
+    report = {"removed": 0, "files_rewritten": 0, "transcripts": []}
+    if not keys and before_us is None:
+        return report
+    os.makedirs(seg_dir, exist_ok=True)       # nothing sealed yet: only the active log
+    with locked(os.path.join(seg_dir, "compaction")):
+        done = set()
+        for _ in range(3):
+            for seg in sealed_segments(seg_dir):
+                if seg["file"] in done:
+                    continue
+                done.add(seg["file"])
+                if _may_hold(seg, keys, before_us):
+                    _purge_sealed(seg_dir, log_file, seg, doomed, report)
+            if _purge_active(log_file, doomed, report):
+                break                         # else: rotated mid-copy, purge the new segment
+    return report
+
+
+def _may_hold(seg: dict, keys: set, before_us: int | None) -> bool:
+    if not seg.get("indexed"):
+        return True
+    if before_us is not None and seg["min_ts"] < before_us:
+        return True
+    return any(_index_offsets(seg["path"], e, None, None) for e in keys)
+
+
+def _filter_lines(f, out, doomed, erased: dict, start: int = 0) -> int:
+    """
+    Copy complete lines of `f` from byte `start` to `out`, minus doomed
+    ones, counting into `erased`. Returns the offset after the last line.
+    """
+    f.seek(start)
+    pos = start
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            break
+        pos += len(raw)
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            out.write(raw)
+            continue
+        if not doomed(entry):
+            out.write(raw)
+            continue
+        erased["dropped"] += 1
+        if "tombstone" not in entry:
+            erased["removed"] += 1
+            if entry.get("transcript"):
+                erased["transcripts"].append(entry["transcript"])
+    return pos
+
+
+def _commit_erased(report: dict, erased: dict):
+    report["removed"] += erased["removed"]
+    report["files_rewritten"] += 1
+    report["transcripts"] += erased["transcripts"]
+
+
+def _purge_sealed(seg_dir: str, log_file: str, seg: dict, doomed, report: dict):
+    erased = {"removed": 0, "dropped": 0, "transcripts": []}
+    archived = seg.get("archived", False)
+    name = f"seg-{seg['seq']:08d}.p{time.time_ns()}.jsonl" + (ARCHIVE_EXT if archived else "")
+    path = os.path.join(seg_dir, name)
+    try:
+        with open_segment(seg["path"]) as f, open(path + ".tmp", "wb") as raw_out:
+            out = gzip.GzipFile(fileobj=raw_out, mode="wb") if archived else raw_out
+            _filter_lines(f, out, doomed, erased)
+            if archived:
+                out.close()                   # writes the gzip trailer; raw_out stays open
+            raw_out.flush()
+            os.fsync(raw_out.fileno())
+    except FileNotFoundError:
+        return
+    if not erased["dropped"]:
+        os.remove(path + ".tmp")
+        return
+    os.replace(path + ".tmp", path)
+    meta = build_index(path)
+    with locked(log_file):
+        manifest = read_manifest(seg_dir)
+        manifest["segments"] = [
+            {"file": name, "seq": s["seq"], "indexed": True, "archived": archived, **meta}
+            if s["file"] == seg["file"] else s
+            for s in manifest["segments"]
+        ]
+        manifest["epoch"] = manifest.get("epoch", 0) + 1
+        _write_manifest(seg_dir, manifest)
+    for p in (seg["path"], _index_path(seg["path"])):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+    _commit_erased(report, erased)
+
+
+def _purge_active(log_file: str, doomed, report: dict) -> bool:
+    """Returns False if the log was rotated during the copy (nothing swapped)."""
+    erased = {"removed": 0, "dropped": 0, "transcripts": []}
+    tmp = f"{log_file}.purge.tmp"
+    try:
+        f = open(log_file, "rb")
+    except FileNotFoundError:
+        return True
+    with f, open(tmp, "wb") as out:
+        ino = os.fstat(f.fileno()).st_ino
+        pos = _filter_lines(f, out, doomed, erased)
+        with locked(log_file):
+            try:
+                rotated = os.stat(log_file).st_ino != ino
+            except FileNotFoundError:
+                rotated = True
+            if not rotated:
+                _filter_lines(f, out, doomed, erased, pos)   # lines appended during the copy
+                if erased["dropped"]:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    os.replace(tmp, log_file)
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    if rotated:
+        return False
+    if erased["dropped"]:
+        _commit_erased(report, erased)
+    return True
+
+
+def scan_tombstones(path: str) -> list[str]:
+    """record_ids tombstoned by lines in `path` (skips decoding ordinary records)."""
+    ids = []
+    try:
+        for _, raw in iter_lines(path):
+            if b'"tombstone"' in raw:
+                try:
+                    ids.append(json.loads(raw)["tombstone"])
+                except (ValueError, KeyError):
+                    continue
+    except OSError:
+        pass
+    return ids
+
+
+def main(argv: list[str] | None = None) -> int:
+    from config import CANDIDATE_LOG, SEGMENT_DIR, SEGMENT_PARTITION, SEGMENT_ARCHIVE_DAYS
+
+    parser = argparse.ArgumentParser(prog="python -m utils.segments")
+    parser.add_argument("command", choices=["rotate", "compact", "reindex", "archive"])
+    parser.add_argument("--log", default=CANDIDATE_LOG)
+    parser.add_argument("--dir", default=SEGMENT_DIR)
+    parser.add_argument("--older-than-days", type=float, default=SEGMENT_ARCHIVE_DAYS,
+                        help="archive: gzip segments whose newest record is older than this")
+    args = parser.parse_args(argv)
+
+    if args.command == "rotate":
+        path = rotate(args.log, args.dir)
+        print(f"Sealed {path}" if path else "Active segment is empty — nothing to seal")
+    elif args.command == "compact":
+        print(compact(args.dir, args.log, SEGMENT_PARTITION))
+    elif args.command == "archive":
+        print(archive(args.dir, args.log, args.older_than_days))
+    else:
+        for seg in sealed_segments(args.dir):
+            _update_entry(args.dir, args.log, seg["file"], {**build_index(seg["path"]), "indexed": True})
+            print(f"Indexed {seg['file']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,360 @@
+"""
+utils/sqlite_store.py
+──────────────────────
+SQLite backend for candidate screening records.
+
+The database runs in WAL mode so the Streamlit worker that is saving a
+screening never blocks readers (sidebar history, recruiter queries).
+Hot filter columns are stored as real columns with indexes; the full record
+is kept as JSON so new record fields need no schema migration.
+
+One-shot migration from the JSONL store (active log and sealed segments):
+    python -m utils.sqlite_store migrate --log candidates_log.json --db candidates.db
+                                         [--segments candidates_segments]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp_utc       TEXT NOT NULL,
+    email               TEXT NOT NULL DEFAULT '',
+    position            TEXT NOT NULL DEFAULT '',
+    record              TEXT NOT NULL,
+    UNIQUE (timestamp_utc, email)
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_timestamp ON candidates (timestamp_utc);
+CREATE INDEX IF NOT EXISTS idx_candidates_email     ON candidates (email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_candidates_position  ON candidates (position COLLATE NOCASE);
+"""
+
+_INSERT_SQL = (
+    "INSERT OR IGNORE INTO candidates (timestamp_utc, email, position, record) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+_MIGRATE_BATCH = 1000
+
+_local = threading.local()
+
+
+# ── Connection Management ─────────────────────────────────────────────────────
+
+def get_connection(db_file: str) -> sqlite3.Connection:
+    """
+    Return this thread's connection to `db_file`, opening it on first use.
+
+    sqlite3 connections must not be shared across threads, and Streamlit
+    serves each session from its own thread, so connections are cached
+    per thread and per database path.
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    key = os.path.abspath(db_file)
+    conn = conns.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_file, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoint, safe under WAL
+        conn.executescript(_SCHEMA)
+        conns[key] = conn
+    return conn
+
+
+def _row_values(record: dict) -> tuple:
+    return (
+        record.get("timestamp_utc", ""),
+        record.get("email", ""),
+        record.get("position", ""),
+        json.dumps(record, ensure_ascii=False),
+    )
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+def insert_record(db_file: str, record: dict) -> bool:
+    """Insert one record. Returns True on success, False on a database error."""
+    try:
+        conn = get_connection(db_file)
+        with conn:
+            conn.execute(_INSERT_SQL, _row_values(record))
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def upsert_record(db_file: str, record: dict, merge) -> bool:
+    """
+    Replace the current record for `record`'s email (case-insensitive).
+
+    Runs as one IMMEDIATE transaction, so concurrent upserts for the same
+    email serialise. `merge(current, record)` builds the row to store from
+    the current record (or None) and returns None if nothing is to be written.
+    """
+    try:
+        conn = get_connection(db_file)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, record FROM candidates WHERE email = ? COLLATE NOCASE "
+                "ORDER BY id DESC LIMIT 1",
+                (record.get("email", "").strip(),),
+            ).fetchone()
+            merged = merge(json.loads(row[1]) if row else None, record)
+            if merged is None:
+                return True
+            if row:
+                conn.execute("DELETE FROM candidates WHERE id = ?", (row[0],))
+            conn.execute(_INSERT_SQL, _row_values(merged))
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def delete_record(db_file: str, record_id: str) -> bool:
+    """Delete the record with the given `record_id`. Returns True if one was removed."""
+    try:
+        conn = get_connection(db_file)
+        with conn:
+            cur = conn.execute(
+                "DELETE FROM candidates WHERE json_extract(record, '$.record_id') = ?",
+                (record_id,),
+            )
+        return cur.rowcount > 0
+    except sqlite3.Error:
+        return False
+
+
+def purge_records(db_file: str, emails=(), before: str | None = None) -> dict:
+    """
+    Delete records by email (case-insensitive) or timestamp older than
+    `before`, with secure_delete on and a WAL checkpoint afterwards so the
+    erased rows do not linger in free pages or the WAL. A purge that
+    removes rows bumps `PRAGMA user_version` (the purge generation), which
+    tells in-memory mirrors to drop what they hold.
+
+    Returns:
+        {"removed": n, "files_rewritten": 0 or 1, "transcripts": pointers}
+    """
+    clauses, params = [], []
+    emails = [e.strip() for e in emails if e and e.strip()]
+    if emails:
+        clauses.append(f"email COLLATE NOCASE IN ({', '.join('?' * len(emails))})")
+        params += emails
+    if before:
+        clauses.append("timestamp_utc < ?")
+        params.append(before)
+    report = {"removed": 0, "files_rewritten": 0, "transcripts": []}
+    if not clauses:
+        return report
+    where = " OR ".join(clauses)
+    try:
+        conn = get_connection(db_file)
+        previous = conn.execute("PRAGMA secure_delete").fetchone()[0]
+        conn.execute("PRAGMA secure_delete=ON")
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for (pointer,) in conn.execute(
+                    f"SELECT json_extract(record, '$.transcript') FROM candidates WHERE ({where}) "
+                    "AND json_extract(record, '$.transcript') IS NOT NULL", params,
+                ):
+                    report["transcripts"].append(json.loads(pointer))
+                report["removed"] = conn.execute(f"DELETE FROM candidates WHERE {where}", params).rowcount
+                if report["removed"]:
+                    generation = conn.execute("PRAGMA user_version").fetchone()[0]
+                    conn.execute(f"PRAGMA user_version = {generation + 1}")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.execute(f"PRAGMA secure_delete={previous}")   # the connection is cached for other writes
+    except sqlite3.Error:
+        return report
+    report["files_rewritten"] = int(report["removed"] > 0)
+    return report
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def load_records(db_file: str) -> list[dict]:
+    """All records, most recent first."""
+    return query_records(db_file)
+
+
+def query_records(
+    db_file: str,
+    email: str | None = None,
+    position: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Indexed lookup, most recent first.
+
+    Args:
+        email:    Exact match, case-insensitive.
+        position: Exact match, case-insensitive.
+        since:    ISO-8601 UTC timestamp, inclusive lower bound.
+        until:    ISO-8601 UTC timestamp, exclusive upper bound.
+        limit:    Maximum number of records to return.
+    """
+    clauses, params = [], []
+    if email is not None:
+        clauses.append("email = ? COLLATE NOCASE")
+        params.append(email.strip())
+    if position is not None:
+        clauses.append("position = ? COLLATE NOCASE")
+        params.append(position.strip())
+    if since is not None:
+        clauses.append("timestamp_utc >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp_utc < ?")
+        params.append(until)
+
+    sql = "SELECT record FROM candidates"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY timestamp_utc DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    try:
+        rows = get_connection(db_file).execute(sql, params).fetchall()
+    except sqlite3.Error:
+        return []
+    return [json.loads(r[0]) for r in rows]
+
+
+def iter_records(db_file: str, since: str | None = None, until: str | None = None):
+    """
+    Stream every record in insertion order without loading them all,
+    optionally bounded by `since` (inclusive) / `until` (exclusive).
+    """
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("timestamp_utc >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp_utc < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    try:
+        cur = get_connection(db_file).execute(
+            f"SELECT record FROM candidates {where}ORDER BY id", params)
+        for (raw,) in cur:
+            yield json.loads(raw)
+    except sqlite3.Error:
+        return
+
+
+def records_since(db_file: str, after_id: int, held: int):
+    """
+    Changes since an incremental reader's last call, from one read snapshot:
+    (last row id seen, new (row id, record) pairs, ids of the rows up to
+    `after_id` that still exist — None if all `held` of them do — and the
+    purge generation, see purge_records()). None on a database error.
+    """
+    try:
+        conn = get_connection(db_file)
+        with conn:
+            conn.execute("BEGIN")
+            rows = conn.execute(
+                "SELECT id, record FROM candidates WHERE id > ? ORDER BY id", (after_id,)
+            ).fetchall()
+            kept = None
+            if conn.execute("SELECT COUNT(*) FROM candidates WHERE id <= ?", (after_id,)).fetchone()[0] != held:
+                kept = {row_id for (row_id,) in conn.execute(
+                    "SELECT id FROM candidates WHERE id <= ?", (after_id,))}
+            generation = conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.Error:
+        return None
+    last = rows[-1][0] if rows else after_id
+    return last, [(row_id, json.loads(raw)) for row_id, raw in rows], kept, generation
+
+
+def rows_after(db_file: str, after_id: int, limit: int) -> list[tuple[int, dict]]:
+    """Up to `limit` (row id, record) pairs inserted after row `after_id`, oldest first."""
+    try:
+        rows = get_connection(db_file).execute(
+            "SELECT id, record FROM candidates WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+        ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [(row_id, json.loads(raw)) for row_id, raw in rows]
+
+
+def last_row_id(db_file: str) -> int:
+    try:
+        return get_connection(db_file).execute("SELECT COALESCE(MAX(id), 0) FROM candidates").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+
+
+def count_records(db_file: str) -> int:
+    try:
+        return get_connection(db_file).execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+
+
+# ── JSONL Migration ───────────────────────────────────────────────────────────
+
+def migrate_from_jsonl(log_file: str, db_file: str, seg_dir: str, email_index: str) -> int:
+    """
+    Copy every live record of a JSONL store into the database.
+
+    Reads through JsonlStore.scan(), so sealed segments are included and
+    tombstones (deletes, purges, superseded upserts) are honoured. Streams
+    in batches, so memory stays flat regardless of log size. Records
+    already present (same timestamp and email) are skipped, which makes the
+    migration safe to re-run after an interruption.
+
+    Returns:
+        Number of records newly inserted.
+    """
+    from utils.stores import JsonlStore          # stores imports this module
+
+    store = JsonlStore(log_file, seg_dir, email_index)
+    conn = get_connection(db_file)
+    before = count_records(db_file)
+    batch = []
+    with conn:
+        for record in store.scan():
+            batch.append(_row_values(record))
+            if len(batch) >= _MIGRATE_BATCH:
+                conn.executemany(_INSERT_SQL, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(_INSERT_SQL, batch)
+    return count_records(db_file) - before
+
+
+def main(argv: list[str] | None = None) -> int:
+    from config import CANDIDATE_LOG, CANDIDATE_DB, EMAIL_INDEX_FILE, SEGMENT_DIR
+
+    parser = argparse.ArgumentParser(prog="python -m utils.sqlite_store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="import a JSONL candidate log into SQLite")
+    mig.add_argument("--log", default=CANDIDATE_LOG)
+    mig.add_argument("--db",  default=CANDIDATE_DB)
+    mig.add_argument("--segments", default=SEGMENT_DIR, help="sealed segment directory")
+    mig.add_argument("--email-index", default=EMAIL_INDEX_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        n = migrate_from_jsonl(args.log, args.db, args.segments, args.email_index)
+        print(f"Migrated {n} record(s) from {args.log} → {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
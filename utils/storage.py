@@ -3,37 +3,83 @@ utils/storage.py
 ─────────────────
 Simulated local data persistence for candidate screening records.
 
-In production, replace the JSON file write with a call to a secure,
-encrypted database (e.g., PostgreSQL with RLS, or a GDPR-compliant SaaS).
+Records go to a `CandidateStore` (utils/stores.py) selected by
+`STORAGE_BACKEND` in config.py:
+  - "jsonl"  — append-only JSON-lines log (default, zero setup); appends
+               go through a locked group-commit writer (utils/log_writer.py)
+               so several worker processes can share one log, and the log
+               is rotated into indexed segments (utils/segments.py)
+  - "sqlite" — SQLite in WAL mode with indexes on timestamp, email and
+               position (see utils/sqlite_store.py, incl. JSONL migrator)
+  - "memory" — process-local, nothing persisted (tests and demos)
+
+This module is the stable API on top: transcripts, revisions, background
+persistence and the derived search / aggregate views. Compare backends
+with `python -m utils.stores bench`.
+
+Interview transcripts are kept out of the records: they are compressed
+into a separate blob store (utils/transcripts.py) and each record holds
+only a pointer, resolved by load_transcript() when a transcript is opened.
+
+Completed screenings are pushed to `WEBHOOK_URL` (the ATS) by a
+background dispatcher that follows the store's change stream, so the
+record itself is the outbox entry (utils/webhook.py).
 
 Privacy notes:
-  - No full interview answers are stored.
+  - Interview answers live in the transcript store, never in the log. A
+    background save journals them with its record until the record is
+    stored (sealed too, with `PII_ENCRYPTION`).
   - The JSON log is excluded from version control via .gitignore.
-  - Phone and email are stored as-is for demo purposes; in production
-    these should be encrypted at rest.
+  - With `PII_ENCRYPTION`, name, email and phone are sealed with AES-GCM
+    before a record reaches the store and `email` is a keyed hash
+    (utils/pii.py); every read below returns decrypted records. Transcript
+    blobs are sealed with the same key. Otherwise they are stored as-is.
 """
 
+import base64
 import json
 import os
-from datetime import datetime, timezone
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
 
+from config import (
+    STORAGE_BACKEND, CANDIDATE_LOG, CANDIDATE_DB, LOG_DURABILITY, LOG_COMMIT_WINDOW,
+    PERSIST_QUEUE_SIZE, PERSIST_JOURNAL_DIR, PERSIST_JOURNAL_FSYNC,
+    SEGMENT_DIR, SEGMENT_MAX_BYTES, SEGMENT_MAX_AGE_HOURS, SEGMENT_PARTITION,
+    UPSERT_BY_EMAIL, EMAIL_INDEX_FILE, REVISION_HISTORY_LIMIT, TRANSCRIPT_DIR,
+    PII_ENCRYPTION, COUNTERS_DB, STREAM_OFFSET_DIR,
+    WEBHOOK_URL, WEBHOOK_DB, WEBHOOK_BATCH, WEBHOOK_TIMEOUT, WEBHOOK_MAX_BACKOFF,
+)
+from utils.columnar import ColumnTable
+from utils.counters import Counters
+from utils.export import write_export
+from utils.persist_queue import BackgroundPersister
+from utils.pii import get_cipher
+from utils.search_index import CandidateIndex
+from utils.stores import BACKENDS, CandidateStore, JsonlStore, MemoryStore, SqliteStore
+from utils.transcripts import TranscriptStore
+from utils.webhook import WebhookDispatcher
 
-LOG_FILE = "candidates_log.json"
 
+_REVISION_META = ("record_id", "timestamp_utc", "revision", "history")
 
-def save_candidate(candidate: dict, answers: list[dict]) -> bool:
+
+def build_record(candidate: dict, answers: list[dict]) -> dict:
     """
-    Append a candidate screening record to the local JSON log.
+    Build the stored screening record for a candidate.
 
     Args:
         candidate: Dict with keys: name, email, phone, experience,
                    position, location, tech_stack.
-        answers:   List of {"question": str, "answered": bool} dicts.
-
-    Returns:
-        True if saved successfully, False otherwise.
+        answers:   List of {"question": str, "answer": str} dicts. They ride
+                   along as `answers` until persist_record() moves them to
+                   the transcript store.
     """
-    record = {
+    return {
+        "record_id":     uuid.uuid4().hex,
         "timestamp_utc": datetime.now(timezone.utc).isoformat(),
         "name":          candidate.get("name", ""),
         "email":         candidate.get("email", ""),
@@ -44,35 +90,699 @@ def save_candidate(candidate: dict, answers: list[dict]) -> bool:
         "tech_stack":    candidate.get("tech_stack", ""),
         "questions_asked": len(answers),
         "screening_complete": True,
+        "answers":       list(answers),
     }
 
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
-        return True
-    except IOError:
+
+def save_candidate(candidate: dict, answers: list[dict]) -> bool:
+    """
+    Append a candidate screening record to the configured store.
+
+    With `UPSERT_BY_EMAIL` the record replaces the candidate's current one
+    instead (see persist_record()).
+
+    Returns:
+        True if saved successfully, False otherwise.
+    """
+    return persist_record(build_record(candidate, answers))
+
+
+def save_candidate_async(candidate: dict, answers: list[dict]) -> bool:
+    """
+    Acknowledge a screening record without waiting on the store.
+
+    The record is journaled locally, answers included, and written by a
+    background thread (see utils/persist_queue.py), which also moves the
+    answers to the transcript store: the caller waits on the journal
+    append only. Falls back to a synchronous save if the journal itself
+    cannot be written.
+
+    Returns:
+        True if the record is journaled or saved, False otherwise.
+    """
+    record = build_record(candidate, answers)
+    return _persister().submit(record) or persist_record(record)
+
+
+def persist_record(record: dict) -> bool:
+    """
+    Write an already-built record to the configured store (blocking).
+
+    With `UPSERT_BY_EMAIL` the candidate's current record (same normalised
+    email) is superseded: the new record carries `revision` and a `history`
+    of field-level diffs, and the old one is tombstoned in the same write.
+    Re-persisting a record that is already current is a no-op, so replays
+    from the background journal do not create revisions.
+
+    A record's `answers` are first written to the transcript store and
+    replaced by a `transcript` pointer. Once the record is stored the
+    dashboard counters are bumped (and the superseded revision uncounted).
+    The webhook dispatcher is started first, so it picks the record up.
+    """
+    _webhook()
+    record = _offload_answers(record)
+    if record is None:
+        return False
+    cipher = get_cipher() if PII_ENCRYPTION else None
+    if UPSERT_BY_EMAIL:
+        written, replaced = [], []
+
+        def merge(current, _):
+            if current is not None and cipher is not None:
+                current = cipher.decrypt_record(current)
+            merged = _next_revision(current, record)
+            if merged is None:
+                return None
+            written.append(merged)
+            if current is not None:
+                replaced.append(current)
+            return cipher.encrypt_record(merged) if cipher is not None else merged
+
+        ok = get_store().upsert(cipher.encrypt_record(record) if cipher is not None else record, merge)
+    else:
+        written, replaced = [record], []
+        ok = get_store().append(cipher.encrypt_record(record) if cipher is not None else record)
+    if ok:
+        _counters.apply(written, replaced)
+    return ok
+
+
+def _offload_answers(record: dict) -> dict | None:
+    """`record` with its `answers` moved to the transcript store (None if that write fails)."""
+    if "answers" not in record:
+        return record
+    record = dict(record)
+    answers = record.pop("answers")
+    if answers:
+        try:
+            record["transcript"] = _transcript_store.put(answers, record["record_id"])
+        except OSError:
+            return None
+    return record
+
+
+def _seal_journal(record: dict) -> dict:
+    """Journal form of a record: PII fields and answers sealed with `PII_ENCRYPTION`."""
+    if not PII_ENCRYPTION:
+        return record
+    cipher = get_cipher()
+    sealed = cipher.encrypt_record({k: v for k, v in record.items() if k != "answers"})
+    if "answers" in record:
+        answers = json.dumps(record["answers"], ensure_ascii=False).encode("utf-8")
+        sealed["answers"] = base64.b64encode(
+            cipher.seal(answers, "answers:" + record["record_id"])).decode("ascii")
+    return sealed
+
+
+def _open_journal(record: dict) -> dict:
+    if "pii" not in record:
+        return record
+    cipher = get_cipher()
+    opened = dict(cipher.decrypt_record(record))
+    if isinstance(opened.get("answers"), str):
+        answers = cipher.unseal(base64.b64decode(opened["answers"]), "answers:" + opened["record_id"])
+        opened["answers"] = json.loads(answers)
+    return opened
+
+
+def delete_candidate(record_id: str) -> bool:
+    """
+    Delete one record by `record_id`.
+
+    The JSONL backend appends a tombstone, which hides the record from every
+    read immediately; `python -m utils.segments compact` removes it from disk.
+
+    Returns:
+        True if the deletion was recorded, False otherwise.
+    """
+    chunks, deleted = get_store().record_chunks()
+    record = None
+    if record_id not in deleted:
+        record = next((r for chunk in reversed(chunks) for r in reversed(chunk)
+                       if r.get("record_id") == record_id), None)
+    if not get_store().delete(record_id):
         return False
+    if record is not None:
+        _counters.apply(removed=[record])
+    return True
+
+
+def purge_candidates(emails=(), older_than_days: float | None = None) -> dict:
+    """
+    GDPR erasure and retention purge.
+
+    Removes every record whose email is in `emails` (case-insensitive) or
+    that is older than `older_than_days`, and zeroes their transcripts.
+    The JSONL backend streams each affected file through a temp file and
+    swaps it in atomically while appends continue (see segments.purge()).
+
+    Saves still in this process's background journal, and journals left
+    by dead processes, are written to the store first, so the purge
+    reaches them and no journal keeps a copy. (A save still pending in
+    another running process lands after the purge.) The resume cache and
+    the webhook dead letters hold no candidate details to purge.
+
+    Returns:
+        {"removed", "files_rewritten", "transcripts_erased"}
+
+    Raises:
+        RuntimeError: if pending saves could not be written to the store;
+                      nothing is purged then.
+    """
+    if not _persister().flush():
+        raise RuntimeError("pending background saves could not be written to the store; "
+                           "purge not run")
+    before = None
+    if older_than_days is not None:
+        before = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    emails = [e for e in emails if e and e.strip()]
+    if PII_ENCRYPTION:
+        cipher = get_cipher()                     # plaintext too: records from before encryption
+        emails += [cipher.email_token(e) for e in emails]
+    doomed = _purge_targets(emails, before)
+    report = get_store().purge(emails, before)
+    pointers = report.pop("transcripts")
+    report["transcripts_erased"] = _transcript_store.erase(pointers)
+    if report["removed"]:
+        _counters.apply(removed=doomed)
+    return report
+
+
+def _purge_targets(emails: list[str], before: str | None) -> list[dict]:
+    """
+    Live records a purge of `emails` / `before` will remove, found through
+    the email index and the time-bounded scan, so the counters can drop
+    just those instead of recounting the store.
+    """
+    store = get_store()
+    found = {}
+    for email in emails:
+        for r in store.query(email=email):
+            found[r.get("record_id")] = r
+    if before is not None:
+        for r in store.scan(until=before):
+            found[r.get("record_id")] = r
+    return list(found.values())
+
+
+def _decrypt(records: list[dict]) -> list[dict]:
+    """Batch-decrypt records read from the store (no-op without `PII_ENCRYPTION`)."""
+    return get_cipher().decrypt_records(records) if PII_ENCRYPTION else records
+
+
+def _next_revision(current: dict | None, record: dict) -> dict | None:
+    """
+    `record` as the next revision after `current`, or None if `record` is
+    already the current one. History entries keep only the fields that
+    changed, with their previous values.
+    """
+    if current is None:
+        return {**record, "revision": 1}
+    if current.get("record_id") == record.get("record_id"):
+        return None
+    changed = {
+        k: v for k, v in current.items()
+        if k not in _REVISION_META and record.get(k) != v
+    }
+    entry = {
+        "revision":      current.get("revision", 1),
+        "record_id":     current.get("record_id"),
+        "timestamp_utc": current.get("timestamp_utc"),
+        "changed":       changed,
+    }
+    history = (current.get("history", []) + [entry])[-REVISION_HISTORY_LIMIT:]
+    return {**record, "revision": entry["revision"] + 1, "history": history}
+
+
+def load_transcript(record: dict) -> list[dict]:
+    """
+    The record's interview transcript ({"question", "answer"} dicts),
+    decompressed (and decrypted) on demand. Empty if the record has none.
+    """
+    pointer = record.get("transcript")
+    if not pointer:
+        return []
+    return _transcript_store.get(pointer, record.get("record_id", ""))
+
+
+def get_candidate_by_email(email: str) -> dict | None:
+    """
+    Current record for `email` (case-insensitive), or None.
+
+    The JSONL backend answers from the persistent hash index
+    (utils/email_index.py): O(1) probes plus one line read, whatever the
+    size of the log. Without `UPSERT_BY_EMAIL` this is the newest record.
+    """
+    if PII_ENCRYPTION:
+        cipher = get_cipher()
+        record = get_store().get_by_email(cipher.email_token(email))
+        return cipher.decrypt_record(record) if record else None
+    return get_store().get_by_email(email)
+
+
+def count_candidates(group_by: str = "position", limit: int | None = None) -> dict:
+    """
+    Precomputed dashboard counts (utils/counters.py): one indexed read of
+    the counter sidecar, whatever the size of the history.
+
+    Args:
+        group_by: "day", "position", "location" or "tech".
+        limit:    Keep only the `limit` largest labels.
+
+    Returns:
+        {"total": live records, "counts": {label: n}, largest first}
+    """
+    return {"total": _counters.total(), "counts": _counters.get(group_by, limit)}
+
+
+def rebuild_counters() -> int:
+    """Recount the counter sidecar from the store (after drift); returns records counted."""
+    return _counters.rebuild(get_store().scan())
+
+
+def persistence_metrics() -> dict:
+    """Backpressure metrics of the background persister (queue depth, spills, latency)."""
+    return _persister().metrics()
 
 
 def load_all_candidates() -> list[dict]:
     """
     Read all previously saved candidate records.
 
+    JSONL reads go through process-wide incremental caches (sealed segments
+    plus the active log), so repeated calls only decode lines appended since
+    the previous call. The record dicts are shared with those caches and
+    must be treated as read-only.
+
+    Returns:
+        List of record dicts, most recent first.
+    """
+    chunks, deleted = get_store().record_chunks()
+    if PII_ENCRYPTION:
+        chunks = _plaintext_chunks(chunks)
+    return [r for chunk in reversed(chunks) for r in reversed(chunk)
+            if r.get("record_id") not in deleted]
+
+
+def iter_candidates(since=None, until=None, position: str | None = None):
+    """
+    Stream every live record, oldest first, in constant memory.
+
+    Unlike load_all_candidates() nothing is cached: each record is decoded,
+    yielded and dropped, which suits exports and batch jobs over the full
+    history. All segment files are opened up front, so a rotation or
+    compaction during the iteration does not skip or repeat records.
+
+    Args:
+        since:    Inclusive lower bound — a date, datetime or ISO string
+                  (a bare date means midnight UTC).
+        until:    Exclusive upper bound, same forms.
+        position: Exact match, case-insensitive.
+
+    The JSONL backend skips sealed segments outside the time range without
+    opening them; SQLite answers the range from its timestamp index.
+    """
+    records = get_store().scan(_utc_bound(since), _utc_bound(until))
+    if PII_ENCRYPTION:
+        records = get_cipher().iter_decrypted(records)
+    if position is not None:
+        key = position.strip().lower()
+        records = (r for r in records if r.get("position", "").strip().lower() == key)
+    return records
+
+
+def load_candidates_between(start, end, position: str | None = None) -> list[dict]:
+    """
+    Records with `start` <= timestamp < `end` (dates, datetimes or ISO
+    strings, as for iter_candidates()).
+
+    With the JSONL backend only the time partitions overlapping the range
+    are opened — sealed segments are cut at `SEGMENT_PARTITION` boundaries,
+    and archived (gzipped) partitions are decompressed only when the range
+    reaches them.
+
+    Returns:
+        List of record dicts, most recent first.
+    """
+    records = list(iter_candidates(start, end, position))
+    records.reverse()
+    return records
+
+
+def export_candidates(path: str, since=None, until=None, position: str | None = None,
+                      fmt: str | None = None) -> int:
+    """
+    Stream the (filtered) history into a CSV or XLSX file — format from
+    `fmt` or the extension — in constant memory (see utils/export.py).
+
+    Returns:
+        Number of records exported.
+    """
+    return write_export(iter_candidates(since, until, position), path, fmt)
+
+
+def _utc_bound(value) -> str | None:
+    """date / datetime / ISO string → ISO-8601 UTC string comparable with `timestamp_utc`."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime) and isinstance(value, date):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def load_recent_candidates(n: int = 5) -> list[dict]:
+    """
+    Read the `n` most recent candidate records.
+
+    The JSONL log is read backwards from the end in fixed-size blocks and
+    the scan stops as soon as `n` valid records are found, so the cost
+    depends on `n` rather than on the size of the history file. Sealed
+    segments are only opened if the active log holds fewer than `n`.
+
     Returns:
         List of record dicts, most recent first.
     """
-    if not os.path.exists(LOG_FILE):
+    if n <= 0:
         return []
-    records = []
+    return _decrypt(get_store().recent(n))
+
+
+def query_candidates(
+    email: str | None = None,
+    position: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Filter saved records, most recent first.
+
+    Args:
+        email:    Exact match, case-insensitive.
+        position: Exact match, case-insensitive.
+        since:    ISO-8601 UTC timestamp, inclusive lower bound.
+        until:    ISO-8601 UTC timestamp, exclusive upper bound.
+        limit:    Maximum number of records to return.
+
+    The SQLite backend answers from its indexes. The JSONL backend seeks
+    through the sealed segments' sidecar indexes for email / time filters
+    and filters the active log in memory; position-only queries scan.
+    """
+    if PII_ENCRYPTION and email:
+        email = get_cipher().email_token(email)
+    return _decrypt(get_store().query(email, position, since, until, limit))
+
+
+def search_candidates(
+    tech: str | list[str] | None = None,
+    position: str | None = None,
+    location: str | None = None,
+    limit: int = 50,
+) -> list[dict]:
+    """
+    Recruiter search over the full screening history, most recent first.
+
+    Every word of every given criterion must match a word of that field,
+    case-insensitively — e.g. tech=["Kubernetes", "Go"], location="Bengaluru",
+    position="backend" finds Kubernetes+Go candidates in Bengaluru applying
+    for any backend role. Answered from an in-process inverted index that is
+    updated incrementally with records saved since the previous search.
+
+    Returns:
+        Up to `limit` matching record dicts (shared, read-only).
+    """
+    criteria = {}
+    if tech:
+        criteria["tech_stack"] = tech
+    if position:
+        criteria["position"] = position
+    if location:
+        criteria["location"] = location
+    if not criteria:
+        return load_recent_candidates(limit)
+
+    index, deleted = _search_index()
+    return _decrypt(index.search(criteria, limit=limit, deleted=deleted))
+
+
+def aggregate_candidates(group_by: str = "position", metric: str = "count") -> dict:
+    """
+    Dashboard aggregate over the full screening history.
+
+    Args:
+        group_by: "position", "location", "tech" (resolved via the question
+                  bank's aliases, one count per distinct tech) or "day".
+        metric:   "count" or "avg_questions".
+
+    Answered from a process-wide columnar table (utils/columnar.py) that is
+    synced incrementally, so no per-record dicts are walked per call.
+
+    Returns:
+        {label: value}, largest first.
+    """
+    table, deleted = _column_table()
+    return table.aggregate(group_by, metric, deleted=deleted)
+
+
+def export_columnar(path: str, parquet_path: str | None = None) -> int:
+    """
+    Stream the whole store into a `.tscol` file (and optionally Parquet).
+
+    Returns:
+        Number of records exported.
+    """
+    table = ColumnTable()
+    table.extend(iter_candidates())
+    table.save(path)
+    if parquet_path:
+        table.save_parquet(parquet_path)
+    return table.rows
+
+
+# ── Change Stream ─────────────────────────────────────────────────────────────
+
+def subscribe(
+    from_offset: str | None = None,
+    consumer: str | None = None,
+    include_deletes: bool = False,
+    poll_interval: float = 0.05,
+    max_interval: float = 2.0,
+    batch: int = 500,
+    stop: threading.Event | None = None,
+):
+    """
+    Yield records as they are saved, tail -f style, starting after
+    `from_offset` (None: the whole history, "end": only new records).
+
+    The store is polled (CandidateStore.changes); while nothing arrives
+    the interval doubles from `poll_interval` up to `max_interval`, and
+    resets as soon as something does. Runs until `stop` is set or the
+    generator is closed.
+
+    With a `consumer` name the position is durable: it is read from
+    `STREAM_OFFSET_DIR/<consumer>.offset` when `from_offset` is None, and
+    written back (atomically, per batch and before each idle wait) once
+    the consumer has asked for the record after the one it was given, so a
+    restart resumes without re-reading history. Delivery is at-least-once:
+    the record in hand when the process dies is delivered again.
+
+    Args:
+        include_deletes: Also yield {"tombstone": record_id} for deletions
+                         and superseded revisions (JSONL backend only).
+    """
+    if consumer is not None:
+        offset_file = _offset_path(consumer)
+        if from_offset is None:
+            from_offset = _read_offset(offset_file)
+    offset = done = saved = from_offset
+    delay = poll_interval
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        records.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-    except IOError:
-        return []
-    return list(reversed(records))   # newest first
\ No newline at end of file
+        while stop is None or not stop.is_set():
+            entries, offset = read_changes(offset, batch)
+            for token, entry in entries:
+                if include_deletes or "tombstone" not in entry:
+                    yield entry
+                done = token
+            done = offset
+            if entries:
+                delay = poll_interval
+            if consumer is not None and done != saved:
+                _write_offset(offset_file, done)
+                saved = done
+            if not entries:
+                if stop is not None:
+                    stop.wait(delay)
+                else:
+                    time.sleep(delay)
+                delay = min(delay * 2, max_interval)
+    finally:
+        if consumer is not None and done != saved:
+            _write_offset(offset_file, done)
+
+
+def read_changes(offset: str | None = None, limit: int = 500) -> tuple[list[tuple[str, dict]], str]:
+    """
+    One page of the change stream: up to `limit` (offset after, entry)
+    pairs written after `offset`, records decrypted, plus the offset to
+    continue from (see CandidateStore.changes).
+    """
+    entries, next_offset = get_store().changes(offset, limit)
+    if PII_ENCRYPTION:
+        cipher = get_cipher()
+        entries = [(token, entry if "tombstone" in entry else cipher.decrypt_record(entry))
+                   for token, entry in entries]
+    return entries, next_offset
+
+
+def consumer_offset(consumer: str) -> str | None:
+    """Last committed offset of a `subscribe()` consumer (None if it never ran)."""
+    return _read_offset(_offset_path(consumer))
+
+
+def _offset_path(consumer: str) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", consumer) or consumer.startswith("."):
+        raise ValueError(f"consumer names are letters, digits, '_', '-' and '.', got {consumer!r}")
+    return os.path.join(STREAM_OFFSET_DIR, consumer + ".offset")
+
+
+def _read_offset(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["offset"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_offset(path: str, offset: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"offset": offset, "updated_utc": datetime.now(timezone.utc).isoformat()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+_store: CandidateStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> CandidateStore:
+    """The process-wide store for `STORAGE_BACKEND`."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = open_store(STORAGE_BACKEND)
+        return _store
+
+
+def open_store(backend: str) -> CandidateStore:
+    """A new store for `backend` ("jsonl", "sqlite" or "memory"), configured from config.py."""
+    if backend == "jsonl":
+        return JsonlStore(
+            CANDIDATE_LOG, SEGMENT_DIR, EMAIL_INDEX_FILE,
+            durability=LOG_DURABILITY, commit_window=LOG_COMMIT_WINDOW,
+            max_bytes=SEGMENT_MAX_BYTES, max_age_hours=SEGMENT_MAX_AGE_HOURS,
+            partition=SEGMENT_PARTITION,
+        )
+    if backend == "sqlite":
+        return SqliteStore(CANDIDATE_DB)
+    if backend == "memory":
+        return MemoryStore()
+    raise ValueError(f"STORAGE_BACKEND must be one of {BACKENDS}, got {backend!r}")
+
+
+def _seal_transcript(blob: bytes, record_id: str) -> bytes:
+    return get_cipher().seal(blob, "transcript:" + record_id)
+
+
+def _open_transcript(blob: bytes, record_id: str) -> bytes:
+    return get_cipher().unseal(blob, "transcript:" + record_id)
+
+
+_transcript_store = TranscriptStore(
+    TRANSCRIPT_DIR, fsync=LOG_DURABILITY == "fsync",
+    seal=_seal_transcript if PII_ENCRYPTION else None, unseal=_open_transcript,
+)
+_counters = Counters(COUNTERS_DB, seed=lambda: get_store().scan())
+
+
+_background: BackgroundPersister | None = None
+
+
+def _persister() -> BackgroundPersister:
+    global _background
+    with _store_lock:
+        if _background is None:
+            _background = BackgroundPersister(
+                persist_record, PERSIST_JOURNAL_DIR,
+                max_queue=PERSIST_QUEUE_SIZE, fsync_journal=PERSIST_JOURNAL_FSYNC,
+                encode=_seal_journal, decode=_open_journal,
+            )
+        return _background
+
+
+_dispatcher: WebhookDispatcher | None = None
+
+
+def _webhook() -> WebhookDispatcher | None:
+    """Start this process's webhook dispatcher (it idles if another process holds the lock)."""
+    global _dispatcher
+    if not WEBHOOK_URL:
+        return None
+    with _store_lock:
+        if _dispatcher is not None:
+            return _dispatcher
+        _dispatcher = dispatcher = WebhookDispatcher(
+            WEBHOOK_URL, read_changes, WEBHOOK_DB, batch_size=WEBHOOK_BATCH,
+            timeout=WEBHOOK_TIMEOUT, max_backoff=WEBHOOK_MAX_BACKOFF,
+        )
+    return dispatcher.start()          # outside the lock: start() reads the store
+
+
+# ── Derived Views ─────────────────────────────────────────────────────────────
+
+_index   = CandidateIndex()
+_columns = ColumnTable()
+
+
+def _search_index() -> tuple[CandidateIndex, set]:
+    """The process-wide search index, synced with the store."""
+    chunks, deleted = get_store().record_chunks()
+    _index.sync(chunks)
+    return _index, deleted
+
+
+def _column_table() -> tuple[ColumnTable, set]:
+    """The process-wide columnar table, synced with the store."""
+    chunks, deleted = get_store().record_chunks()
+    _columns.sync(chunks)
+    return _columns, deleted
+
+
+_plain: dict[int, list] = {}      # id(chunk) → [chunk, decrypted records]
+_plain_lock = threading.Lock()
+
+
+def _plaintext_chunks(chunks: list[list[dict]]) -> list[list[dict]]:
+    """
+    Decrypted copies of the store's record chunks, extended incrementally
+    like the views above, so repeated bulk reads decrypt each record once.
+    """
+    cipher = get_cipher()
+    with _plain_lock:
+        live = {id(c) for c in chunks}
+        for key in [k for k in _plain if k not in live]:
+            del _plain[key]
+        out = []
+        for chunk in chunks:
+            src = _plain.setdefault(id(chunk), [chunk, []])
+            plain = src[1]
+            if len(chunk) > len(plain):
+                plain.extend(cipher.decrypt_records(chunk[len(plain):], cache=False))
+            out.append(plain)
+        return out
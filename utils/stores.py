@@ -0,0 +1,995 @@
+"""
+utils/stores.py
+────────────────
+Candidate store backends behind utils/storage.py.
+
+`CandidateStore` is the protocol every backend implements; storage.py
+builds the one named by `STORAGE_BACKEND` in config.py and layers
+transcripts, revisions, background persistence and the derived views
+(search index, columnar table) on top.
+
+  - MemoryStore — process-local lists; for tests, demos and benchmarks
+  - JsonlStore  — append-only JSON-lines log: locked group-commit writer
+                  (utils/log_writer.py), rotation into indexed segments
+                  (utils/segments.py), persistent email index
+                  (utils/email_index.py) and incremental parse caches
+  - SqliteStore — SQLite in WAL mode (utils/sqlite_store.py)
+
+Benchmark (append throughput, recent-N latency, full scan, footprint),
+run by hand; nothing runs it automatically:
+    python -m utils.stores bench --records 10000,100000,1000000
+
+GDPR erasure / retention purge of the configured store:
+    python -m utils.stores purge --email a@example.com [--older-than-days 365 | --retention]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Protocol
+
+from utils import segments, sqlite_store
+from utils.email_index import EmailIndex
+from utils.log_writer import GroupCommitWriter, locked
+
+
+_TAIL_BLOCK = 64 * 1024   # bytes read per step when scanning the log backwards
+
+Merge = Callable[[dict | None, dict], dict | None]
+
+
+class CandidateStore(Protocol):
+    """What storage.py needs from a backend. Records are plain dicts with a `record_id`."""
+
+    def append(self, record: dict) -> bool:
+        """Store one record; True once it is durable."""
+
+    def upsert(self, record: dict, merge: Merge) -> bool:
+        """
+        Replace the current record with the same normalised email by
+        `merge(current_or_None, record)`; a None result writes nothing.
+        """
+
+    def delete(self, record_id: str) -> bool:
+        """Hide one record from every read."""
+
+    def purge(self, emails=(), before: str | None = None) -> dict:
+        """
+        Erase records by email or age; {"removed", "files_rewritten",
+        "transcripts" (pointers of erased records)}.
+        """
+
+    def get_by_email(self, email: str) -> dict | None:
+        """Newest live record for `email` (case-insensitive)."""
+
+    def recent(self, n: int) -> list[dict]:
+        """The `n` newest live records, newest first."""
+
+    def scan(self, since: str | None = None, until: str | None = None) -> Iterator[dict]:
+        """
+        Every live record, oldest first, in constant memory; `since` /
+        `until` (ISO-8601 UTC, inclusive / exclusive) bound `timestamp_utc`.
+        """
+
+    def query(self, email: str | None = None, position: str | None = None,
+              since: str | None = None, until: str | None = None,
+              limit: int | None = None) -> list[dict]:
+        """Exact-match filters, newest first (see storage.query_candidates)."""
+
+    def record_chunks(self) -> tuple[list[list[dict]], set]:
+        """
+        Every record as append-only chunks, oldest first, plus tombstoned
+        record_ids. Chunks are shared, read-only lists that only grow; a
+        chunk is replaced (new list object) when its contents are rewritten,
+        which is how derived views know to rebuild.
+        """
+
+    def changes(self, offset: str | None = None, limit: int = 500) -> tuple[list[tuple[str, dict]], str]:
+        """
+        Change stream: up to `limit` entries written after `offset` (None:
+        the beginning, "end": only what comes next), in write order, as
+        (offset after the entry, entry) pairs, plus the offset to resume
+        from. Entries are records or {"tombstone": record_id} deletions.
+        Offsets are opaque strings that survive a restart, led by an integer
+        that never decreases along the stream; after a rewrite (purge,
+        compaction) delivery resumes at-least-once, re-reading only entries
+        whose offsets share the resume offset's leading integer.
+        """
+
+    def footprint(self) -> int:
+        """Bytes on disk."""
+
+
+def _matches(records, email, position, since, until, limit) -> list[dict]:
+    """Filter newest-first `records` (see CandidateStore.query)."""
+    email_key    = email.strip().lower() if email is not None else None
+    position_key = position.strip().lower() if position is not None else None
+    matches = []
+    for r in records:
+        ts = r.get("timestamp_utc", "")
+        if email_key is not None and r.get("email", "").strip().lower() != email_key:
+            continue
+        if position_key is not None and r.get("position", "").strip().lower() != position_key:
+            continue
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts >= until:
+            continue
+        matches.append(r)
+        if limit is not None and len(matches) >= limit:
+            break
+    return matches
+
+
+def _in_range(record: dict, since: str | None, until: str | None) -> bool:
+    ts = record.get("timestamp_utc", "")
+    return (since is None or ts >= since) and (until is None or ts < until)
+
+
+def _live(chunks: list[list[dict]], deleted: set):
+    """Records of `chunks`, newest first, minus `deleted`."""
+    for chunk in reversed(chunks):
+        for r in reversed(chunk):
+            if r.get("record_id") not in deleted:
+                yield r
+
+
+# ── In-Memory Store ───────────────────────────────────────────────────────────
+
+class MemoryStore:
+    """Process-local store: one append-only list plus a tombstone set."""
+
+    def __init__(self):
+        self.lock     = threading.Lock()
+        self.records: list[dict] = []
+        self.deleted: set[str]   = set()
+        self.by_email: dict[str, dict] = {}
+
+    def append(self, record: dict) -> bool:
+        with self.lock:
+            self.records.append(record)
+            self.by_email[record.get("email", "").strip().lower()] = record
+        return True
+
+    def upsert(self, record: dict, merge: Merge) -> bool:
+        key = record.get("email", "").strip().lower()
+        with self.lock:
+            current = self.by_email.get(key)
+            merged = merge(current, record)
+            if merged is None:
+                return True
+            if current is not None:
+                self.deleted.add(current["record_id"])
+            self.records.append(merged)
+            self.by_email[key] = merged
+        return True
+
+    def delete(self, record_id: str) -> bool:
+        with self.lock:
+            self.deleted.add(record_id)
+            for key, r in list(self.by_email.items()):
+                if r.get("record_id") == record_id:
+                    del self.by_email[key]
+        return True
+
+    def purge(self, emails=(), before: str | None = None) -> dict:
+        keys = {e.strip().lower() for e in emails if e and e.strip()}
+        report = {"removed": 0, "files_rewritten": 0, "transcripts": []}
+        with self.lock:
+            kept = []
+            for r in self.records:
+                if r.get("email", "").strip().lower() in keys or (
+                        before and r.get("timestamp_utc", "") < before):
+                    report["removed"] += 1
+                    if r.get("transcript"):
+                        report["transcripts"].append(r["transcript"])
+                else:
+                    kept.append(r)
+            if report["removed"]:
+                self.records = kept               # new chunk object: views rebuild
+                live = {id(r) for r in kept}
+                self.by_email = {k: r for k, r in self.by_email.items() if id(r) in live}
+        return report
+
+    def get_by_email(self, email: str) -> dict | None:
+        return self.by_email.get(email.strip().lower())
+
+    def recent(self, n: int) -> list[dict]:
+        out = []
+        for r in _live([self.records], self.deleted):
+            if len(out) >= n:
+                break
+            out.append(r)
+        return out
+
+    def scan(self, since=None, until=None) -> Iterator[dict]:
+        deleted = set(self.deleted)
+        return (r for r in self.records[:] if r.get("record_id") not in deleted
+                and _in_range(r, since, until))
+
+    def query(self, email=None, position=None, since=None, until=None, limit=None) -> list[dict]:
+        return _matches(_live([self.records], set(self.deleted)), email, position, since, until, limit)
+
+    def record_chunks(self) -> tuple[list[list[dict]], set]:
+        return [self.records], set(self.deleted)
+
+    def changes(self, offset=None, limit=500) -> tuple[list[tuple[str, dict]], str]:
+        """Offsets are list positions (deletions are not streamed)."""
+        records = self.records
+        start = len(records) if offset == "end" else min(int(offset or 0), len(records))
+        batch = records[start:start + limit]
+        return [(str(start + i + 1), r) for i, r in enumerate(batch)], str(start + len(batch))
+
+    def footprint(self) -> int:
+        return 0
+
+
+# ── SQLite Store ──────────────────────────────────────────────────────────────
+
+class SqliteStore:
+    """SQLite/WAL backend; reads other than record_chunks() go to the indexes."""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.lock    = threading.Lock()
+        self._chunk: list[dict] = []
+        self._rowid  = 0           # last row copied into _chunk
+        self._live: dict[int, str] = {}     # row id → record_id of mirrored rows still in the table
+        self._deleted: set[str] = set()     # record_ids of mirrored rows deleted since
+        self._generation = None    # purge generation the mirror was loaded under
+
+    def append(self, record: dict) -> bool:
+        return sqlite_store.insert_record(self.db_file, record)
+
+    def upsert(self, record: dict, merge: Merge) -> bool:
+        return sqlite_store.upsert_record(self.db_file, record, merge)
+
+    def delete(self, record_id: str) -> bool:
+        return sqlite_store.delete_record(self.db_file, record_id)
+
+    def purge(self, emails=(), before: str | None = None) -> dict:
+        return sqlite_store.purge_records(self.db_file, emails, before)
+
+    def get_by_email(self, email: str) -> dict | None:
+        found = sqlite_store.query_records(self.db_file, email=email, limit=1)
+        return found[0] if found else None
+
+    def recent(self, n: int) -> list[dict]:
+        return sqlite_store.query_records(self.db_file, limit=n)
+
+    def scan(self, since=None, until=None) -> Iterator[dict]:
+        return sqlite_store.iter_records(self.db_file, since, until)
+
+    def query(self, email=None, position=None, since=None, until=None, limit=None) -> list[dict]:
+        return sqlite_store.query_records(self.db_file, email, position, since, until, limit)
+
+    def record_chunks(self) -> tuple[list[list[dict]], set]:
+        """
+        Mirror of the table in row order, topped up with new rows per call.
+        Rows deleted since (upserted or deleted records) stay in the chunk
+        and come back as tombstoned record_ids; after a purge the mirror is
+        dropped and reloaded, so erased records leave memory too.
+        """
+        with self.lock:
+            delta = sqlite_store.records_since(self.db_file, self._rowid, len(self._live))
+            if delta is not None and delta[3] != self._generation and self._rowid:
+                self._chunk, self._rowid, self._live, self._deleted = [], 0, {}, set()
+                delta = sqlite_store.records_since(self.db_file, 0, 0)
+            if delta is not None:
+                self._rowid, fresh, kept, self._generation = delta
+                if kept is not None:
+                    for row_id in [i for i in self._live if i not in kept]:
+                        self._deleted.add(self._live.pop(row_id))
+                for row_id, record in fresh:
+                    self._chunk.append(record)
+                    self._live[row_id] = record.get("record_id")
+            return [self._chunk], set(self._deleted)
+
+    def changes(self, offset=None, limit=500) -> tuple[list[tuple[str, dict]], str]:
+        """
+        Offsets are row ids. An upsert re-inserts the row, so revisions are
+        streamed; deletions are not (the rows are gone).
+        """
+        after = sqlite_store.last_row_id(self.db_file) if offset == "end" else int(offset or 0)
+        rows = sqlite_store.rows_after(self.db_file, after, limit)
+        return [(str(row_id), r) for row_id, r in rows], str(rows[-1][0] if rows else after)
+
+    def footprint(self) -> int:
+        return sum(
+            os.path.getsize(p) for p in (self.db_file, self.db_file + "-wal", self.db_file + "-shm")
+            if os.path.exists(p)
+        )
+
+
+# ── JSONL Store ───────────────────────────────────────────────────────────────
+
+class JsonlStore:
+    """
+    Append-only JSON-lines log with sealed, indexed segments.
+
+    Args:
+        log_file:      Active log.
+        seg_dir:       Directory for sealed segments.
+        email_index:   Persistent email hash index file.
+        durability:    Group-commit durability, "fsync" or "flush".
+        commit_window: Seconds a commit leader waits to batch appends.
+        max_bytes:     Seal the active log past this size…
+        max_age_hours: …or once its first record is this old.
+        partition:     "day" / "month": also seal it before the first record
+                       of a later period, so each sealed segment holds one
+                       time partition. None disables.
+    """
+
+    def __init__(self, log_file: str, seg_dir: str, email_index: str,
+                 durability: str = "fsync", commit_window: float = 0.002,
+                 max_bytes: int = 64 * 1024 * 1024, max_age_hours: float = 24 * 7,
+                 partition: str | None = None):
+        if partition is not None and partition not in segments.PARTITIONS:
+            raise ValueError(f"partition must be one of {tuple(segments.PARTITIONS)}, got {partition!r}")
+        self.log_file      = log_file
+        self.seg_dir       = seg_dir
+        self.durability    = durability
+        self.commit_window = commit_window
+        self.max_bytes     = max_bytes
+        self.max_age_hours = max_age_hours
+        self.partition     = partition
+        self.emails        = EmailIndex(email_index, log_file, seg_dir)
+        self._active       = (None, None)    # (inode, period) of the active log's first record
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def _seal_if_new_period(self, timestamp: str):
+        """Seal the active log if `timestamp` starts a later partition than it holds."""
+        period = segments.partition_key(timestamp, self.partition)
+        try:
+            ino = os.stat(self.log_file).st_ino
+        except OSError:
+            return                       # no active log yet
+        if self._active[0] != ino:
+            self._active = (ino, segments.active_period(self.log_file, self.partition))
+        if self._active[1] is not None and period > self._active[1]:
+            try:
+                segments.rotate(self.log_file, self.seg_dir, before=(self.partition, period))
+            except OSError:
+                pass
+
+    def _append_lines(self, data: str, timestamp: str | None = None) -> bool:
+        if self.partition and timestamp:
+            self._seal_if_new_period(timestamp)
+        writer = _log_writer(self.log_file, self.durability, self.commit_window)
+        if not writer.append(data.encode("utf-8")):
+            return False
+        if segments.should_rotate(self.log_file, self.max_bytes, self.max_age_hours):
+            try:
+                segments.rotate(self.log_file, self.seg_dir)
+            except OSError:
+                pass             # the record is saved; rotation retries on the next save
+        return True
+
+    def append(self, record: dict) -> bool:
+        return self._append_lines(json.dumps(record, ensure_ascii=False) + "\n",
+                                  record.get("timestamp_utc"))
+
+    def upsert(self, record: dict, merge: Merge) -> bool:
+        """The old record's tombstone and the new record go out in one write."""
+        with self.emails.transaction():
+            current = self.emails.get(record.get("email", ""))
+            record = merge(current, record)
+            if record is None:
+                return True
+            lines = ""
+            if current is not None:
+                lines = json.dumps(_tombstone(current)) + "\n"
+            lines += json.dumps(record, ensure_ascii=False) + "\n"
+            return self._append_lines(lines, record.get("timestamp_utc"))
+
+    def delete(self, record_id: str) -> bool:
+        """
+        Append a tombstone, which hides the record from every read at once;
+        `python -m utils.segments compact` removes it from disk.
+        """
+        chunks, _ = self.record_chunks()
+        record = next((r for chunk in reversed(chunks) for r in reversed(chunk)
+                       if r.get("record_id") == record_id), {"record_id": record_id})
+        return self._append_lines(json.dumps(_tombstone(record)) + "\n")
+
+    def purge(self, emails=(), before: str | None = None) -> dict:
+        """Streaming rewrite of the affected files; see segments.purge()."""
+        return segments.purge(self.seg_dir, self.log_file, emails, before)
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def get_by_email(self, email: str) -> dict | None:
+        """O(1) probes of the persistent hash index plus one line read."""
+        return self.emails.get(email)
+
+    def recent(self, n: int) -> list[dict]:
+        """
+        The log is read backwards from the end in fixed-size blocks and the
+        scan stops as soon as `n` valid records are found, so the cost
+        depends on `n` rather than on the size of the history. Sealed
+        segments are only opened if the active log holds fewer than `n`
+        (an archived one is decompressed into memory to be read backwards).
+        """
+        records, deleted, seen = [], set(), set()
+        paths = [self.log_file]   # active first; sealed list is read after it (see dedupe below)
+        i = 0
+        while i < len(paths) and len(records) < n:
+            try:
+                with segments.open_segment(paths[i]) as f:
+                    if paths[i].endswith(segments.ARCHIVE_EXT):
+                        f = io.BytesIO(f.read())
+                    _read_tail_records(f, n, records, deleted, seen)
+            except IOError:
+                pass
+            if i == 0:
+                paths += [seg["path"] for seg in reversed(segments.sealed_segments(self.seg_dir))]
+            i += 1
+        return records
+
+    def scan(self, since=None, until=None) -> Iterator[dict]:
+        """
+        Nothing is cached: each record is decoded, yielded and dropped. All
+        segment files are opened up front, so a rotation or compaction during
+        the iteration does not skip or repeat records. Indexed segments whose
+        time range (manifest min_ts / max_ts) misses `since`..`until` are not
+        opened at all.
+        """
+        since_us = segments.ts_micros(since) if since is not None else None
+        until_us = segments.ts_micros(until) if until is not None else None
+        deleted, files = set(), []
+        try:
+            for seg in segments.sealed_segments(self.seg_dir):
+                if seg.get("indexed"):
+                    deleted.update(seg.get("tombstones", ()))
+                    if (since_us is not None and seg["max_ts"] < since_us) or (
+                            until_us is not None and seg["min_ts"] >= until_us):
+                        continue
+                else:
+                    deleted.update(segments.scan_tombstones(seg["path"]))
+                files.append(segments.open_segment(seg["path"]))
+            if os.path.exists(self.log_file):
+                deleted.update(segments.scan_tombstones(self.log_file))
+                files.append(open(self.log_file, "rb"))
+        except OSError:
+            pass                         # segment vanished mid-listing; stream what we have
+
+        try:
+            for f in files:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    entry = _decode(raw)
+                    if entry is None or "tombstone" in entry or entry.get("record_id") in deleted:
+                        continue
+                    if _in_range(entry, since, until):
+                        yield entry
+        finally:
+            for f in files:
+                f.close()
+
+    def query(self, email=None, position=None, since=None, until=None, limit=None) -> list[dict]:
+        """
+        Seeks through the sealed segments' sidecar indexes for email / time
+        filters and filters the active log in memory; position-only queries
+        walk the caches.
+        """
+        if email is None and since is None and until is None:
+            chunks, deleted = self.record_chunks()
+            candidates = _live(chunks, deleted)
+        else:
+            active, active_deleted = _log_cache(self.log_file).snapshot()
+            sealed, deleted = segments.lookup(self.seg_dir, email, since, until)
+            deleted |= active_deleted
+            candidates = sorted(
+                (r for r in _dedupe(sealed + active) if r.get("record_id") not in deleted),
+                key=lambda r: r.get("timestamp_utc", ""), reverse=True,
+            )
+        return _matches(candidates, email, position, since, until, limit)
+
+    def record_chunks(self) -> tuple[list[list[dict]], set]:
+        """
+        Sealed segments, then the active log, from process-wide incremental
+        caches: repeated calls only decode lines appended since the last one.
+        """
+        active = _log_cache(self.log_file)
+        sealed = _sealed_cache(self.seg_dir, active)
+        for _ in range(3):
+            chunks, deleted = sealed.refresh()
+            if not active.refresh():
+                break                # no rotation slipped in between the two reads
+        with active.lock:
+            return chunks + [active.records], deleted | active.tombstones
+
+    def changes(self, offset=None, limit=500) -> tuple[list[tuple[str, dict]], str]:
+        """
+        Reads the segment files in seq order, then the active log.
+
+        An offset is "seq:inode:pos:last_record_id" — a byte position in
+        the file that holds (or, while active, will hold) segment `seq`.
+        Rotation renames the active log, keeping its inode, so offsets stay
+        valid across it. When the file was rewritten since (new inode after
+        purge, compaction or archiving), reading resumes after
+        `last_record_id` in its replacement, or at its start if that record
+        is gone.
+        """
+        if offset == "end":
+            with locked(self.log_file):
+                next_seq = segments.read_manifest(self.seg_dir)["next_seq"]
+                try:
+                    st = os.stat(self.log_file)
+                except OSError:
+                    return [], f"{next_seq}:0:0:"
+                return [], f"{next_seq}:{st.st_ino}:{st.st_size}:"
+        seq, ino, pos, last = _parse_offset(offset)
+        entries = []
+        while len(entries) < limit:
+            with locked(self.log_file):
+                manifest = segments.read_manifest(self.seg_dir)
+                ahead = sorted((s for s in manifest["segments"] if s["seq"] >= seq),
+                               key=lambda s: s["seq"])
+                if ahead:
+                    cur_seq, path = ahead[0]["seq"], os.path.join(self.seg_dir, ahead[0]["file"])
+                else:
+                    cur_seq, path = manifest["next_seq"], self.log_file
+                try:
+                    f = segments.open_segment(path)
+                except FileNotFoundError:
+                    break                                # no active log yet
+            with f:
+                cur_ino = os.fstat(f.fileno()).st_ino
+                if pos and (cur_seq, cur_ino) != (seq, ino):
+                    pos = _position_after(f, last)       # rewritten since the offset was taken
+                elif (cur_seq, cur_ino) != (seq, ino):
+                    pos = 0
+                seq, ino = cur_seq, cur_ino
+                f.seek(pos)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break                            # partial line still being written
+                    pos += len(raw)
+                    entry = _decode(raw)
+                    if entry is None:
+                        continue
+                    if "tombstone" in entry:
+                        entry = {"tombstone": entry["tombstone"]}
+                    else:
+                        last = entry.get("record_id", last)
+                    entries.append((f"{seq}:{ino}:{pos}:{last}", entry))
+                    if len(entries) >= limit:
+                        break
+            if len(entries) >= limit or path == self.log_file:
+                break
+            seq, ino, pos = seq + 1, 0, 0                # sealed segment done: on to the next
+        return entries, f"{seq}:{ino}:{pos}:{last}"
+
+    def footprint(self) -> int:
+        total = 0
+        for path in (self.log_file, self.emails.path):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        if os.path.isdir(self.seg_dir):
+            for name in os.listdir(self.seg_dir):
+                total += os.path.getsize(os.path.join(self.seg_dir, name))
+        return total
+
+
+def _parse_offset(offset: str | None) -> tuple[int, int, int, str]:
+    if not offset or offset == "end":
+        return 0, 0, 0, ""
+    seq, ino, pos, last = offset.split(":", 3)
+    return int(seq), int(ino), int(pos), last
+
+
+def _position_after(f, record_id: str) -> int:
+    """Byte position just past the line of `record_id` in `f` (0 if not found)."""
+    if not record_id:
+        return 0
+    needle, pos, found = record_id.encode(), 0, 0
+    f.seek(0)
+    for raw in f:
+        pos += len(raw)
+        if needle in raw:
+            entry = _decode(raw)
+            if entry is not None and entry.get("record_id") == record_id:
+                found = pos
+    return found
+
+
+def _tombstone(record: dict) -> dict:
+    """Tombstone line for `record`; carries its email hash for the email index."""
+    tombstone = {
+        "tombstone":     record["record_id"],
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+    }
+    if record.get("email"):
+        tombstone["email_key"] = segments.email_key(record["email"]).hex()
+    return tombstone
+
+
+def _read_tail_records(f, n: int, records: list[dict], deleted: set, seen: set):
+    """
+    Decode records from the end of a binary file, newest first, until
+    `records` holds `n`. Tombstones are collected into `deleted` (they
+    always follow the record they hide, so a backwards scan meets them
+    first); `seen` record_ids guard against a rotation mid-read. Lines
+    are cut out of a block one at a time from its end, so a small `n`
+    only copies the lines it decodes.
+    """
+    pos = f.seek(0, os.SEEK_END)
+    carry = b""          # first (possibly partial) line of the previous block
+    while pos > 0:
+        step = min(_TAIL_BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        block = f.read(step) + carry
+        end = len(block)
+        while end >= 0:
+            start = block.rfind(b"\n", 0, end)
+            if start < 0 and pos > 0:
+                break                   # runs into the previous block
+            entry = _decode(block[start + 1:end])
+            end = start
+            if entry is None:
+                continue
+            if "tombstone" in entry:
+                deleted.add(entry["tombstone"])
+                continue
+            rid = entry.get("record_id")
+            if rid is not None and (rid in deleted or rid in seen):
+                continue
+            seen.add(rid)
+            records.append(entry)
+            if len(records) >= n:
+                return
+        carry = block[:end]
+
+
+def _decode(raw: bytes) -> dict | None:
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def _dedupe(records: list[dict]) -> list[dict]:
+    seen, out = set(), []
+    for r in records:
+        rid = r.get("record_id")
+        if rid is None or rid not in seen:
+            seen.add(rid)
+            out.append(r)
+    return out
+
+
+_writers: dict[str, GroupCommitWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def _log_writer(path: str, durability: str, window: float) -> GroupCommitWriter:
+    """Process-wide writer per log, so concurrent sessions share group commits."""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = GroupCommitWriter(path, durability=durability, window=window)
+        return writer
+
+
+# ── Incremental Log Caches ────────────────────────────────────────────────────
+
+class _LogCache:
+    """
+    Parsed records of one JSONL log, shared by every session in the process.
+
+    Remembers the byte offset it has parsed up to, plus the file's identity
+    (device, inode), size and mtime. A refresh decodes only the lines
+    appended since the last call; the cache is rebuilt from scratch only
+    when the file was replaced (rotation, atomic rewrite) or truncated.
+
+    On rotation the previous file's parsed state is kept as `retired`, so
+    the sealed-segment cache can adopt it instead of re-decoding the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.retired = None
+        self._reset(None)
+
+    def _reset(self, ident):
+        self.ident      = ident   # (st_dev, st_ino) of the file parsed so far
+        self.offset     = 0       # end of the last complete line parsed
+        self.mtime      = None
+        self.records    = []      # append order, oldest first
+        self.tombstones = set()   # record_ids hidden by tombstone lines
+
+    def _retire(self, ident):
+        if self.ident is not None and self.offset:
+            self.retired = (self.ident, self.offset, self.records, self.tombstones)
+        self._reset(ident)
+
+    def refresh(self) -> bool:
+        """
+        Bring the cache up to date.
+
+        Returns:
+            True if the file was replaced since the last refresh.
+        """
+        with self.lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                replaced = self.ident is not None
+                self._retire(None)
+                return replaced
+
+            ident = (st.st_dev, st.st_ino)
+            replaced = ident != self.ident and self.ident is not None
+            rewritten = st.st_size == self.offset and st.st_mtime_ns != self.mtime
+            if ident != self.ident or st.st_size < self.offset or rewritten:
+                self._retire(ident)
+
+            if st.st_size > self.offset:
+                try:
+                    for offset, raw in segments.iter_lines(self.path, self.offset):
+                        self.offset = offset + len(raw)
+                        _decode_into(raw, self.records, self.tombstones)
+                except IOError:
+                    pass
+            self.mtime = st.st_mtime_ns
+            return replaced
+
+    def snapshot(self) -> tuple[list[dict], set]:
+        """Refresh, then return (records oldest first, tombstoned ids) — shared, read-only."""
+        self.refresh()
+        with self.lock:
+            return self.records, set(self.tombstones)
+
+    def adopt_retired(self, ident) -> tuple | None:
+        """
+        Hand over parsed state for the file `ident` if this cache has it —
+        either as its retired file or (rotation not noticed yet) current one.
+        """
+        with self.lock:
+            if self.ident == ident:
+                self._retire(None)
+            if self.retired is not None and self.retired[0] == ident:
+                state, self.retired = self.retired, None
+                return state
+            return None
+
+
+def _decode_into(raw: bytes, records: list[dict], tombstones: set):
+    entry = _decode(raw)
+    if entry is None:
+        return
+    if "tombstone" in entry:
+        tombstones.add(entry["tombstone"])
+    else:
+        records.append(entry)
+
+
+class _SealedCache:
+    """
+    Parsed records of every sealed segment, keyed by segment file.
+
+    Sealed segments are immutable, so the cache only changes when the
+    manifest does: new segments are loaded (adopting the active log's
+    parsed state when the segment is the log it just rotated), segments
+    removed by compaction are dropped.
+    """
+
+    def __init__(self, seg_dir: str, active: _LogCache):
+        self.seg_dir  = seg_dir
+        self.active   = active
+        self.lock     = threading.Lock()
+        self.stamp    = None
+        self.loaded: dict[str, tuple[list[dict], set]] = {}
+        self.order: list[str] = []
+        self.deleted  = set()
+
+    def refresh(self) -> tuple[list[list[dict]], set]:
+        """Returns (per-segment record lists oldest first, tombstoned ids)."""
+        with self.lock:
+            try:
+                st = os.stat(os.path.join(self.seg_dir, segments.MANIFEST))
+                stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            if stamp != self.stamp:
+                entries = segments.sealed_segments(self.seg_dir)
+                self.loaded = {
+                    seg["file"]: self.loaded.get(seg["file"]) or self._load(seg["path"])
+                    for seg in entries
+                }
+                self.order   = [seg["file"] for seg in entries]
+                self.deleted = set().union(*(self.loaded[f][1] for f in self.order))
+                self.stamp   = stamp
+            return [self.loaded[f][0] for f in self.order], self.deleted
+
+    def _load(self, path: str) -> tuple[list[dict], set]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return [], set()
+        state = self.active.adopt_retired((st.st_dev, st.st_ino))
+        records, tombstones, start = ([], set(), 0) if state is None else (state[2], state[3], state[1])
+        try:
+            for _, raw in segments.iter_lines(path, start):
+                _decode_into(raw, records, tombstones)
+        except OSError:
+            pass
+        return records, tombstones
+
+
+_caches: dict[str, _LogCache] = {}
+_sealed: dict[str, _SealedCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _log_cache(path: str) -> _LogCache:
+    key = os.path.abspath(path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = _LogCache(path)
+        return cache
+
+
+def _sealed_cache(seg_dir: str, active: _LogCache) -> _SealedCache:
+    key = os.path.abspath(seg_dir)
+    with _caches_lock:
+        cache = _sealed.get(key)
+        if cache is None:
+            cache = _sealed[key] = _SealedCache(seg_dir, active)
+        return cache
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+
+BACKENDS = ("memory", "jsonl", "sqlite")
+
+_BENCH_POS  = ["Backend Engineer", "Frontend Developer", "ML Engineer", "DevOps Engineer",
+               "Data Engineer", "Full Stack Developer", "SRE"]
+_BENCH_LOC  = ["Bengaluru, India", "Pune, India", "Berlin, Germany", "London, UK", "Austin, USA"]
+_BENCH_TECH = ["Python", "Django", "React", "Kubernetes", "Docker", "AWS", "Go", "Java",
+               "PostgreSQL", "Redis", "Kafka", "Node.js", "Terraform"]
+
+
+def _bench_store(backend: str, root: str, durability: str, threads: int) -> CandidateStore:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SqliteStore(os.path.join(root, "candidates.db"))
+    return JsonlStore(
+        os.path.join(root, "candidates_log.json"), os.path.join(root, "segments"),
+        os.path.join(root, "candidates_email.idx"), durability=durability,
+        commit_window=0.002 if threads > 1 else 0.0,
+        max_age_hours=float("inf"),            # synthetic timestamps span months; rotate by size only
+    )
+
+
+def _bench_records(n: int, seed: int):
+    rng  = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(n):
+        yield {
+            "record_id":     uuid.UUID(int=rng.getrandbits(128)).hex,
+            "timestamp_utc": (base + timedelta(seconds=30 * i)).isoformat(),
+            "name":          f"Candidate {i}",
+            "email":         f"candidate{i}@example.com",
+            "phone":         f"+91 98{i:08d}",
+            "experience":    str(rng.randint(0, 15)),
+            "position":      rng.choice(_BENCH_POS),
+            "location":      rng.choice(_BENCH_LOC),
+            "tech_stack":    ", ".join(rng.sample(_BENCH_TECH, rng.randint(2, 6))),
+            "questions_asked": rng.randint(3, 8),
+            "screening_complete": True,
+        }
+
+
+def bench_backend(backend: str, n: int, durability: str = "flush", threads: int = 1,
+                  recent_n: int = 5, seed: int = 7) -> dict:
+    """Append `n` synthetic records to a fresh store in a temp dir and measure it."""
+    root = tempfile.mkdtemp(prefix=f"ts-bench-{backend}-")
+    try:
+        store = _bench_store(backend, root, durability, threads)
+        records = list(_bench_records(n, seed))
+
+        t0 = time.perf_counter()
+        if threads > 1:
+            def run(part):
+                for r in part:
+                    store.append(r)
+            pool = [threading.Thread(target=run, args=(records[t::threads],)) for t in range(threads)]
+            for t in pool:
+                t.start()
+            for t in pool:
+                t.join()
+        else:
+            for r in records:
+                store.append(r)
+        append_s = time.perf_counter() - t0
+        del records
+
+        samples = []
+        for _ in range(50):
+            t = time.perf_counter()
+            store.recent(recent_n)
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+
+        t0 = time.perf_counter()
+        scanned = sum(1 for _ in store.scan())
+        scan_s = time.perf_counter() - t0
+
+        return {
+            "backend":        backend,
+            "records":        n,
+            "append_per_s":   round(n / append_s) if append_s else 0,
+            "recent_p50_ms":  round(samples[len(samples) // 2], 3),
+            "recent_p95_ms":  round(samples[int(len(samples) * 0.95)], 3),
+            "scan_s":         round(scan_s, 3),
+            "scan_ok":        scanned == n,
+            "footprint_mb":   round(store.footprint() / 1e6, 2),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.stores")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("bench", help="compare backends on synthetic records")
+    b.add_argument("--records", default="10000,100000,1000000",
+                   help="comma-separated store sizes")
+    b.add_argument("--backends", default=",".join(BACKENDS))
+    b.add_argument("--durability", choices=("fsync", "flush"), default="flush",
+                   help="JSONL commit durability (SQLite always runs synchronous=NORMAL)")
+    b.add_argument("--threads", type=int, default=1, help="concurrent appending threads")
+    b.add_argument("--recent", type=int, default=5, help="N for the recent-N latency")
+    p = sub.add_parser("purge", help="erase candidates by email and/or age")
+    p.add_argument("--email", action="append", default=[], help="repeatable")
+    p.add_argument("--older-than-days", type=float,
+                   help="erase records older than this many days (no default; see --retention)")
+    p.add_argument("--retention", action="store_true",
+                   help="apply RETENTION_DAYS from config.py")
+    args = parser.parse_args(argv)
+
+    if args.command == "purge":
+        from config import RETENTION_DAYS
+        from utils.storage import purge_candidates
+        days = args.older_than_days
+        if days is None and args.retention:
+            days = RETENTION_DAYS
+        if not args.email and days is None:
+            parser.error("purge needs --email, --older-than-days or --retention")
+        report = purge_candidates(args.email, days)
+        for k, v in report.items():
+            print(f"{k:>18}: {v}")
+        return 0
+
+    cols = ("backend", "records", "append_per_s", "recent_p50_ms", "recent_p95_ms",
+            "scan_s", "scan_ok", "footprint_mb")
+    print("  ".join(f"{c:>13}" for c in cols))
+    for n in (int(x) for x in args.records.split(",")):
+        for backend in args.backends.split(","):
+            row = bench_backend(backend.strip(), n, args.durability, args.threads, args.recent)
+            print("  ".join(f"{row[c]!s:>13}" for c in cols), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,262 @@
+"""
+utils/transcripts.py
+─────────────────────
+Compressed blob store for interview transcripts.
+
+Candidate records stay small: the `answers` list is compressed into an
+append-only pack file and the record keeps only a pointer
+
+    {"pack": "transcripts.pack", "offset": …, "length": …, "dict": "<id>"}
+
+so listing candidates never touches transcript bytes; `get()` reads and
+decompresses one blob when a transcript is opened. With `seal` / `unseal`
+hooks (storage.py passes the PII cipher's under `PII_ENCRYPTION`) each
+compressed blob is encrypted, bound to a context (the record_id), and
+its pointer carries `"sealed": true`; older blobs stay readable.
+
+Transcripts are short and mostly question text, which zlib alone barely
+compresses. Each blob is deflated against a preset dictionary (`zdict`)
+built from the question bank — or, after `train`, from the questions that
+stored transcripts actually contain, most frequent last (closest to the
+window). Dictionaries are immutable files named by their content hash, so
+retraining never breaks older blobs.
+
+    candidates_transcripts/
+      transcripts.pack        concatenated raw-deflate blobs
+      dict-<id>.zdict         preset dictionaries
+      CURRENT                 id of the dictionary used for new blobs
+
+CLI:
+    python -m utils.transcripts train | stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import Counter
+from typing import Callable
+
+from utils.log_writer import locked
+
+
+PACK      = "transcripts.pack"
+CURRENT   = "CURRENT"
+_ZDICT_MAX = 32 * 1024     # deflate window: only the last 32 KiB of a zdict is usable
+_FRAMING   = '[{"question": "", "answer": ""}, {"question": "'
+
+
+def build_dictionary(questions, counts: Counter | None = None) -> bytes:
+    """
+    Preset dictionary from question texts. With `counts`, the most frequent
+    questions go last, where deflate finds them at the shortest distance.
+    """
+    counts = counts or Counter()
+    ordered = sorted(dict.fromkeys(questions), key=lambda q: counts[q])
+    parts, size = [], len(_FRAMING)
+    for q in reversed(ordered):                  # keep the most frequent when trimming
+        data = q.encode("utf-8")
+        if size + len(data) > _ZDICT_MAX:
+            break
+        parts.append(data)
+        size += len(data)
+    return b"".join(reversed(parts)) + _FRAMING.encode("utf-8")
+
+
+def _bank_questions() -> list[str]:
+    from question_bank import QUESTIONS
+    out = []
+
+    def walk(node):
+        if isinstance(node, str):
+            out.append(node)
+        elif isinstance(node, dict):
+            for v in node.values():
+                walk(v)
+        elif isinstance(node, (list, tuple)):
+            for v in node:
+                walk(v)
+
+    walk(QUESTIONS)
+    return out
+
+
+class TranscriptStore:
+    """
+    Append-only transcript blobs in `root`.
+
+    Args:
+        root:   Directory for the pack, dictionaries and CURRENT pointer.
+        fsync:  fsync the pack before returning a pointer, so a durable
+                record never points past the end of the pack.
+        seal:   (blob, context) → encrypted blob; new blobs are sealed if set.
+        unseal: Inverse of `seal`, for reading sealed blobs.
+    """
+
+    def __init__(self, root: str, fsync: bool = True,
+                 seal: Callable[[bytes, str], bytes] | None = None,
+                 unseal: Callable[[bytes, str], bytes] | None = None):
+        self.root    = root
+        self.fsync   = fsync
+        self._seal   = seal
+        self._unseal = unseal
+        self._dicts: dict[str, bytes] = {}
+        self._lock   = threading.Lock()
+
+    # ── Dictionaries ─────────────────────────────────────────────────────────
+
+    def _dict_path(self, dict_id: str) -> str:
+        return os.path.join(self.root, f"dict-{dict_id}.zdict")
+
+    def _load_dict(self, dict_id: str) -> bytes:
+        zdict = self._dicts.get(dict_id)
+        if zdict is None:
+            with open(self._dict_path(dict_id), "rb") as f:
+                zdict = self._dicts[dict_id] = f.read()
+        return zdict
+
+    def install_dictionary(self, zdict: bytes) -> str:
+        """Store `zdict` and make it the dictionary for new blobs; returns its id."""
+        os.makedirs(self.root, exist_ok=True)
+        dict_id = hashlib.blake2b(zdict, digest_size=6).hexdigest()
+        path = self._dict_path(dict_id)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as f:
+                f.write(zdict)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+        current = os.path.join(self.root, CURRENT)
+        with open(current + ".tmp", "w", encoding="utf-8") as f:
+            f.write(dict_id)
+        os.replace(current + ".tmp", current)
+        self._dicts[dict_id] = zdict
+        return dict_id
+
+    def current_dictionary(self) -> str:
+        try:
+            with open(os.path.join(self.root, CURRENT), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            with self._lock:
+                return self.install_dictionary(build_dictionary(_bank_questions()))
+
+    # ── Blobs ────────────────────────────────────────────────────────────────
+
+    def put(self, answers: list[dict], context: str = "") -> dict:
+        """
+        Compress (and seal, bound to `context`) one transcript and append
+        it; returns the pointer for the record.
+        """
+        dict_id = self.current_dictionary()
+        comp = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=self._load_dict(dict_id))
+        blob = comp.compress(json.dumps(answers, ensure_ascii=False).encode("utf-8")) + comp.flush()
+        if self._seal is not None:
+            blob = self._seal(blob, context)
+
+        pack = os.path.join(self.root, PACK)
+        with locked(pack):
+            fd = os.open(pack, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                offset = os.fstat(fd).st_size
+                try:
+                    view = memoryview(blob)
+                    while view:
+                        view = view[os.write(fd, view):]
+                    if self.fsync:
+                        os.fsync(fd)
+                except OSError:
+                    os.ftruncate(fd, offset)
+                    raise
+            finally:
+                os.close(fd)
+        pointer = {"pack": PACK, "offset": offset, "length": len(blob), "dict": dict_id}
+        if self._seal is not None:
+            pointer["sealed"] = True
+        return pointer
+
+    def get(self, pointer: dict, context: str = "") -> list[dict]:
+        """Read and decompress the transcript a record points to (`context` as sealed)."""
+        with open(os.path.join(self.root, pointer["pack"]), "rb") as f:
+            f.seek(pointer["offset"])
+            blob = f.read(pointer["length"])
+        if pointer.get("sealed"):
+            if self._unseal is None:
+                raise RuntimeError("transcript is sealed: open it through utils/storage.py")
+            blob = self._unseal(blob, context)
+        decomp = zlib.decompressobj(-15, zdict=self._load_dict(pointer["dict"]))
+        return json.loads(decomp.decompress(blob) + decomp.flush())
+
+    def erase(self, pointers) -> int:
+        """
+        Overwrite the given blobs with zeros in place (GDPR erasure). The
+        pack keeps its layout, so pointers of other records stay valid.
+
+        Returns:
+            Number of blobs erased.
+        """
+        erased = 0
+        pack = os.path.join(self.root, PACK)
+        if not os.path.exists(pack):
+            return 0
+        with locked(pack):
+            fd = os.open(pack, os.O_WRONLY)
+            try:
+                for pointer in pointers:
+                    if pointer.get("pack") != PACK:
+                        continue
+                    os.pwrite(fd, bytes(pointer["length"]), pointer["offset"])
+                    erased += 1
+                if erased and self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        return erased
+
+    # ── Training ─────────────────────────────────────────────────────────────
+
+    def train(self, transcripts) -> str:
+        """
+        Rebuild the dictionary from the questions in stored transcripts,
+        given as (pointer, context) pairs.
+        """
+        counts = Counter()
+        for pointer, context in transcripts:
+            try:
+                counts.update(a.get("question", "") for a in self.get(pointer, context))
+            except (OSError, ValueError, zlib.error):
+                continue
+        counts.pop("", None)
+        questions = list(counts) + [q for q in _bank_questions() if q not in counts]
+        return self.install_dictionary(build_dictionary(questions, counts))
+
+
+def main(argv: list[str] | None = None) -> int:
+    from utils.storage import iter_candidates, _transcript_store as store
+
+    parser = argparse.ArgumentParser(prog="python -m utils.transcripts")
+    parser.add_argument("command", choices=["train", "stats"])
+    args = parser.parse_args(argv)
+
+    transcripts = ((r["transcript"], r.get("record_id", ""))
+                   for r in iter_candidates() if r.get("transcript"))
+    if args.command == "train":
+        print(f"New dictionary: {store.train(transcripts)}")
+    else:
+        blobs = stored = raw = 0
+        for pointer, context in transcripts:
+            try:
+                raw += len(json.dumps(store.get(pointer, context), ensure_ascii=False).encode("utf-8"))
+            except (OSError, ValueError, zlib.error):
+                continue
+            blobs  += 1
+            stored += pointer["length"]
+        ratio = round(raw / stored, 2) if stored else 0
+        print(f"{blobs} transcript(s): {raw} bytes raw → {stored} bytes stored (×{ratio})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,414 @@
+"""
+utils/webhook.py
+─────────────────
+Delivery of completed screenings to an HTTP webhook (the ATS).
+
+The candidate store is the outbox: a screening is written once, by the
+same append (JSONL line, SQLite row) that saves it, so there is no second
+write that could be lost or drift from it. `WebhookDispatcher` is a
+background reader of the store's change stream (storage.read_changes):
+
+  - new records go out in batches of up to `batch_size` as
+        POST {"event": "screening.completed", "records": [...]}
+    with an `Idempotency-Key` derived from the batch's record_ids
+  - a failed batch (network error, timeout, 408/429/5xx) is retried with
+    exponential backoff and jitter (honouring Retry-After); the stream
+    offset only moves past a batch once it is accepted, so a slow or
+    dead endpoint delays records but never loses them
+  - record_ids already delivered are skipped: they are kept in a SQLite
+    sidecar committed in the same transaction as the stream offset, so
+    records re-read after a crash or a log rewrite go out once. Only
+    records that can still be re-read are kept: each row carries its
+    offset's leading integer, and rows below the committed offset's are
+    pruned in the same transaction (see CandidateStore.changes)
+  - a batch the endpoint rejects outright (any other 4xx) is parked in a
+    dead-letter table instead of blocking everything behind it; the table
+    keeps record_ids and the error only, the records stay in the store
+    (so a purge reaches them) and can be re-read from there
+
+One dispatcher runs per sidecar: processes race for its lock file and
+the losers stay idle, retrying the lock. A fresh sidecar starts at the
+end of the stream (records saved from then on). Transcripts are not sent.
+
+CLI:
+    python -m utils.webhook run                    # dispatcher in the foreground
+    python -m utils.webhook status                 # offset, delivered, dead letters
+    python -m utils.webhook stub --port 8765       # local stub receiver for testing
+
+The stub is a manual harness: point WEBHOOK_URL at it and run the
+dispatcher by hand (--fail-rate and --delay exercise the retry path).
+No test suite starts it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:          # Windows: no cross-process election, every process dispatches
+    fcntl = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS delivered (
+    record_id     TEXT PRIMARY KEY,
+    delivered_at  TEXT NOT NULL,
+    position      INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dead_letters (
+    record_id     TEXT PRIMARY KEY,
+    status        INTEGER NOT NULL,
+    detail        TEXT NOT NULL,
+    failed_at     TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+_RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+_LOCK_RETRY   = 5.0       # seconds between attempts to become the dispatcher
+_OMIT_FIELDS  = ("transcript",)
+
+ReadChanges = Callable[[str | None, int], tuple[list[tuple[str, dict]], str]]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _position(offset: str | None) -> int:
+    """Leading integer of a stream offset; entries below the committed one are never re-read."""
+    try:
+        return int((offset or "0").split(":", 1)[0])
+    except ValueError:
+        return 0                 # "end"
+
+
+def _open_sidecar(db_file: str) -> sqlite3.Connection:
+    """Connection to the sidecar, schema created (and pre-pruning sidecars migrated)."""
+    conn = sqlite3.connect(db_file, timeout=30.0)
+    conn.executescript(_SCHEMA)
+    if "position" not in {row[1] for row in conn.execute("PRAGMA table_info(delivered)")}:
+        conn.execute("ALTER TABLE delivered ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_delivered_position ON delivered (position)")
+    return conn
+
+
+class DeliveryError(Exception):
+    """A batch was not accepted; `retry` tells whether to try it again."""
+
+    def __init__(self, status: int, detail: str, retry: bool, retry_after: float | None = None):
+        super().__init__(f"{status or 'network'}: {detail}")
+        self.status      = status
+        self.detail      = detail
+        self.retry       = retry
+        self.retry_after = retry_after
+
+
+def post_batch(url: str, records: list[dict], timeout: float = 5.0, headers: dict | None = None):
+    """
+    POST one batch. Returns on a 2xx response, raises DeliveryError otherwise.
+    """
+    body = json.dumps({"event": "screening.completed", "records": records},
+                      ensure_ascii=False).encode("utf-8")
+    key = hashlib.sha256(",".join(r.get("record_id", "") for r in records).encode()).hexdigest()
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "Idempotency-Key": key[:32],
+        "User-Agent": "TalentScout-Webhook/1",
+        **(headers or {}),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        retry_after = e.headers.get("Retry-After") if e.headers else None
+        raise DeliveryError(
+            e.code, str(e.reason), e.code in _RETRY_STATUS,
+            float(retry_after) if retry_after and retry_after.isdigit() else None,
+        ) from e
+    except (urllib.error.URLError, OSError) as e:
+        raise DeliveryError(0, str(getattr(e, "reason", e)), True) from e
+
+
+class WebhookDispatcher:
+    """
+    Background thread delivering the change stream to `url`.
+
+    Args:
+        url:           Webhook endpoint.
+        read_changes:  storage.read_changes — (offset, limit) → (entries, next offset).
+        db_file:       SQLite sidecar with the offset, delivered ids and dead letters.
+        batch_size:    Records per POST.
+        timeout:       Seconds per request.
+        max_backoff:   Ceiling of the retry delay, seconds.
+        poll_interval: Seconds between polls of the stream while idle.
+    """
+
+    def __init__(self, url: str, read_changes: ReadChanges, db_file: str,
+                 batch_size: int = 50, timeout: float = 5.0, max_backoff: float = 300.0,
+                 poll_interval: float = 0.5, headers: dict | None = None):
+        self.url           = url
+        self.db_file       = db_file
+        self.batch_size    = batch_size
+        self.timeout       = timeout
+        self.max_backoff   = max_backoff
+        self.poll_interval = poll_interval
+        self._headers      = headers
+        self._read_changes = read_changes
+        self._stop         = threading.Event()
+        self._lock_fd      = None
+        self._thread: threading.Thread | None = None
+        self.stats = {"delivered": 0, "batches": 0, "retries": 0, "duplicates": 0,
+                      "dead_lettered": 0, "last_error": ""}
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self) -> "WebhookDispatcher":
+        """Pin the starting offset (so the caller's next save is included), then run in a thread."""
+        self._init_offset()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="webhook-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        """Dispatch until stop(): wait to hold the lock, then follow the stream."""
+        self._init_offset()
+        while not self._acquire():
+            if self._stop.wait(_LOCK_RETRY):
+                return
+        conn = _open_sidecar(self.db_file)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._follow(conn)
+        finally:
+            conn.close()
+            self._release()
+
+    def _init_offset(self):
+        """A fresh sidecar starts at the current end of the stream."""
+        conn = _open_sidecar(self.db_file)
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'offset'").fetchone() is None:
+                _, end = self._read_changes("end", 0)
+                with conn:
+                    conn.execute("INSERT OR IGNORE INTO meta VALUES ('offset', ?)", (end,))
+        finally:
+            conn.close()
+
+    def _acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        fd = os.open(self.db_file + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    # ── Delivery ─────────────────────────────────────────────────────────────
+
+    def _follow(self, conn: sqlite3.Connection):
+        offset = conn.execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()[0]
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                entries, next_offset = self._read_changes(offset, self.batch_size)
+            except Exception as e:      # store unavailable: back off like a failed POST
+                self.stats["last_error"] = f"read: {e}"
+                failures += 1
+                self._stop.wait(self._backoff(failures))
+                continue
+            batch = self._fresh(conn, [entry for _, entry in entries if "tombstone" not in entry])
+            if batch:
+                try:
+                    post_batch(self.url, batch, self.timeout, self._headers)
+                except DeliveryError as e:
+                    self.stats["last_error"] = str(e)
+                    if e.retry:
+                        failures += 1
+                        self.stats["retries"] += 1
+                        self._stop.wait(e.retry_after or self._backoff(failures))
+                        continue
+                    self._dead_letter(conn, batch, e)
+                    batch = []
+                else:
+                    self.stats["delivered"] += len(batch)
+                    self.stats["batches"] += 1
+            failures = 0
+            with conn:
+                if batch:
+                    positions = {entry.get("record_id"): _position(token) for token, entry in entries}
+                    conn.executemany("INSERT OR IGNORE INTO delivered VALUES (?, ?, ?)",
+                                     [(r["record_id"], _now(), positions[r["record_id"]]) for r in batch])
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (next_offset,))
+                conn.execute("DELETE FROM delivered WHERE position < ?", (_position(next_offset),))
+            offset = next_offset
+            if not entries:
+                self._stop.wait(self.poll_interval)
+
+    def _fresh(self, conn: sqlite3.Connection, records: list[dict]) -> list[dict]:
+        """Records not delivered before (one per record_id), transcripts stripped."""
+        seen, fresh = set(), []
+        for record in records:
+            rid = record.get("record_id")
+            if not rid or rid in seen:
+                continue
+            seen.add(rid)
+            fresh.append({k: v for k, v in record.items() if k not in _OMIT_FIELDS})
+        if not fresh:
+            return fresh
+        placeholders = ", ".join("?" * len(fresh))
+        done = {rid for (rid,) in conn.execute(
+            f"SELECT record_id FROM delivered WHERE record_id IN ({placeholders})",
+            [r["record_id"] for r in fresh])}
+        self.stats["duplicates"] += len(records) - len(fresh) + len(done)
+        return [r for r in fresh if r["record_id"] not in done]
+
+    def _dead_letter(self, conn: sqlite3.Connection, batch: list[dict], error: DeliveryError):
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dead_letters VALUES (?, ?, ?, ?)",
+                [(r["record_id"], error.status, error.detail, _now()) for r in batch],
+            )
+        self.stats["dead_lettered"] += len(batch)
+
+    def _backoff(self, failures: int) -> float:
+        return min(self.max_backoff, 2 ** (failures - 1)) * random.uniform(0.5, 1.0)
+
+
+def status(db_file: str) -> dict:
+    """Offset, delivered ids still kept and dead-letter count of a dispatcher sidecar."""
+    if not os.path.exists(db_file):
+        return {"offset": None, "delivered": 0, "dead_letters": 0}
+    conn = _open_sidecar(db_file)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()
+        return {
+            "offset":       row[0] if row else None,
+            "delivered":    conn.execute("SELECT COUNT(*) FROM delivered").fetchone()[0],
+            "dead_letters": conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+
+# ── Stub Receiver ─────────────────────────────────────────────────────────────
+
+def serve_stub(port: int = 8765, fail_rate: float = 0.0, delay: float = 0.0, out: str | None = None):
+    """
+    Local webhook receiver for testing: accepts batches, deduplicates by
+    record_id and appends each new record to `out` (JSONL) or stdout.
+    `fail_rate` answers that share of requests with 503, `delay` slows
+    every response down.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    seen, lock = set(), threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+            try:
+                records = json.loads(body)["records"]
+            except (ValueError, KeyError, TypeError):
+                self.send_response(400)
+                self.end_headers()
+                return
+            with lock:
+                fresh = [r for r in records if r.get("record_id") not in seen]
+                seen.update(r.get("record_id") for r in fresh)
+                lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in fresh)
+                if out:
+                    with open(out, "a", encoding="utf-8") as f:
+                        f.write(lines)
+                else:
+                    print(f"{len(fresh)} new / {len(records)} received", flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Stub webhook receiver on http://127.0.0.1:{port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.webhook")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="deliver new screenings until interrupted")
+    run.add_argument("--url", help="override WEBHOOK_URL")
+    sub.add_parser("status", help="print the dispatcher's progress")
+    stub = sub.add_parser("stub", help="run a local receiver for testing")
+    stub.add_argument("--port", type=int, default=8765)
+    stub.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered 503")
+    stub.add_argument("--delay", type=float, default=0.0, help="seconds before each response")
+    stub.add_argument("--out", help="append received records to this JSONL file")
+    args = parser.parse_args(argv)
+
+    if args.command == "stub":
+        serve_stub(args.port, args.fail_rate, args.delay, args.out)
+        return 0
+
+    from config import WEBHOOK_URL, WEBHOOK_DB, WEBHOOK_BATCH, WEBHOOK_TIMEOUT, WEBHOOK_MAX_BACKOFF
+
+    if args.command == "status":
+        print(status(WEBHOOK_DB))
+        return 0
+
+    from utils.storage import read_changes
+
+    url = args.url or WEBHOOK_URL
+    if not url:
+        parser.error("set WEBHOOK_URL in config.py or pass --url")
+    dispatcher = WebhookDispatcher(url, read_changes, WEBHOOK_DB, batch_size=WEBHOOK_BATCH,
+                                   timeout=WEBHOOK_TIMEOUT, max_backoff=WEBHOOK_MAX_BACKOFF)
+    print(f"Delivering to {url} (Ctrl-C to stop)")
+    try:
+        dispatcher.run()
+    except KeyboardInterrupt:
+        pass
+    print(dispatcher.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())